@@ -6,36 +6,1845 @@ Version: 1.0
 """
 
 import os
-import zipfile
 import datetime
 import logging
 import sys
 import argparse
-from pathlib import Path
+import time
+import zlib
+import json
+import struct
+import fnmatch
+import hashlib
+import functools
+import itertools
+import contextlib
+import re
+import threading
+from collections import namedtuple, deque
+
+# zipfile, shutil, concurrent.futures (multiprocessing), sqlite3 et le catalogue
+# sont importés dans les fonctions qui s'en servent: lister ou planifier une
+# sauvegarde ne paie pas leur chargement au démarrage.
+
+# Méthodes de compression des membres ZIP (mêmes valeurs que zipfile.ZIP_*)
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_BZIP2 = 12
+ZIP_LZMA = 14
+
+# Signature du descripteur de données qui suit un membre écrit en flux
+DATA_DESCRIPTOR_SIGNATURE = 0x08074b50
+
+# Horodatage contenu dans le nom d'une sauvegarde (backup_..._N.zip[.enc], snapshot_....json)
+BACKUP_NAME_DATE = re.compile(r'_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?:_\d+)?(?:\.volumes)?\.(?:zip|json)(?:\.enc)?$')
+
+# Suffixe des archives ZIP chiffrées (backup_....zip.enc, voir backup_crypto)
+ENCRYPTED_SUFFIX = ".enc"
+
+# Destination désignée par une URL (s3://bucket/préfixe) plutôt que par un dossier local
+STORAGE_URL = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://')
+
+# Entrée du manifeste produit par le scan unique du dossier source
+ManifestEntry = namedtuple('ManifestEntry', ['path', 'arcname', 'size', 'mtime_ns', 'mode', 'inode',
+                                             'dev', 'nlink'], defaults=(0, 1))
+
+# Le logging n'est configuré qu'une fois par processus (voir BackupManager.setup_logging)
+_logging_configured = False
+_logging_lock = threading.Lock()
+
+# Taille du tampon de copie vers l'archive
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Intervalle (secondes) de vérification de l'annulation en attendant un pool de processus
+CANCEL_POLL_INTERVAL = 0.1
+
+# Index d'état des fichiers pour les sauvegardes incrémentales, stocké avec les sauvegardes
+INDEX_FILENAME = ".backup_index.json"
+INDEX_VERSION = 1
+
+# Membre des archives incrémentales décrivant la base et les suppressions
+META_MEMBER = ".backup_meta.json"
+
+# Membre listant les fichiers stockés par référence (liens physiques, contenus identiques)
+LINKS_MEMBER = ".backup_links.json"
+
+# Membres techniques, qui ne sont pas des fichiers de la source
+INTERNAL_MEMBERS = frozenset({META_MEMBER, LINKS_MEMBER})
+
+# Préfixe lu pour départager les fichiers de même taille avant l'empreinte complète
+DEDUP_PREFIX_SIZE = 64 * 1024
+
+# Sauvegarde découpée en volumes: index copié dans chaque destination (backup_....volumes.json)
+# et volumes ZIP autonomes (backup_....vol001.zip), qui ne sont pas listés séparément
+VOLUME_INDEX_SUFFIX = ".volumes.json"
+VOLUME_INDEX_VERSION = 1
+VOLUME_NAME = re.compile(r'\.vol\d{3,}\.zip$')
+
+# Marges réservées par membre (en-têtes local et central, extra ZIP64) et par volume (fin du répertoire central)
+VOLUME_MEMBER_OVERHEAD = 256
+VOLUME_END_OVERHEAD = 1024
+
+# Taille des blocs compressés indépendamment par les workers
+PARALLEL_CHUNK_SIZE = 1024 * 1024
+
+# Fenêtre de l'historique DEFLATE utilisée pour amorcer chaque bloc
+DEFLATE_WINDOW = 32 * 1024
+
+
+def _gf2_matrix_times(mat, vec):
+    """Multiplie un vecteur par une matrice sur GF(2)"""
+    total = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            total ^= mat[i]
+        vec >>= 1
+        i += 1
+    return total
+
+
+def _gf2_matrix_square(mat):
+    """Élève une matrice sur GF(2) au carré"""
+    return [_gf2_matrix_times(mat, mat[n]) for n in range(32)]
+
+
+@functools.lru_cache(maxsize=64)
+def _crc32_shift_matrix(length):
+    """Matrice qui décale un CRC-32 de `length` octets nuls (mise en cache par longueur)"""
+    # Opérateur pour un bit nul, puis élévations au carré successives (cf. zlib)
+    odd = [0xEDB88320] + [1 << n for n in range(31)]
+    even = _gf2_matrix_square(odd)
+    odd = _gf2_matrix_square(even)
+    result = None
+    while length:
+        even = _gf2_matrix_square(odd)
+        if length & 1:
+            result = even if result is None else [_gf2_matrix_times(even, row) for row in result]
+        length >>= 1
+        if not length:
+            break
+        odd = _gf2_matrix_square(even)
+        if length & 1:
+            result = odd if result is None else [_gf2_matrix_times(odd, row) for row in result]
+        length >>= 1
+    return result
+
+
+def crc32_combine(crc1, crc2, len2):
+    """Combine les CRC-32 de deux blocs consécutifs (len2 = taille du second bloc)"""
+    if len2 == 0:
+        return crc1
+    return _gf2_matrix_times(_crc32_shift_matrix(len2), crc1) ^ crc2
+
+
+# Extensions de fichiers déjà compressés, stockés sans recompression par défaut
+COMPRESSED_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.avif',
+    '.mp3', '.aac', '.ogg', '.opus', '.flac', '.m4a',
+    '.mp4', '.m4v', '.mkv', '.avi', '.mov', '.webm',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.lzma', '.zst', '.7z', '.rar',
+    '.jar', '.apk', '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp', '.epub',
+})
+
+# Noms des codecs acceptés dans les règles de compression
+CODEC_METHODS = {
+    'stored': ZIP_STORED,
+    'deflate': ZIP_DEFLATED,
+    'bzip2': ZIP_BZIP2,
+    'lzma': ZIP_LZMA,
+}
+
+
+def parse_codec(spec):
+    """
+    Convertit une spécification de codec en (méthode ZIP, niveau)
+    
+    Formats acceptés: 'stored', 'deflate', 'deflate:1' à 'deflate:9', 'bzip2',
+    'bzip2:1' à 'bzip2:9', 'lzma', ou directement un tuple (méthode, niveau).
+    """
+    if isinstance(spec, tuple):
+        return spec
+    name, _, level = spec.strip().lower().partition(':')
+    if name not in CODEC_METHODS:
+        raise ValueError(f"Codec inconnu: '{spec}' (choix: {', '.join(CODEC_METHODS)})")
+    method = CODEC_METHODS[name]
+    if not level:
+        return method, None
+    if method not in (ZIP_DEFLATED, ZIP_BZIP2) or not level.isdigit() \
+            or not 1 <= int(level) <= 9:
+        raise ValueError(f"Niveau de compression invalide: '{spec}'")
+    return method, int(level)
+
+
+def codec_name(method, level):
+    """Nom lisible d'un couple (méthode ZIP, niveau)"""
+    name = next(key for key, value in CODEC_METHODS.items() if value == method)
+    return f"{name}:{level}" if level is not None else name
+
+
+def _zinfo_level(zinfo):
+    """Niveau de compression d'un ZipInfo (attribut privé avant Python 3.13)"""
+    try:
+        return zinfo.compress_level
+    except AttributeError:
+        return zinfo._compresslevel
+
+
+def parse_size(text):
+    """Convertit une taille comme '512', '64K', '10M' ou '2G' en octets"""
+    text = text.strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def _make_compressor(method, level):
+    """Crée un compresseur produisant le flux brut attendu dans un membre ZIP"""
+    if method == ZIP_DEFLATED:
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -15)
+    if method == ZIP_BZIP2:
+        import bz2
+        return bz2.BZ2Compressor(level or 9)
+    if method == ZIP_LZMA:
+        import zipfile
+        return zipfile.LZMACompressor()
+    raise ValueError(f"Méthode de compression non supportée: {method}")
+
+
+@functools.lru_cache(maxsize=None)
+def _estimate_codec_cost(method, level):
+    """Coût CPU estimé (secondes par octet) d'un codec, mesuré sur un échantillon mixte"""
+    sample = b"".join(b"ligne %d: donnees de calibration du codec\n" % i for i in range(8192))
+    sample += os.urandom(len(sample))
+    if method == ZIP_STORED:
+        return 0.0
+    start = time.process_time()
+    compressor = _make_compressor(method, level)
+    compressor.compress(sample)
+    compressor.flush()
+    return (time.process_time() - start) / len(sample)
+
+
+class CompressionPolicy:
+    """
+    Choisit le codec de chaque fichier
+    
+    Les règles sont évaluées dans cet ordre: extension, seuils de taille,
+    sonde de compressibilité sur le premier bloc, puis codec par défaut.
+    
+    Args:
+        default: Codec par défaut ('deflate:6', 'lzma', (méthode, niveau)...)
+        extension_rules (dict): Extension ('.log') -> codec
+        size_rules (dict): Taille minimale en octets -> codec (le plus grand seuil atteint l'emporte)
+        probe (bool): Tester la compressibilité du premier bloc des fichiers sans règle
+        store_compressed (bool): Stocker sans recompression les formats déjà compressés
+    """
+    
+    PROBE_SIZE = 64 * 1024
+    PROBE_MIN_SIZE = 4 * 1024
+    PROBE_RATIO = 0.95
+    
+    def __init__(self, default='deflate', extension_rules=None, size_rules=None, probe=False,
+                 store_compressed=True):
+        self.default = parse_codec(default)
+        self.extension_rules = {}
+        if store_compressed:
+            self.extension_rules.update((ext, (ZIP_STORED, None)) for ext in COMPRESSED_EXTENSIONS)
+        for ext, spec in (extension_rules or {}).items():
+            ext = ext.lower() if ext.startswith('.') else '.' + ext.lower()
+            self.extension_rules[ext] = parse_codec(spec)
+        self.size_rules = sorted(((int(size), parse_codec(spec)) for size, spec in (size_rules or {}).items()),
+                                 reverse=True)
+        self.probe = probe
+    
+    def choose(self, entry):
+        """
+        Détermine le codec d'une entrée du manifeste
+        
+        Returns:
+            tuple: (méthode ZIP, niveau ou None)
+        """
+        ext = os.path.splitext(entry.arcname)[1].lower()
+        if ext in self.extension_rules:
+            return self.extension_rules[ext]
+        for min_size, codec in self.size_rules:
+            if entry.size >= min_size:
+                return codec
+        if self.probe and entry.size >= self.PROBE_MIN_SIZE and self.default[0] != ZIP_STORED:
+            try:
+                with open(entry.path, 'rb') as f:
+                    block = f.read(self.PROBE_SIZE)
+            except OSError:
+                return self.default
+            if block and len(zlib.compress(block, 1)) >= len(block) * self.PROBE_RATIO:
+                return ZIP_STORED, None
+        return self.default
+
+
+# Motif '*.ext' réduit à une recherche de suffixe
+_SUFFIX_PATTERN = re.compile(r'\*(\.[^*?\[/\\]+)')
+
+
+def _glob_to_regex(pattern):
+    """
+    Traduit un motif de type gitignore en expression régulière
+    
+    '*' et '?' ne franchissent pas '/', '**' couvre un nombre quelconque de
+    dossiers, '[...]' est une classe de caractères ('[!...]' pour l'exclure).
+    """
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == n:
+            out.append('/.*')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif c == '*':
+            out.append('[^/]*')
+            i += 1
+        elif c == '?':
+            out.append('[^/]')
+            i += 1
+        elif c == '[' and pattern.find(']', i + 2) != -1:
+            end = pattern.find(']', i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end + 1
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return ''.join(out)
+
+
+FilterRule = namedtuple('FilterRule', ['text', 'pattern', 'negated', 'dir_only', 'anchored'])
+
+
+class _RuleMatcher:
+    """Règles applicables à un type d'entrée (fichiers ou dossiers), indexées pour la recherche"""
+    
+    def __init__(self, rules, is_dir):
+        self.names = {}
+        self.suffixes = {}
+        name_patterns = []
+        path_patterns = []
+        for index, rule in enumerate(rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.anchored:
+                path_patterns.append((index, rule.pattern))
+            elif not any(c in rule.pattern for c in '*?[\\'):
+                self.names[rule.pattern] = index
+            elif _SUFFIX_PATTERN.fullmatch(rule.pattern):
+                self.suffixes[rule.pattern[1:]] = index
+            else:
+                name_patterns.append((index, rule.pattern))
+        self.name_regex = self._compile(name_patterns)
+        self.path_regex = self._compile(path_patterns)
+    
+    @staticmethod
+    def _compile(patterns):
+        """
+        Réunit les motifs en une seule expression, la règle la plus récente en premier
+        
+        La première alternative qui correspond est ainsi celle de la dernière
+        règle, et son groupe nommé ('r<indice>') donne l'indice de la règle.
+        """
+        if not patterns:
+            return None
+        return re.compile('|'.join(f'(?P<r{index}>{_glob_to_regex(pattern)})'
+                                   for index, pattern in reversed(patterns)))
+    
+    def match(self, relpath, name):
+        """Indice de la dernière règle qui correspond à l'entrée, ou -1"""
+        best = self.names.get(name, -1)
+        if self.suffixes:
+            dot = name.find('.')
+            while dot != -1:
+                best = max(best, self.suffixes.get(name[dot:], -1))
+                dot = name.find('.', dot + 1)
+        for regex, subject in ((self.name_regex, name), (self.path_regex, relpath)):
+            if regex is not None:
+                found = regex.fullmatch(subject)
+                if found:
+                    best = max(best, int(found.lastgroup[1:]))
+        return best
+
+
+class FileFilter:
+    """
+    Règles d'exclusion et d'inclusion des fichiers, à la manière de .gitignore
+    
+    Chaque règle est un motif glob; la dernière règle qui correspond à une
+    entrée décide ('!motif' réinclut). Un motif terminé par '/' ne s'applique
+    qu'aux dossiers; un motif contenant '/' est relatif à la racine de la
+    source, sinon il s'applique au nom à toute profondeur. Un dossier exclu
+    n'est pas parcouru: son contenu ne peut pas être réinclus.
+    
+    Les règles sont compilées une fois: les noms exacts et les extensions
+    ('*.tmp') sont des recherches dans un dictionnaire, les autres motifs
+    sont réunis en deux expressions régulières (nom et chemin relatif).
+    
+    Args:
+        rules (list[str]): Règles dans l'ordre ('node_modules/', '*.tmp', '!garder.tmp'...)
+    """
+    
+    def __init__(self, rules=()):
+        self.rules = []
+        for text in rules:
+            rule = self._parse_rule(text)
+            if rule is not None:
+                self.rules.append(rule)
+        self._files = _RuleMatcher(self.rules, is_dir=False)
+        self._dirs = _RuleMatcher(self.rules, is_dir=True)
+    
+    @staticmethod
+    def _parse_rule(text):
+        """Analyse une règle (None pour une ligne vide ou un commentaire)"""
+        line = text.rstrip('\n').rstrip()
+        if not line or line.startswith('#'):
+            return None
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith(('\\!', '\\#')):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        anchored = '/' in line
+        line = line.lstrip('/')
+        if not line:
+            raise ValueError(f"Règle de filtrage invalide: '{text}'")
+        return FilterRule(text.strip(), line, negated, dir_only, anchored)
+    
+    @staticmethod
+    def read_rules(path):
+        """Lit un fichier de règles (une par ligne, '#' pour les commentaires)"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return [line for line in f if FileFilter._parse_rule(line) is not None]
+    
+    def __bool__(self):
+        return bool(self.rules)
+    
+    def excluded_by(self, relpath, name, is_dir=False):
+        """
+        Règle qui exclut une entrée
+        
+        Args:
+            relpath (str): Chemin relatif à la source, séparé par '/'
+            name (str): Dernier composant du chemin
+            is_dir (bool): L'entrée est un dossier
+        
+        Returns:
+            str: Texte de la règle d'exclusion, ou None si l'entrée est conservée
+        """
+        index = (self._dirs if is_dir else self._files).match(relpath, name)
+        if index < 0 or self.rules[index].negated:
+            return None
+        return self.rules[index].text
+
+
+def _compress_chunk(path, offset, length, method, level, is_last):
+    """
+    Compresse un bloc de fichier pour un membre ZIP (exécuté dans un worker)
+    
+    En DEFLATE, le bloc est amorcé avec les 32 Ko qui le précèdent pour garder
+    le taux de compression d'un flux continu, et les blocs intermédiaires se
+    terminent par un Z_SYNC_FLUSH afin que leur concaténation reste un flux
+    valide. BZIP2 et LZMA ne se concatènent pas: le bloc est alors le fichier
+    entier.
+    
+    Returns:
+        tuple: (données compressées, CRC-32 du bloc, octets lus, temps CPU)
+    """
+    cpu_start = time.process_time()
+    with open(path, 'rb') as f:
+        zdict = b''
+        if method == ZIP_DEFLATED and offset > 0:
+            start = max(0, offset - DEFLATE_WINDOW)
+            f.seek(start)
+            zdict = f.read(offset - start)
+        f.seek(offset)
+        data = f.read(length)
+    crc = zlib.crc32(data)
+    if method == ZIP_STORED:
+        return data, crc, len(data), time.process_time() - cpu_start
+    if zdict:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level,
+                                      zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = _make_compressor(method, level)
+    compressed = compressor.compress(data)
+    if method == ZIP_DEFLATED and not is_last:
+        compressed += compressor.flush(zlib.Z_SYNC_FLUSH)
+    else:
+        compressed += compressor.flush()
+    return compressed, crc, len(data), time.process_time() - cpu_start
+
+
+# Identifiant du champ extra "extended timestamp" (mtime à la seconde, en UTC)
+EXTRA_TIMESTAMP_ID = 0x5455
+
+
+def _timestamp_extra(mtime_ns):
+    """Champ extra ZIP portant le mtime exact à la seconde près"""
+    seconds = max(-2 ** 31, min(2 ** 31 - 1, mtime_ns // 1_000_000_000))
+    return struct.pack('<HHBl', EXTRA_TIMESTAMP_ID, 5, 1, seconds)
+
+
+def _member_mtime(zinfo):
+    """Retrouve le mtime d'un membre (champ extra, sinon date ZIP à 2 secondes près)"""
+    extra = zinfo.extra
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack('<HH', extra[pos:pos + 4])
+        if header_id == EXTRA_TIMESTAMP_ID and size >= 5 and extra[pos + 4] & 1:
+            return struct.unpack('<l', extra[pos + 5:pos + 9])[0]
+        pos += 4 + size
+    return time.mktime(zinfo.date_time + (0, 0, -1))
+
+
+def _safe_member_path(target_dir, name):
+    """Chemin de destination d'un membre, en refusant toute sortie du dossier cible"""
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+    if not parts or '..' in parts or os.path.isabs(name) or ':' in parts[0]:
+        raise ValueError(f"Nom de membre dangereux dans l'archive: '{name}'")
+    return os.path.join(target_dir, *parts)
+
+
+def _copy_sparse(src, dest):
+    """
+    Copie un flux par blocs en laissant un trou à la place des blocs nuls
+    
+    Les plages de zéros d'un fichier creux (images disques, bases de
+    données) ne sont pas allouées sur le disque de restauration.
+    """
+    while True:
+        block = src.read(COPY_BUFFER_SIZE)
+        if not block:
+            break
+        if block.count(0) == len(block):
+            dest.seek(len(block), os.SEEK_CUR)
+        else:
+            dest.write(block)
+    dest.truncate()
+
+
+def _open_archive_file(archive_path, key=None):
+    """
+    Ouvre une archive en lecture binaire, déchiffrée à la volée si elle est chiffrée (.zip.enc)
+    
+    Args:
+        key (EncryptionKey): Clé des archives chiffrées
+    """
+    if not archive_path.endswith(ENCRYPTED_SUFFIX):
+        return open(archive_path, 'rb')
+    if key is None:
+        raise ValueError(f"Sauvegarde chiffrée, clé requise (--key-file ou --passphrase): "
+                         f"'{os.path.basename(archive_path)}'")
+    from backup_crypto import DecryptingReader
+    raw = open(archive_path, 'rb')
+    try:
+        return DecryptingReader(raw, key)
+    except BaseException:
+        raw.close()
+        raise
+
+
+def _open_archive(archive_path, key=None):
+    """Ouvre une archive ZIP en lecture, chiffrée ou non (voir _open_archive_file)"""
+    import zipfile
+    if not archive_path.endswith(ENCRYPTED_SUFFIX):
+        return zipfile.ZipFile(archive_path, 'r')
+    fp = _open_archive_file(archive_path, key)
+    try:
+        zipf = zipfile.ZipFile(fp, 'r')
+    except BaseException:
+        fp.close()
+        raise
+    # Le flux déchiffré est fermé avec le ZipFile, comme un fichier ouvert par zipfile
+    zipf._filePassed = 0
+    return zipf
+
+
+def _restore_members(archive_path, names, target_dir, cancel_event=None, key=None):
+    """
+    Extrait une liste de membres d'une archive (exécuté dans un worker)
+    
+    Les données sont copiées par blocs sans charger un membre entier en
+    mémoire, puis le mode et le mtime d'origine sont réappliqués.
+    
+    Returns:
+        tuple: (fichiers restaurés, octets écrits)
+    """
+    count = 0
+    written = 0
+    with _open_archive(archive_path, key) as zipf:
+        for name in names:
+            if cancel_event is not None and cancel_event.is_set():
+                raise BackupCancelled("Restauration annulée")
+            zinfo = zipf.getinfo(name)
+            dest_path = _safe_member_path(target_dir, name)
+            if zinfo.is_dir():
+                os.makedirs(dest_path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with zipf.open(zinfo) as src, open(dest_path, 'wb') as dest:
+                _copy_sparse(src, dest)
+            mode = (zinfo.external_attr >> 16) & 0o7777
+            if mode:
+                os.chmod(dest_path, mode)
+            mtime = _member_mtime(zinfo)
+            os.utime(dest_path, (mtime, mtime))
+            count += 1
+            written += zinfo.file_size
+    return count, written
+
+
+def _add_codec_stats(codec_stats, zinfo, cpu_time):
+    """Cumule un membre écrit dans les statistiques par codec"""
+    stats = codec_stats.setdefault(codec_name(zinfo.compress_type, _zinfo_level(zinfo)),
+                                   {'files': 0, 'original': 0, 'compressed': 0, 'cpu': 0.0})
+    stats['files'] += 1
+    stats['original'] += zinfo.file_size
+    stats['compressed'] += zinfo.compress_size
+    stats['cpu'] += cpu_time
+
+
+def _balanced_buckets(infos, count):
+    """
+    Répartit des membres en lots de taille compressée équivalente
+    
+    Répartition gloutonne: le plus gros membre restant va au lot le moins chargé.
+    
+    Returns:
+        list: Listes de noms de membres (au plus count lots, aucun vide)
+    """
+    buckets = [[0, []] for _ in range(max(1, min(count, len(infos))))]
+    for zinfo in sorted(infos, key=lambda zi: zi.compress_size, reverse=True):
+        bucket = min(buckets, key=lambda b: b[0])
+        bucket[0] += zinfo.compress_size + 1
+        bucket[1].append(zinfo.filename)
+    return [names for _, names in buckets if names]
+
+
+# Nombre de membres (ou de blocs) relus entièrement en vérification rapide
+VERIFY_SAMPLE_SIZE = 8
+
+# Nombre maximal d'erreurs conservées par sauvegarde vérifiée
+VERIFY_MAX_ERRORS = 20
+
+
+def _verify_sample(items, size=VERIFY_SAMPLE_SIZE):
+    """Échantillon déterministe réparti sur toute la liste (premier et dernier compris)"""
+    if len(items) <= size:
+        return list(items)
+    step = (len(items) - 1) / (size - 1)
+    return [items[round(i * step)] for i in range(size)]
+
+
+def _verify_members(archive_path, names, check_headers=False, key=None):
+    """
+    Vérifie des membres d'une archive ZIP (exécuté dans un worker)
+    
+    Chaque membre est décompressé par blocs jusqu'au bout: zipfile compare
+    alors le CRC-32 des données à celui du répertoire central. Avec
+    check_headers, l'en-tête local de tous les membres est aussi contrôlé
+    (signature et nom), ce qui détecte une troncature sans tout relire.
+    Une archive chiffrée est déchiffrée à la volée: chaque bloc lu est
+    aussi authentifié.
+    
+    Returns:
+        tuple: (membres vérifiés, octets lus, erreurs)
+    """
+    import zipfile
+    errors = []
+    checked = 0
+    read_bytes = 0
+    with _open_archive(archive_path, key) as zipf:
+        if check_headers:
+            with _open_archive_file(archive_path, key) as raw:
+                for zinfo in zipf.infolist():
+                    raw.seek(zinfo.header_offset)
+                    header = raw.read(zipfile.sizeFileHeader)
+                    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+                        errors.append(f"{zinfo.filename}: en-tête local invalide")
+                        continue
+                    name_length = struct.unpack('<H', header[26:28])[0]
+                    if raw.read(name_length) != zinfo.orig_filename.encode('utf-8' if zinfo.flag_bits & 0x800
+                                                                           else 'cp437'):
+                        errors.append(f"{zinfo.filename}: nom de l'en-tête local différent")
+        for name in names:
+            try:
+                with zipf.open(name) as member:
+                    while True:
+                        block = member.read(COPY_BUFFER_SIZE)
+                        if not block:
+                            break
+                        read_bytes += len(block)
+            except (zipfile.BadZipFile, zlib.error, EOFError, OSError, ValueError, NotImplementedError) as e:
+                errors.append(f"{name}: {e}")
+            checked += 1
+    return checked, read_bytes, errors
+
+
+def _verify_snapshot(snapshot_path, quick=False):
+    """
+    Vérifie un instantané du dépôt dédupliqué (exécuté dans un worker)
+    
+    Tous les blocs référencés doivent figurer dans l'index des packs; chaque
+    bloc (ou un échantillon en mode rapide) est relu et son SHA-256 recalculé.
+    
+    Returns:
+        tuple: (blocs vérifiés, octets lus, erreurs)
+    """
+    store = ChunkStore(os.path.dirname(os.path.dirname(snapshot_path))).open()
+    snapshot = store.load_snapshot(os.path.basename(snapshot_path))
+    errors = []
+    digests = []
+    seen = set()
+    for record in snapshot['files']:
+        for digest in record['chunks']:
+            if digest in seen:
+                continue
+            seen.add(digest)
+            if store.has_chunk(digest):
+                digests.append(digest)
+            else:
+                errors.append(f"{record['path']}: bloc absent du dépôt {digest}")
+    if quick:
+        digests = _verify_sample(digests)
+    read_bytes = 0
+    for digest in digests:
+        try:
+            read_bytes += len(store.get_chunk(digest))
+        except (ValueError, zlib.error, OSError) as e:
+            errors.append(str(e))
+    return len(digests), read_bytes, errors
+
+
+class _RawMemberWriter:
+    """
+    Ajoute des membres déjà compressés au flux d'un ZipFile ouvert en écriture
+    
+    Dans un fichier repositionnable, l'en-tête local est réécrit avec les
+    tailles finales; dans un flux (envoi vers une cible distante), elles
+    suivent les données dans un descripteur, comme le fait zipfile.
+    """
+    
+    def __init__(self, zipf):
+        self.zipf = zipf
+        self.zinfo = None
+        self.zip64 = False
+    
+    def begin(self, zinfo):
+        """Écrit un en-tête local provisoire, réécrit à la fin du membre"""
+        import zipfile
+        fp = self.zipf.fp
+        self.zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+        zinfo.header_offset = fp.tell()
+        if zinfo.compress_type == ZIP_LZMA:
+            # Même drapeau que zipfile: flux LZMA terminé par un marqueur de fin
+            zinfo.flag_bits |= 0x02
+        if not self.zipf._seekable:
+            # Tailles et CRC dans un descripteur de données après le membre
+            zinfo.flag_bits |= 0x08
+        zinfo.CRC = 0
+        zinfo.compress_size = 0
+        fp.write(zinfo.FileHeader(self.zip64))
+        zinfo.file_size = 0
+        self.zinfo = zinfo
+    
+    def write(self, data, crc, size):
+        """Ajoute un bloc compressé et met à jour le CRC du membre"""
+        self.zipf.fp.write(data)
+        zinfo = self.zinfo
+        zinfo.CRC = crc32_combine(zinfo.CRC, crc, size) if zinfo.file_size else crc
+        zinfo.compress_size += len(data)
+        zinfo.file_size += size
+    
+    def end(self):
+        """Réécrit l'en-tête local avec les tailles finales et enregistre le membre"""
+        zipf, zinfo = self.zipf, self.zinfo
+        fp = zipf.fp
+        if zipf._seekable:
+            end_offset = fp.tell()
+            fp.seek(zinfo.header_offset)
+            fp.write(zinfo.FileHeader(self.zip64))
+            fp.seek(end_offset)
+        else:
+            fp.write(struct.pack('<LLQQ' if self.zip64 else '<LLLL', DATA_DESCRIPTOR_SIGNATURE,
+                                 zinfo.CRC, zinfo.compress_size, zinfo.file_size))
+            end_offset = fp.tell()
+        zipf.filelist.append(zinfo)
+        zipf.NameToInfo[zinfo.filename] = zinfo
+        zipf.start_dir = end_offset
+        self.zinfo = None
+    
+    def abort(self):
+        """
+        Abandonne le membre en cours en tronquant ce qui a déjà été écrit
+        
+        Un flux ne se tronque pas: les octets déjà envoyés restent, mais le
+        membre n'entre pas dans le répertoire central et n'est jamais lu.
+        """
+        fp = self.zipf.fp
+        if self.zipf._seekable:
+            fp.seek(self.zinfo.header_offset)
+            fp.truncate()
+            self.zipf.start_dir = self.zinfo.header_offset
+        else:
+            self.zipf.start_dir = fp.tell()
+        self.zinfo = None
+
+
+# Archive en cours d'écriture et son journal de points de reprise
+PART_SUFFIX = ".part"
+CHECKPOINT_SUFFIX = ".checkpoint"
+CHECKPOINT_VERSION = 1
+
+# Intervalle minimal (secondes) entre deux points de reprise
+CHECKPOINT_INTERVAL = 30.0
+
+# Attributs d'un ZipInfo sauvegardés dans le journal pour reconstruire le répertoire central
+_ZINFO_FIELDS = ('filename', 'date_time', 'compress_type', 'create_system', 'create_version',
+                 'extract_version', 'reserved', 'flag_bits', 'volume', 'internal_attr',
+                 'external_attr', 'header_offset', 'CRC', 'compress_size', 'file_size')
+
+
+def _zinfo_to_record(zinfo):
+    """Sérialise les champs d'un membre écrit nécessaires au répertoire central"""
+    record = {field: getattr(zinfo, field) for field in _ZINFO_FIELDS}
+    record['extra'] = zinfo.extra.hex()
+    record['comment'] = zinfo.comment.hex()
+    return record
+
+
+def _zinfo_from_record(record):
+    """Reconstruit un ZipInfo à partir d'un enregistrement du journal"""
+    import zipfile
+    zinfo = zipfile.ZipInfo(record['filename'], tuple(record['date_time']))
+    for field in _ZINFO_FIELDS[2:]:
+        setattr(zinfo, field, record[field])
+    zinfo.extra = bytes.fromhex(record['extra'])
+    zinfo.comment = bytes.fromhex(record['comment'])
+    return zinfo
+
+
+def _lock_file(f):
+    """
+    Verrouille un fichier ouvert de manière exclusive et non bloquante
+    
+    Lève BlockingIOError si un autre processus le détient. Sans fcntl
+    (Windows), aucun verrou n'est pris.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+class _CheckpointJournal:
+    """
+    Journal des membres définitivement écrits dans une archive .part
+    
+    La première ligne décrit la sauvegarde; chaque point de reprise ajoute
+    une ligne JSON avec les nouveaux membres et la position de fin des
+    données, après fsync de l'archive puis du journal. Une ligne tronquée par
+    un arrêt brutal est ignorée à la relecture.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.fp = None
+        self.recorded = 0
+    
+    @staticmethod
+    def load(path):
+        """
+        Relit un journal
+        
+        Returns:
+            tuple: (en-tête, position de reprise ou None sans point de reprise,
+                    enregistrements des membres), ou None si l'en-tête est illisible
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+        except OSError:
+            return None
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return None
+        if header.get('version') != CHECKPOINT_VERSION:
+            return None
+        offset = None
+        records = []
+        for line in lines[1:]:
+            try:
+                checkpoint = json.loads(line)
+            except ValueError:
+                break
+            records.extend(checkpoint['members'])
+            offset = checkpoint['offset']
+        return header, offset, records
+    
+    def start(self, header=None, recorded=0):
+        """Crée le journal (avec son en-tête) ou le rouvre en ajout lors d'une reprise"""
+        self.recorded = recorded
+        if header is None:
+            # Reprise: une éventuelle ligne tronquée est retirée avant d'ajouter
+            with open(self.path, 'rb+') as f:
+                data = f.read()
+                f.truncate(data.rfind(b'\n') + 1)
+            self.fp = open(self.path, 'a', encoding='utf-8')
+        else:
+            self.fp = open(self.path, 'w', encoding='utf-8')
+            self.fp.write(json.dumps(header, ensure_ascii=False) + '\n')
+    
+    def commit(self, zipf, raw):
+        """Enregistre un point de reprise après les membres complètement écrits"""
+        raw.flush()
+        os.fsync(raw.fileno())
+        members = [_zinfo_to_record(zinfo) for zinfo in zipf.filelist[self.recorded:]]
+        self.fp.write(json.dumps({'offset': zipf.start_dir, 'members': members}, ensure_ascii=False) + '\n')
+        self.fp.flush()
+        os.fsync(self.fp.fileno())
+        self.recorded = len(zipf.filelist)
+    
+    @property
+    def has_checkpoint(self):
+        """Indique si au moins un point de reprise a été enregistré"""
+        return self.recorded > 0
+    
+    def close(self):
+        """Ferme le journal"""
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+    
+    def remove(self):
+        """Ferme et supprime le journal"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+# Paramètres du découpage par contenu (FastCDC) du dépôt de blocs
+CDC_MIN_SIZE = 16 * 1024
+CDC_AVG_SIZE = 64 * 1024
+CDC_MAX_SIZE = 256 * 1024
+
+# Taille cible d'un fichier pack avant d'en ouvrir un nouveau
+PACK_TARGET_SIZE = 64 * 1024 * 1024
+
+# Dossier du dépôt de blocs dans la destination
+CHUNKSTORE_DIRNAME = "chunkstore"
+
+
+@functools.lru_cache(maxsize=None)
+def _gear_table():
+    """
+    Table de 256 valeurs pseudo-aléatoires fixes pour le hachage roulant Gear
+    
+    Construite à la première utilisation du dépôt de blocs, pas à l'import.
+    """
+    import random
+    rng = random.Random(0x6261636B7570)
+    return tuple(rng.getrandbits(64) for _ in range(256))
+
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _cdc_masks(avg_size):
+    """Masques strict et relâché du découpage normalisé autour de la taille moyenne"""
+    bits = avg_size.bit_length() - 1
+    # Les bits de poids fort du hachage Gear sont les mieux mélangés
+    mask_strict = ((1 << (bits + 1)) - 1) << (64 - bits - 1)
+    mask_loose = ((1 << (bits - 1)) - 1) << (64 - bits + 1)
+    return mask_strict, mask_loose
+
+
+def find_chunk_boundary(data, start, end, min_size=CDC_MIN_SIZE, avg_size=CDC_AVG_SIZE,
+                        max_size=CDC_MAX_SIZE):
+    """
+    Trouve la fin du prochain bloc défini par le contenu dans data[start:end]
+    
+    Le hachage n'est calculé qu'après min_size octets; le masque strict est
+    utilisé jusqu'à la taille moyenne puis le masque relâché, ce qui resserre
+    la distribution des tailles autour de avg_size.
+    
+    Returns:
+        int: Position (exclue) de la fin du bloc
+    """
+    length = end - start
+    if length <= min_size:
+        return end
+    length = min(length, max_size)
+    mask_strict, mask_loose = _cdc_masks(avg_size)
+    gear = _gear_table()
+    h = 0
+    i = start + min_size
+    normal = start + min(avg_size, length)
+    while i < normal:
+        h = ((h << 1) + gear[data[i]]) & _MASK_64
+        i += 1
+        if not h & mask_strict:
+            return i
+    limit = start + length
+    while i < limit:
+        h = ((h << 1) + gear[data[i]]) & _MASK_64
+        i += 1
+        if not h & mask_loose:
+            return i
+    return limit
+
+
+class ChunkStore:
+    """
+    Dépôt de blocs dédupliqués adressés par leur empreinte SHA-256
+    
+    Organisation du dépôt:
+        packs/pack-NNNNNN.pack   blocs compressés (zlib) écrits à la suite
+        packs/pack-NNNNNN.idx    une ligne "empreinte offset longueur" par bloc
+        snapshots/snapshot_*.json  manifeste d'un instantané (fichiers -> blocs)
+    
+    Un bloc déjà présent n'est jamais réécrit: l'espace disque croît avec la
+    quantité de données modifiées et non avec le nombre d'instantanés.
+    """
+    
+    def __init__(self, repo_dir, logger=None):
+        self.repo_dir = repo_dir
+        self.packs_dir = os.path.join(repo_dir, "packs")
+        self.snapshots_dir = os.path.join(repo_dir, "snapshots")
+        self.logger = logger or logging.getLogger(__name__)
+        self._index = None
+        self._pack = None
+        self._pack_idx = None
+        self._pack_name = None
+    
+    def open(self):
+        """Crée l'arborescence du dépôt si besoin et charge l'index des blocs"""
+        os.makedirs(self.packs_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        self._index = {}
+        for name in sorted(os.listdir(self.packs_dir)):
+            if not name.endswith(".idx"):
+                continue
+            pack_name = name[:-len(".idx")] + ".pack"
+            with open(os.path.join(self.packs_dir, name), 'r', encoding='ascii') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 3:
+                        self._index[parts[0]] = (pack_name, int(parts[1]), int(parts[2]))
+        return self
+    
+    def close(self):
+        """Termine le pack en cours en s'assurant que les données sont sur disque"""
+        if self._pack is not None:
+            for f in (self._pack, self._pack_idx):
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+            self._pack = self._pack_idx = self._pack_name = None
+    
+    def __enter__(self):
+        return self.open()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _new_pack(self):
+        """
+        Ouvre un nouveau pack; les packs existants ne sont jamais modifiés
+        
+        Le pack est créé de manière exclusive: deux sauvegardes partageant le
+        dépôt (ordonnanceur, lancements simultanés) n'écrivent jamais dans le
+        même pack, le second prend le numéro suivant.
+        """
+        self.close()
+        numbers = [int(name[5:11]) for name in os.listdir(self.packs_dir)
+                   if name.startswith("pack-") and name.endswith(".pack")]
+        number = max(numbers, default=0) + 1
+        while True:
+            base = os.path.join(self.packs_dir, f"pack-{number:06d}")
+            try:
+                pack = open(base + ".pack", 'xb')
+            except FileExistsError:
+                number += 1
+                continue
+            break
+        try:
+            self._pack_idx = open(base + ".idx", 'x', encoding='ascii')
+        except BaseException:
+            pack.close()
+            raise
+        self._pack = pack
+        self._pack_name = f"pack-{number:06d}.pack"
+    
+    def has_chunk(self, digest):
+        """Indique si un bloc est déjà stocké"""
+        return digest in self._index
+    
+    def put_chunk(self, data):
+        """
+        Stocke un bloc s'il est nouveau
+        
+        Returns:
+            tuple: (empreinte, octets ajoutés au dépôt)
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in self._index:
+            return digest, 0
+        if self._pack is None or self._pack.tell() >= PACK_TARGET_SIZE:
+            self._new_pack()
+        payload = zlib.compress(data)
+        offset = self._pack.tell()
+        self._pack.write(payload)
+        self._pack_idx.write(f"{digest} {offset} {len(payload)}\n")
+        self._index[digest] = (self._pack_name, offset, len(payload))
+        return digest, len(payload)
+    
+    def get_chunk(self, digest):
+        """Relit un bloc et vérifie son empreinte"""
+        pack_name, offset, length = self._index[digest]
+        if self._pack is not None and pack_name == self._pack_name:
+            self._pack.flush()
+        with open(os.path.join(self.packs_dir, pack_name), 'rb') as f:
+            f.seek(offset)
+            data = zlib.decompress(f.read(length))
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Bloc corrompu: {digest}")
+        return data
+    
+    def store_file(self, path):
+        """
+        Découpe un fichier par contenu et stocke ses blocs
+        
+        Returns:
+            tuple: (liste des empreintes, octets lus, octets ajoutés au dépôt)
+        """
+        chunks = []
+        read_bytes = 0
+        added = 0
+        buffer = b''
+        with open(path, 'rb') as f:
+            eof = False
+            while not eof or buffer:
+                if not eof and len(buffer) < CDC_MAX_SIZE:
+                    block = f.read(COPY_BUFFER_SIZE)
+                    read_bytes += len(block)
+                    eof = not block
+                    buffer += block
+                    continue
+                cut = find_chunk_boundary(buffer, 0, len(buffer))
+                digest, new_bytes = self.put_chunk(buffer[:cut])
+                chunks.append(digest)
+                added += new_bytes
+                buffer = buffer[cut:]
+        return chunks, read_bytes, added
+    
+    def write_snapshot(self, name, snapshot):
+        """Écrit le manifeste d'un instantané de manière atomique, après les blocs"""
+        self.close()
+        path = os.path.join(self.snapshots_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        return path
+    
+    def load_snapshot(self, name):
+        """Charge le manifeste d'un instantané"""
+        with open(os.path.join(self.snapshots_dir, name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def list_snapshots(self):
+        """Liste les manifestes d'instantanés présents dans le dépôt"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(name for name in os.listdir(self.snapshots_dir)
+                      if name.startswith("snapshot_") and name.endswith(".json"))
+    
+    def restore_file(self, chunks, dest_path):
+        """Reconstitue un fichier à partir de la liste de ses blocs"""
+        with open(dest_path, 'wb') as f:
+            for digest in chunks:
+                f.write(self.get_chunk(digest))
+
+
+class RetentionPolicy:
+    """
+    Politique de conservation des sauvegardes ZIP d'une destination
+    
+    Une sauvegarde est conservée si elle fait partie des keep_last plus
+    récentes, ou si elle est la plus récente d'un des keep_daily derniers
+    jours (idem par semaine ISO et par mois) où une sauvegarde existe. Les
+    sauvegardes dont dépend une incrémentale conservée sont toujours gardées,
+    ainsi que la plus récente. max_total_bytes borne ensuite la taille totale
+    conservée, en abandonnant d'abord les plus anciennes.
+    
+    Args:
+        keep_last (int): Nombre de sauvegardes les plus récentes à conserver
+        keep_daily (int): Nombre de jours à conserver (une sauvegarde par jour)
+        keep_weekly (int): Nombre de semaines à conserver
+        keep_monthly (int): Nombre de mois à conserver
+        max_total_bytes (int): Taille totale maximale des sauvegardes conservées
+    """
+    
+    BUCKETS = (
+        ('daily', lambda date: date.date()),
+        ('weekly', lambda date: date.isocalendar()[:2]),
+        ('monthly', lambda date: (date.year, date.month)),
+    )
+    
+    def __init__(self, keep_last=None, keep_daily=None, keep_weekly=None, keep_monthly=None,
+                 max_total_bytes=None):
+        self.keep_last = keep_last
+        self.keep_buckets = {'daily': keep_daily, 'weekly': keep_weekly, 'monthly': keep_monthly}
+        self.max_total_bytes = max_total_bytes
+        for name, value in [('keep_last', keep_last), ('max_total_bytes', max_total_bytes),
+                            *self.keep_buckets.items()]:
+            if value is not None and value < 0:
+                raise ValueError(f"{name} doit être positif")
+    
+    @property
+    def is_active(self):
+        """Indique si au moins une règle est définie"""
+        return (self.keep_last is not None or self.max_total_bytes is not None
+                or any(count is not None for count in self.keep_buckets.values()))
+    
+    def select(self, backups):
+        """
+        Partage les sauvegardes entre conservées et à supprimer, en une passe
+        
+        Args:
+            backups (list): Métadonnées de list_backups, les plus récentes en premier
+        
+        Returns:
+            tuple: (sauvegardes conservées, sauvegardes à supprimer)
+        """
+        count_rules = self.keep_last is not None or any(
+            count is not None for count in self.keep_buckets.values())
+        last_bucket = dict.fromkeys(self.keep_buckets)
+        bucket_count = dict.fromkeys(self.keep_buckets, 0)
+        required = set()
+        total = 0
+        over_budget = False
+        kept = []
+        pruned = []
+        for position, backup in enumerate(backups):
+            keep = position == 0 or backup['name'] in required or not count_rules
+            if self.keep_last is not None and position < self.keep_last:
+                keep = True
+            for name, bucket_of in self.BUCKETS:
+                limit = self.keep_buckets[name]
+                if limit is None:
+                    continue
+                bucket = bucket_of(backup['date'])
+                if bucket != last_bucket[name]:
+                    last_bucket[name] = bucket
+                    if bucket_count[name] < limit:
+                        bucket_count[name] += 1
+                        keep = True
+            if (keep and self.max_total_bytes is not None and position > 0
+                    and backup['name'] not in required
+                    and (over_budget or total + backup['size'] > self.max_total_bytes)):
+                over_budget = True
+                keep = False
+            if keep:
+                total += backup['size']
+                kept.append(backup)
+                required.update(name for name in (backup.get('base'), backup.get('parent')) if name)
+            else:
+                pruned.append(backup)
+        return kept, pruned
+
+
+class BackupCancelled(Exception):
+    """Sauvegarde ou restauration interrompue à la demande (cancel_event positionné)"""
+
+
+# Attente maximale d'une tranche de limitation: un changement de limite ou
+# une annulation est pris en compte au plus tard après ce délai
+THROTTLE_MAX_SLEEP = 0.25
+
+# Valeur nice du mode priorité basse (la plus basse)
+LOW_PRIORITY_NICE = 19
+
+
+class _TokenBucket:
+    """Seau à jetons: débit moyen `rate` par seconde, rafale d'au plus une seconde de débit"""
+    
+    def __init__(self, rate, tokens=None):
+        self.rate = rate
+        self.tokens = rate if tokens is None else min(tokens, rate)
+        self.stamp = time.monotonic()
+    
+    def refill(self, now):
+        """Ajoute les jetons accumulés depuis le dernier passage"""
+        self.tokens = min(self.rate, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+    
+    def deficit(self):
+        """Secondes à attendre pour que le solde redevienne positif"""
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class IOThrottle:
+    """
+    Limitation du débit de lecture, d'écriture et du nombre d'opérations d'E/S
+    
+    Chaque limite est un seau à jetons. Une consommation qui dépasse le solde
+    le rend négatif et l'appelant attend qu'il redevienne positif: le débit
+    moyen respecte la limite même pour des blocs plus grands que la rafale.
+    
+    Les limites peuvent être changées à tout moment depuis un autre thread
+    (callback de progression, interface graphique); l'attente est découpée
+    en tranches courtes pour en tenir compte rapidement. Un même objet
+    partagé entre plusieurs sauvegardes impose une limite globale.
+    
+    Args:
+        read_bps (int): Octets lus par seconde (None: illimité)
+        write_bps (int): Octets écrits dans l'archive par seconde (None: illimité)
+        iops (int): Opérations (ouvertures de fichier et lectures de bloc) par seconde
+        low_priority (bool): Exécuter la sauvegarde en priorité CPU et E/S basse
+    """
+    
+    LIMITS = ('read_bps', 'write_bps', 'iops')
+    
+    def __init__(self, read_bps=None, write_bps=None, iops=None, low_priority=False):
+        self.low_priority = low_priority
+        self._lock = threading.Lock()
+        self._buckets = dict.fromkeys(self.LIMITS)
+        self.set_limits(read_bps=read_bps, write_bps=write_bps, iops=iops)
+    
+    def set_limits(self, **limits):
+        """
+        Modifie une ou plusieurs limites, y compris pendant une sauvegarde
+        
+        Args:
+            **limits: read_bps, write_bps, iops (None ou 0: illimité)
+        """
+        unknown = limits.keys() - set(self.LIMITS)
+        if unknown:
+            raise ValueError(f"Limites inconnues: {', '.join(sorted(unknown))}")
+        with self._lock:
+            for key, rate in limits.items():
+                if rate is not None and rate < 0:
+                    raise ValueError(f"Limite négative: {key}={rate}")
+                old = self._buckets[key]
+                # Le solde est conservé (plafonné): changer de limite n'offre pas de rafale
+                self._buckets[key] = _TokenBucket(rate, old.tokens if old else None) if rate else None
+    
+    @property
+    def limits(self):
+        """Limites en vigueur ({nom: valeur ou None})"""
+        with self._lock:
+            return {key: bucket.rate if bucket else None for key, bucket in self._buckets.items()}
+    
+    def consume(self, cancel_event=None, **amounts):
+        """
+        Prélève des jetons et attend si une limite est dépassée
+        
+        Args:
+            cancel_event (threading.Event): Interrompt l'attente en levant BackupCancelled
+            **amounts: Quantités consommées par limite (read_bps=octets, iops=opérations...)
+        
+        Returns:
+            float: Secondes passées à attendre
+        """
+        with self._lock:
+            now = time.monotonic()
+            for key, amount in amounts.items():
+                bucket = self._buckets[key]
+                if bucket is not None and amount:
+                    bucket.refill(now)
+                    bucket.tokens -= amount
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                deficit = 0.0
+                for key in amounts:
+                    bucket = self._buckets[key]
+                    if bucket is not None:
+                        bucket.refill(now)
+                        deficit = max(deficit, bucket.deficit())
+            if deficit <= 0:
+                return waited
+            if cancel_event is not None and cancel_event.is_set():
+                raise BackupCancelled("Sauvegarde annulée")
+            step = min(deficit, THROTTLE_MAX_SLEEP)
+            time.sleep(step)
+            waited += step
+
+
+def lower_priority():
+    """
+    Passe le thread appelant en priorité CPU minimale (nice 19)
+    
+    Sous Linux la priorité ne concerne que le thread (et les processus qu'il
+    crée ensuite, comme le pool de compression); la priorité d'E/S des
+    ordonnanceurs CFQ/BFQ découle du nice tant qu'aucune classe n'est fixée,
+    nice 19 correspondant au niveau best-effort le plus bas. Sans privilège,
+    la priorité ne peut pas être remontée.
+    
+    Returns:
+        bool: La priorité a pu être abaissée
+    """
+    if not hasattr(os, 'setpriority'):
+        return False
+    target = threading.get_native_id() if sys.platform.startswith('linux') else 0
+    try:
+        os.setpriority(os.PRIO_PROCESS, target, LOW_PRIORITY_NICE)
+    except OSError:
+        return False
+    return True
+
+
+# Libellés des phases d'une sauvegarde, dans l'ordre d'affichage
+PHASE_LABELS = {
+    'walk': 'parcours',
+    'stat': 'stat',
+    'plan': 'planification',
+    'read': 'lecture',
+    'compress': 'compression',
+    'encrypt': 'chiffrement',
+    'wait': 'attente des workers',
+    'write': 'écriture',
+    'store': 'dépôt de blocs',
+    'throttle': 'limitation',
+    'sync': 'synchronisation',
+    'finalize': 'finalisation',
+}
+
+
+class PhaseTimer:
+    """
+    Temps passé par phase d'une sauvegarde (parcours, stat, lecture, compression, écriture...)
+    
+    Les temps sont exclusifs: une mesure englobante (ex: le parcours) ne
+    compte pas le temps déjà attribué pendant ce temps à une autre phase
+    (ex: stat), si bien que la somme des phases ne dépasse pas la durée
+    totale; le reste est rapporté comme 'other'. Une mesure coûte deux
+    appels à time.perf_counter, ce qui permet de l'utiliser par bloc lu.
+    
+    Les phases d'écrivains parallèles (un PhaseTimer par thread) sont
+    fusionnées à part par add_parallel: elles se chevauchent entre elles et
+    avec l'attente du thread principal, et n'entrent donc pas dans la
+    répartition exclusive de la durée totale.
+    
+    Usage dans une boucle chaude:
+        mark, start = phases.start()
+        block = src.read(COPY_BUFFER_SIZE)
+        phases.stop('read', mark, start)
+    """
+    
+    def __init__(self):
+        self.seconds = {}
+        self.counts = {}
+        self.parallel = {}
+        self.counters = {}
+        self.recorded = 0.0
+        self.total = None
+        self.start_time = time.perf_counter()
+    
+    def start(self):
+        """Début d'une mesure: (temps déjà attribué, instant)"""
+        return self.recorded, time.perf_counter()
+    
+    def stop(self, phase, mark, start, count=1):
+        """Attribue à `phase` le temps écoulé depuis start(), hors phases mesurées entre-temps"""
+        self.add(phase, time.perf_counter() - start - (self.recorded - mark), count)
+    
+    def add(self, phase, seconds, count=1):
+        """Ajoute une durée déjà mesurée à une phase"""
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        self.counts[phase] = self.counts.get(phase, 0) + count
+        self.recorded += seconds
+    
+    def add_parallel(self, timers):
+        """
+        Fusionne les phases de PhaseTimer tenus en parallèle (écrivains de volumes)
+        
+        Pour chaque phase sont cumulés le temps total de tous les écrivains,
+        le temps du plus chargé d'entre eux et le nombre de mesures.
+        """
+        for timer in timers:
+            for phase, seconds in timer.seconds.items():
+                stats = self.parallel.setdefault(phase, {'seconds': 0.0, 'max': 0.0, 'count': 0})
+                stats['seconds'] += seconds
+                stats['max'] = max(stats['max'], seconds)
+                stats['count'] += timer.counts[phase]
+    
+    def count(self, name, value=1):
+        """Incrémente un compteur libre (dossiers parcourus, temps CPU des workers...)"""
+        self.counters[name] = self.counters.get(name, 0) + value
+    
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Mesure un bloc de code (phases longues: parcours, planification, finalisation)"""
+        mark, start = self.start()
+        try:
+            yield
+        finally:
+            self.stop(name, mark, start)
+    
+    def timed_iter(self, iterable, phase):
+        """Itère en attribuant à `phase` le temps passé à produire chaque élément"""
+        iterator = iter(iterable)
+        while True:
+            mark, start = self.start()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.stop(phase, mark, start, count=0)
+                return
+            self.stop(phase, mark, start)
+            yield item
+    
+    def finish(self):
+        """Fige la durée totale"""
+        self.total = time.perf_counter() - self.start_time
+    
+    def to_dict(self):
+        """
+        Répartition par phase, sérialisable en JSON
+        
+        Returns:
+            dict: {total, phases: {phase: {seconds, percent, count}}, other,
+                   parallel: {phase: {seconds, max, count}}, counters}
+        """
+        total = self.total if self.total is not None else time.perf_counter() - self.start_time
+        order = list(PHASE_LABELS) + sorted(set(self.seconds) - set(PHASE_LABELS))
+        phases = {phase: {'seconds': self.seconds[phase],
+                          'percent': 100.0 * self.seconds[phase] / total if total > 0 else 0.0,
+                          'count': self.counts[phase]}
+                  for phase in order if phase in self.seconds}
+        parallel_order = list(PHASE_LABELS) + sorted(set(self.parallel) - set(PHASE_LABELS))
+        parallel = {phase: dict(self.parallel[phase]) for phase in parallel_order if phase in self.parallel}
+        return {'total': total, 'phases': phases, 'other': max(0.0, total - self.recorded),
+                'parallel': parallel, 'counters': dict(self.counters)}
+
+
+class _TimedFile:
+    """Fichier dont les écritures sont attribuées à une phase d'un PhaseTimer ('write' par défaut)"""
+    
+    def __init__(self, fp, phases, phase='write'):
+        self._fp = fp
+        self._phases = phases
+        self._phase = phase
+    
+    def write(self, data):
+        mark, start = self._phases.start()
+        written = self._fp.write(data)
+        self._phases.stop(self._phase, mark, start)
+        return written
+    
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+
+def _prometheus_labels(labels):
+    """Formate des étiquettes Prometheus ({clé="valeur",...}) en échappant les valeurs"""
+    if not labels:
+        return ''
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in sorted(labels.items())) + '}'
+
+
+def write_prometheus_metrics(path, phases, labels=None, success=True):
+    """
+    Écrit les métriques de la dernière sauvegarde au format textfile de Prometheus
+    
+    Le fichier est remplacé atomiquement, comme l'attend le collecteur
+    textfile de node_exporter (--collector.textfile.directory).
+    
+    Args:
+        path (str): Fichier .prom à écrire
+        phases (PhaseTimer): Temps par phase et compteurs de la sauvegarde
+        labels (dict): Étiquettes communes (ex: source, destination, job)
+        success (bool): Résultat de la sauvegarde
+    """
+    breakdown = phases.to_dict()
+    counters = breakdown['counters']
+    lines = []
+    
+    def metric(name, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for extra, value in samples:
+            lines.append(f"{name}{_prometheus_labels({**(labels or {}), **extra})} {value}")
+    
+    metric('backup_last_success', "1 si la dernière sauvegarde a réussi, 0 sinon", [({}, int(success))])
+    metric('backup_last_run_timestamp_seconds', "Fin de la dernière sauvegarde (epoch)", [({}, f"{time.time():.3f}")])
+    metric('backup_last_duration_seconds', "Durée de la dernière sauvegarde", [({}, f"{breakdown['total']:.6f}")])
+    samples = [({'phase': phase}, f"{stats['seconds']:.6f}") for phase, stats in breakdown['phases'].items()]
+    samples.append(({'phase': 'other'}, f"{breakdown['other']:.6f}"))
+    metric('backup_last_phase_seconds', "Temps passé par phase lors de la dernière sauvegarde", samples)
+    if breakdown['parallel']:
+        metric('backup_last_parallel_phase_seconds',
+               "Temps passé par phase dans les écrivains parallèles, cumulé (parallel=\"sum\") "
+               "ou du plus chargé (parallel=\"max\")",
+               [({'phase': phase, 'parallel': aggregate}, f"{stats[key]:.6f}")
+                for phase, stats in breakdown['parallel'].items()
+                for aggregate, key in (('sum', 'seconds'), ('max', 'max'))])
+    for key, name, help_text in (('files', 'backup_last_files', "Fichiers sauvegardés"),
+                                 ('bytes_read', 'backup_last_read_bytes', "Octets lus dans la source"),
+                                 ('archive_bytes', 'backup_last_archive_bytes', "Octets écrits dans la destination"),
+                                 ('worker_cpu', 'backup_last_worker_cpu_seconds', "Temps CPU des workers")):
+        if key in counters:
+            metric(name, help_text, [({}, counters[key])])
+    
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path)
+
+
+def write_profile(prefix, profiler, phases):
+    """
+    Écrit le profil d'une sauvegarde: PREFIXE.pstats (cProfile) et PREFIXE.json (phases)
+    
+    Le fichier .pstats se lit avec `python -m pstats PREFIXE.pstats`; il ne
+    couvre que le processus principal (pas les workers de compression).
+    
+    Returns:
+        tuple: (chemin .pstats, chemin .json)
+    """
+    stats_path = prefix + ".pstats"
+    json_path = prefix + ".json"
+    profiler.dump_stats(stats_path)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(phases.to_dict(), f, indent=2)
+    return stats_path, json_path
+
+
+class BackupProgress:
+    """
+    Avancement d'une sauvegarde, transmis à un callback à fréquence limitée
+    
+    Les compteurs sont mis à jour à chaque bloc ou fichier; le callback n'est
+    appelé qu'au plus une fois par `min_interval` secondes (et à la fin),
+    ce qui garde un coût négligeable dans la boucle d'archivage.
+    
+    Attributs exposés au callback: files_done, files_total, bytes_read,
+    bytes_written, bytes_total, current_file, elapsed, throughput, eta, percent.
+    
+    Si cancel_event (threading.Event) est positionné, le prochain fichier ou
+    bloc lève BackupCancelled: l'annulation est coopérative.
+    
+    Avec un throttle (IOThrottle), chaque bloc lu, fichier ouvert et membre
+    écrit consomme ses jetons: la boucle d'archivage est ralentie au débit
+    configuré, modifiable en direct via progress.throttle.set_limits().
+    
+    Les temps par phase sont cumulés dans progress.phases (PhaseTimer), les
+    attentes du throttle y comptant comme phase 'throttle'.
+    """
+    
+    def __init__(self, callback=None, files_total=0, bytes_total=0, min_interval=0.2, cancel_event=None,
+                 throttle=None, phases=None):
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.throttle = throttle
+        self.phases = phases if phases is not None else PhaseTimer()
+        self.throttled = 0.0
+        self.io_ops = 0
+        self.files_total = files_total
+        self.bytes_total = bytes_total
+        self.min_interval = min_interval
+        self.files_done = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.current_file = None
+        self.finished = False
+        self.start_time = time.monotonic()
+        self._last_emit = float('-inf')
+    
+    @property
+    def elapsed(self):
+        """Secondes écoulées depuis le début"""
+        return time.monotonic() - self.start_time
+    
+    @property
+    def throughput(self):
+        """Débit de lecture moyen en octets par seconde"""
+        elapsed = self.elapsed
+        return self.bytes_read / elapsed if elapsed > 0 else 0.0
+    
+    @property
+    def eta(self):
+        """Temps restant estimé en secondes (None si le débit ou la taille totale est inconnu)"""
+        throughput = self.throughput
+        if not throughput or not self.bytes_total:
+            return None
+        return max(0.0, (self.bytes_total - self.bytes_read) / throughput)
+    
+    @property
+    def percent(self):
+        """Pourcentage d'avancement en octets (en fichiers si la taille totale est nulle)"""
+        if self.bytes_total:
+            return min(100.0, 100.0 * self.bytes_read / self.bytes_total)
+        if self.files_total:
+            return min(100.0, 100.0 * self.files_done / self.files_total)
+        return 100.0 if self.finished else 0.0
+    
+    def snapshot(self):
+        """Copie des compteurs sous forme de dictionnaire"""
+        return {
+            'files_done': self.files_done,
+            'files_total': self.files_total,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'bytes_total': self.bytes_total,
+            'current_file': self.current_file,
+            'elapsed': self.elapsed,
+            'throughput': self.throughput,
+            'eta': self.eta,
+            'percent': self.percent,
+            'finished': self.finished,
+            'throttled': self.throttled,
+            'limits': self.throttle.limits if self.throttle is not None else None,
+        }
+    
+    def check_cancelled(self):
+        """Lève BackupCancelled si l'annulation a été demandée"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise BackupCancelled("Sauvegarde annulée")
+    
+    def start_file(self, name):
+        """Signale le fichier en cours de traitement"""
+        self.check_cancelled()
+        self.current_file = name
+        self.io_ops += 1
+        if self.throttle is not None:
+            self._throttled(self.throttle.consume(self.cancel_event, iops=1))
+    
+    def advance(self, bytes_read):
+        """Ajoute des octets lus (appelé par bloc)"""
+        self.check_cancelled()
+        self.bytes_read += bytes_read
+        ops = -(-bytes_read // COPY_BUFFER_SIZE)
+        self.io_ops += ops
+        if self.throttle is not None:
+            self._throttled(self.throttle.consume(self.cancel_event, read_bps=bytes_read, iops=ops))
+        self._maybe_emit()
+    
+    def file_done(self, bytes_written):
+        """Compte un fichier terminé et les octets écrits dans l'archive"""
+        self.files_done += 1
+        self.bytes_written += bytes_written
+        if self.throttle is not None:
+            self._throttled(self.throttle.consume(self.cancel_event, write_bps=bytes_written))
+        self._maybe_emit()
+    
+    def _throttled(self, waited):
+        """Comptabilise une attente imposée par le throttle"""
+        if waited:
+            self.throttled += waited
+            self.phases.add('throttle', waited)
+    
+    def merge(self, parts):
+        """
+        Reporte dans cette progression les compteurs de progressions partielles
+        
+        Utilisé quand plusieurs écrivains travaillent en parallèle, chacun avec
+        sa propre BackupProgress; le callback n'est appelé que par le thread
+        qui fusionne.
+        """
+        self.files_done = sum(part.files_done for part in parts)
+        self.bytes_read = sum(part.bytes_read for part in parts)
+        self.bytes_written = sum(part.bytes_written for part in parts)
+        self.io_ops = sum(part.io_ops for part in parts)
+        self.throttled = sum(part.throttled for part in parts)
+        active = [part.current_file for part in parts if part.current_file]
+        self.current_file = active[-1] if active else None
+        self._maybe_emit()
+    
+    def finish(self):
+        """Marque la fin et notifie le callback sans limitation"""
+        self.finished = True
+        self.current_file = None
+        if self.callback is not None:
+            self.callback(self)
+    
+    def _maybe_emit(self):
+        """Appelle le callback si l'intervalle minimal est écoulé"""
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if now - self._last_emit >= self.min_interval:
+            self._last_emit = now
+            self.callback(self)
+
+
 class BackupManager:
-    def __init__(self, log_level=logging.INFO):
-        """Initialise le gestionnaire de sauvegarde avec logging"""
-        self.setup_logging(log_level)
+    def __init__(self, log_level=logging.INFO, logger=None):
+        """
+        Initialise le gestionnaire de sauvegarde avec logging
+        
+        Un logger déjà configuré peut être fourni (ex: ordonnanceur de tâches,
+        niveau propre au gestionnaire); setup_logging n'est alors pas rappelé.
+        """
+        if logger is not None:
+            self.logger = logger
+        else:
+            self.setup_logging(log_level)
         
     def setup_logging(self, log_level):
-        """Configure le système de logging"""
-        # Créer le dossier logs s'il n'existe pas
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-        
-        # Nom du fichier de log avec timestamp
-        log_filename = f"backup_{datetime.datetime.now().strftime('%Y-%m-%d')}.log"
-        log_path = log_dir / log_filename
-        
-        # Configuration du logging
-        logging.basicConfig(
-            level=log_level,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_path, encoding='utf-8'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        """
+        Configure le système de logging, une seule fois par processus
+        
+        Les gestionnaires suivants (ordonnanceur, GUI, API asyncio) réutilisent
+        la configuration existante au lieu d'ouvrir un nouveau fichier de log.
+        Le fichier n'est créé qu'au premier message écrit.
+        
+        Args:
+            log_level: Niveau appliqué à la première configuration seulement; un
+                       gestionnaire qui a besoin d'un autre niveau reçoit son
+                       propre logger (argument logger du constructeur)
+        """
+        global _logging_configured
+        with _logging_lock:
+            if not _logging_configured:
+                # Créer le dossier logs s'il n'existe pas
+                log_dir = "logs"
+                os.makedirs(log_dir, exist_ok=True)
+                
+                # Nom du fichier de log avec timestamp
+                log_filename = f"backup_{datetime.datetime.now().strftime('%Y-%m-%d')}.log"
+                log_path = os.path.join(log_dir, log_filename)
+                
+                # Configuration du logging
+                logging.basicConfig(
+                    level=log_level,
+                    format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[
+                        logging.FileHandler(log_path, encoding='utf-8', delay=True),
+                        logging.StreamHandler(sys.stdout)
+                    ]
+                )
+                _logging_configured = True
         self.logger = logging.getLogger(__name__)
         
     def validate_paths(self, source_dir, backup_dir):
@@ -43,148 +1852,2653 @@ class BackupManager:
         if not os.path.isdir(source_dir):
             raise ValueError(f"Le dossier source '{source_dir}' n'existe pas")
         
-        if not os.access(source_dir, os.R_OK):
-            raise PermissionError(f"Pas de permission de lecture sur '{source_dir}'")
+        if not os.access(source_dir, os.R_OK):
+            raise PermissionError(f"Pas de permission de lecture sur '{source_dir}'")
+        
+        if STORAGE_URL.match(backup_dir):
+            # Cible distante: l'accès est vérifié par l'envoi lui-même
+            return
+        
+        # Créer le dossier de destination s'il n'existe pas
+        try:
+            os.makedirs(backup_dir, exist_ok=True)
+        except OSError as e:
+            raise PermissionError(f"Impossible de créer le dossier de destination '{backup_dir}': {e}")
+        
+        if not os.access(backup_dir, os.W_OK):
+            raise PermissionError(f"Pas de permission d'écriture sur '{backup_dir}'")
+    
+    @contextlib.contextmanager
+    def _open_destination(self, backup_dir):
+        """
+        Distingue un dossier local d'une cible de stockage distante
+        
+        Une cible ouverte ici à partir d'une URL est fermée en sortie (ses
+        connexions sont libérées); une StorageTarget fournie par l'appelant
+        reste ouverte.
+        
+        Args:
+            backup_dir: Dossier local, URL (s3://bucket/préfixe) ou StorageTarget
+        
+        Yields:
+            tuple: (dossier local ou URL de la cible, StorageTarget distante ou None)
+        """
+        if isinstance(backup_dir, (str, os.PathLike)) and not STORAGE_URL.match(os.fspath(backup_dir)):
+            yield backup_dir, None
+            return
+        from backup_storage import open_storage
+        storage = open_storage(backup_dir)
+        try:
+            if storage.local_path is not None:
+                yield storage.local_path, None
+            else:
+                yield storage.url(), storage
+        finally:
+            if storage is not backup_dir:
+                storage.close()
+    
+    def get_backup_filename(self, prefix="backup"):
+        """Génère un nom de fichier de sauvegarde avec horodatage"""
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        return f"{prefix}_{timestamp}.zip"
+    
+    def iter_directory(self, source_dir, sort=False, file_filter=None, skipped=None, phases=None):
+        """
+        Parcourt le dossier source avec os.scandir en produisant les fichiers au fil de l'eau
+        
+        Sans tri, les fichiers sont produits dans l'ordre du système de
+        fichiers sans jamais matérialiser la liste d'un dossier: seuls les
+        chemins des sous-dossiers restant à visiter sont conservés. Chaque
+        fichier n'est stat-é qu'une fois.
+        
+        Args:
+            source_dir (str): Chemin du dossier à parcourir
+            sort (bool): Trier chaque dossier par nom (matérialise son contenu)
+            file_filter (FileFilter): Règles d'exclusion; un dossier exclu n'est pas parcouru
+            skipped (dict): Complété avec {règle: {'files', 'bytes', 'dirs'}} des entrées exclues
+            phases (PhaseTimer): Reçoit le temps des appels stat et le nombre de dossiers parcourus
+        
+        Yields:
+            ManifestEntry: Fichiers réguliers trouvés
+        """
+        if not file_filter:
+            file_filter = None
+        pending = [(source_dir, '')]
+        while pending:
+            current, prefix = pending.pop()
+            subdirs = []
+            if phases is not None:
+                phases.count('dirs')
+            try:
+                with os.scandir(current) as it:
+                    for entry in (sorted(it, key=lambda e: e.name) if sort else it):
+                        arcname = prefix + entry.name
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                rule = file_filter and file_filter.excluded_by(arcname, entry.name, is_dir=True)
+                                if rule:
+                                    self._count_skipped(skipped, rule, dirs=1)
+                                    continue
+                                subdirs.append((entry.path, arcname + '/'))
+                                continue
+                            if not entry.is_file():
+                                continue
+                            rule = file_filter and file_filter.excluded_by(arcname, entry.name)
+                            if phases is None:
+                                st = entry.stat()
+                            else:
+                                mark, start = phases.start()
+                                st = entry.stat()
+                                phases.stop('stat', mark, start)
+                        except OSError as e:
+                            self.logger.warning(f"Fichier inaccessible: '{entry.path}': {e}")
+                            continue
+                        if rule:
+                            self._count_skipped(skipped, rule, files=1, size=st.st_size)
+                            continue
+                        yield ManifestEntry(entry.path, arcname, st.st_size, st.st_mtime_ns,
+                                            st.st_mode, st.st_ino, st.st_dev, st.st_nlink)
+            except OSError as e:
+                self.logger.warning(f"Dossier inaccessible: '{current}': {e}")
+            # Pile LIFO: on empile à l'envers pour garder l'ordre du parcours
+            pending.extend(reversed(subdirs))
+    
+    @staticmethod
+    def _count_skipped(skipped, rule, files=0, size=0, dirs=0):
+        """Comptabilise une entrée exclue par une règle"""
+        if skipped is None:
+            return
+        stats = skipped.setdefault(rule, {'files': 0, 'bytes': 0, 'dirs': 0})
+        stats['files'] += files
+        stats['bytes'] += size
+        stats['dirs'] += dirs
+    
+    def scan_directory(self, source_dir, file_filter=None, skipped=None, phases=None):
+        """
+        Parcourt le dossier source une seule fois avec os.scandir
+        
+        Chaque fichier n'est stat-é qu'une fois; le manifeste obtenu est
+        ensuite partagé par le calcul de taille et l'écriture de l'archive.
+        
+        Args:
+            source_dir (str): Chemin du dossier à parcourir
+            file_filter (FileFilter): Règles d'exclusion
+            skipped (dict): Complété avec les entrées exclues par règle
+            phases (PhaseTimer): Reçoit les temps de parcours ('walk') et de stat
+        
+        Returns:
+            list[ManifestEntry]: Fichiers réguliers trouvés, triés par nom dans chaque dossier
+        """
+        entries = self.iter_directory(source_dir, sort=True, file_filter=file_filter, skipped=skipped,
+                                      phases=phases)
+        if phases is None:
+            return list(entries)
+        with phases.phase('walk'):
+            return list(entries)
+    
+    def calculate_folder_size(self, folder_path, manifest=None, unique=False):
+        """
+        Calcule la taille totale d'un dossier (à partir du manifeste s'il est fourni)
+        
+        Args:
+            unique (bool): Rendre aussi la taille unique, liens physiques et
+                           contenus identiques n'étant comptés qu'une fois
+        
+        Returns:
+            int: Taille logique, ou tuple (taille logique, taille unique) avec unique
+        """
+        if manifest is None:
+            manifest = self.iter_directory(folder_path)
+        if not unique:
+            return sum(entry.size for entry in manifest)
+        manifest = list(manifest)
+        logical = sum(entry.size for entry in manifest)
+        duplicates = self._find_duplicates(manifest)
+        return logical, logical - sum(original.size for original, _ in duplicates.values())
+    
+    def format_size(self, size_bytes):
+        """Formate la taille en octets de manière lisible"""
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if size_bytes < 1024.0:
+                return f"{size_bytes:.2f} {unit}"
+            size_bytes /= 1024.0
+        return f"{size_bytes:.2f} TB"
+    
+    def _index_path(self, backup_dir):
+        """Chemin de l'index d'état des fichiers dans le dossier de destination"""
+        return os.path.join(backup_dir, INDEX_FILENAME)
+    
+    def load_index(self, backup_dir):
+        """
+        Charge l'index d'état des fichiers du dossier de destination
+        
+        Returns:
+            dict: Index (vide si absent ou illisible)
+        """
+        empty = {'version': INDEX_VERSION, 'source': None, 'base': None, 'parent': None,
+                 'files': {}, 'backups': {}}
+        try:
+            with open(self._index_path(backup_dir), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return empty
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Index illisible, il sera reconstruit: {e}")
+            return empty
+        if index.get('version') != INDEX_VERSION:
+            self.logger.warning("Version d'index inconnue, il sera reconstruit")
+            return empty
+        return index
+    
+    def _save_index(self, backup_dir, index):
+        """Écrit l'index de manière atomique (fichier temporaire puis renommage)"""
+        index_path = self._index_path(backup_dir)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+    
+    def _file_hash(self, path, limit=None):
+        """Calcule l'empreinte SHA-256 d'un fichier par blocs (de ses limit premiers octets si précisé)"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            if limit is not None:
+                digest.update(f.read(limit))
+            else:
+                for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+    
+    def _group_by_digest(self, entries, limit=None):
+        """Regroupe des fichiers par empreinte; seuls les groupes d'au moins deux fichiers sont rendus"""
+        groups = {}
+        for entry in entries:
+            try:
+                groups.setdefault(self._file_hash(entry.path, limit), []).append(entry)
+            except OSError:
+                continue
+        return [group for group in groups.values() if len(group) > 1]
+    
+    def _find_duplicates(self, manifest):
+        """
+        Repère les fichiers dont le contenu figure déjà ailleurs dans le manifeste
+        
+        Les liens physiques sont reconnus par (périphérique, inode), sans
+        lecture. Les autres fichiers ne sont comparés qu'à ceux de même taille:
+        une empreinte du premier bloc les départage avant l'empreinte complète.
+        L'original d'un groupe est son premier fichier dans l'ordre du manifeste.
+        
+        Returns:
+            dict: {chemin du doublon: (entrée d'origine, lien physique ou non)}
+        """
+        duplicates = {}
+        by_inode = {}
+        by_size = {}
+        for entry in manifest:
+            if entry.nlink > 1 and entry.inode:
+                original = by_inode.setdefault((entry.dev, entry.inode), entry)
+                if original is not entry:
+                    duplicates[entry.arcname] = (original, True)
+                    continue
+            if entry.size:
+                by_size.setdefault(entry.size, []).append(entry)
+        for size, group in by_size.items():
+            if len(group) < 2:
+                continue
+            groups = self._group_by_digest(group, DEDUP_PREFIX_SIZE)
+            if size > DEDUP_PREFIX_SIZE:
+                groups = [same for candidates in groups for same in self._group_by_digest(candidates)]
+            for original, *copies in groups:
+                for entry in copies:
+                    duplicates[entry.arcname] = (original, False)
+        return duplicates
+    
+    def _skip_hardlinks(self, manifest, links):
+        """
+        Parcours en flux: écarte les liens physiques d'un fichier déjà produit
+        
+        Les contenus identiques ne sont pas recherchés, faute de connaître
+        à l'avance les fichiers de même taille.
+        """
+        seen = {}
+        for entry in manifest:
+            if entry.nlink > 1 and entry.inode:
+                original = seen.setdefault((entry.dev, entry.inode), entry)
+                if original is not entry:
+                    links[entry.arcname] = self._link_record(entry, original, True)
+                    continue
+            yield entry
+    
+    @staticmethod
+    def _link_record(entry, original, hardlink):
+        """Description d'un fichier stocké par référence dans le membre LINKS_MEMBER"""
+        return {'target': original.arcname, 'hardlink': hardlink, 'size': entry.size,
+                'mtime_ns': entry.mtime_ns, 'mode': entry.mode}
+    
+    def _plan_incremental(self, manifest, index, hash_files=False):
+        """
+        Compare le manifeste à l'index pour trouver les fichiers à sauvegarder
+        
+        Un fichier est inchangé si sa taille, son mtime_ns et son inode sont
+        identiques. Avec hash_files, un fichier dont seules les métadonnées
+        ont changé est comparé par empreinte avant d'être retenu, et chaque
+        fichier retenu reçoit son empreinte dans le nouvel état.
+        
+        Returns:
+            tuple: (entrées à archiver, chemins supprimés, nouvel état des fichiers)
+        """
+        previous = index['files']
+        changed = []
+        files = {}
+        for entry in manifest:
+            record = {'size': entry.size, 'mtime_ns': entry.mtime_ns, 'inode': entry.inode, 'hash': None}
+            old = previous.get(entry.arcname)
+            if old is not None:
+                if (old['size'], old['mtime_ns'], old['inode']) == (entry.size, entry.mtime_ns, entry.inode):
+                    record['hash'] = old.get('hash')
+                    files[entry.arcname] = record
+                    continue
+                if hash_files and old.get('hash') and old['size'] == entry.size:
+                    try:
+                        record['hash'] = self._file_hash(entry.path)
+                    except OSError:
+                        pass
+                    if record['hash'] == old['hash']:
+                        files[entry.arcname] = record
+                        continue
+            if hash_files and record['hash'] is None:
+                # Empreinte des fichiers nouveaux ou modifiés, pour les comparaisons suivantes
+                try:
+                    record['hash'] = self._file_hash(entry.path)
+                except OSError:
+                    pass
+            changed.append(entry)
+            files[entry.arcname] = record
+        deleted = sorted(set(previous) - set(files))
+        return changed, deleted, files
+    
+    def backup_and_compress(self, source_dir, backup_dir, compression_level=ZIP_DEFLATED,
+                            workers=1, incremental=False, hash_files=False, backend='zip',
+                            compression_policy=None, progress_callback=None, retention=None,
+                            streaming=False, cancel_event=None, resume=False, file_filter=None,
+                            throttle=None, phases=None, volume_size=None, volume_dirs=(), encryption=None):
+        """
+        Sauvegarde et compresse un dossier vers un fichier ZIP
+        
+        Args:
+            source_dir (str): Chemin du dossier source
+            backup_dir (str): Dossier de destination, URL d'une cible distante (s3://bucket/préfixe)
+                              ou StorageTarget; l'archive est alors envoyée en flux
+            compression_level: Méthode ZIP par défaut si aucune politique n'est fournie
+            workers (int): Nombre de processus de compression (1 = séquentiel)
+            incremental (bool): N'archiver que les fichiers modifiés depuis la dernière sauvegarde
+            hash_files (bool): Comparer les empreintes SHA-256 en mode incrémental
+            backend (str): 'zip' (archive horodatée) ou 'chunkstore' (dépôt dédupliqué)
+            compression_policy (CompressionPolicy): Choix du codec par fichier
+            progress_callback (callable): Reçoit un BackupProgress pendant la sauvegarde
+            retention (RetentionPolicy): Politique de conservation appliquée après la sauvegarde
+            streaming (bool): Archiver les fichiers au fil du parcours, sans manifeste en mémoire
+                              (ordre du système de fichiers, progression sans total ni ETA)
+            cancel_event (threading.Event): Annulation coopérative; l'archive partielle est supprimée
+            resume (bool): Reprendre une sauvegarde interrompue de la même source à son dernier
+                           point de reprise (les fichiers déjà archivés ne sont pas recompressés)
+            file_filter (FileFilter): Règles d'exclusion appliquées pendant le parcours
+            throttle (IOThrottle): Limites de débit et d'opérations, modifiables en cours de route
+            phases (PhaseTimer): Reçoit le temps passé par phase et les compteurs de la sauvegarde
+            volume_size (int): Découper la sauvegarde en volumes ZIP d'au plus cette taille (octets)
+            volume_dirs (list[str]): Destinations supplémentaires recevant les volumes à tour de rôle
+            encryption (EncryptionKey): Chiffrer l'archive au fil de son écriture (backup_....zip.enc)
+        
+        Returns:
+            str: Chemin du fichier de sauvegarde (manifeste d'instantané, index des volumes) créé,
+                 ou URL de l'archive sur une cible distante
+        """
+        import zipfile
+        start_time = datetime.datetime.now()
+        if phases is None:
+            phases = PhaseTimer()
+        part_path = None
+        raw = None
+        journal = None
+        completed = False
+        destination = contextlib.ExitStack()
+        
+        try:
+            # Validation des chemins
+            backup_dir, storage = destination.enter_context(self._open_destination(backup_dir))
+            self.validate_paths(source_dir, backup_dir)
+            if storage is not None and (backend != 'zip' or volume_size):
+                raise ValueError("Une cible distante ne reçoit que des archives ZIP "
+                                 "(ni dépôt dédupliqué, ni découpage en volumes)")
+            if encryption is not None:
+                if backend != 'zip' or volume_size:
+                    raise ValueError("Le chiffrement ne s'applique qu'aux archives ZIP "
+                                     "(ni dépôt dédupliqué, ni découpage en volumes)")
+                from backup_crypto import check_available
+                check_available(encryption.algorithm)
+            
+            if throttle is not None and throttle.low_priority:
+                if lower_priority():
+                    self.logger.info("🐢 Sauvegarde en priorité CPU et E/S basse")
+                else:
+                    self.logger.warning("Impossible d'abaisser la priorité sur ce système")
+            
+            if streaming and incremental and backend == 'zip':
+                # La comparaison à l'index a besoin du manifeste complet
+                self.logger.info("Le mode incrémental nécessite le manifeste complet, parcours en flux désactivé")
+                streaming = False
+            if streaming and volume_size and backend == 'zip':
+                # La répartition en volumes a besoin du manifeste complet
+                self.logger.info("Le découpage en volumes nécessite le manifeste complet, parcours en flux désactivé")
+                streaming = False
+            
+            skipped = {}
+            if streaming:
+                # Parcours en flux: taille et nombre de fichiers connus seulement à la fin
+                manifest = phases.timed_iter(
+                    self.iter_directory(source_dir, file_filter=file_filter, skipped=skipped, phases=phases), 'walk')
+                scan_duration = None
+                source_size = None
+                self.logger.info(f"Début de la sauvegarde de '{source_dir}' (parcours en flux)")
+            else:
+                # Scan unique du dossier source, partagé par le calcul de taille et l'archivage
+                scan_start = time.perf_counter()
+                manifest = self.scan_directory(source_dir, file_filter=file_filter, skipped=skipped, phases=phases)
+                scan_duration = time.perf_counter() - scan_start
+                source_size = self.calculate_folder_size(source_dir, manifest)
+                self.logger.info(f"Début de la sauvegarde de '{source_dir}' ({self.format_size(source_size)})")
+            
+            if backend == 'chunkstore':
+                if incremental:
+                    self.logger.info("Le dépôt dédupliqué est incrémental par nature, option --incremental ignorée")
+                if streaming:
+                    progress = BackupProgress(progress_callback, cancel_event=cancel_event, throttle=throttle,
+                                              phases=phases)
+                else:
+                    progress = BackupProgress(progress_callback, cancel_event=cancel_event, throttle=throttle,
+                                              phases=phases, files_total=len(manifest), bytes_total=source_size)
+                if resume:
+                    self.logger.info("Le dépôt dédupliqué ne réécrit pas les blocs déjà stockés, "
+                                     "option --resume ignorée")
+                return self._backup_to_chunkstore(source_dir, backup_dir, manifest, source_size,
+                                                  start_time, scan_duration, progress, skipped)
+            if backend != 'zip':
+                raise ValueError(f"Backend de stockage inconnu: '{backend}'")
+            if volume_size:
+                for option, enabled in (('--incremental', incremental), ('--resume', resume)):
+                    if enabled:
+                        self.logger.info(f"Option {option} ignorée pour une sauvegarde en volumes")
+                if compression_policy is None:
+                    compression_policy = CompressionPolicy(default=(compression_level, None))
+                return self._backup_to_volumes(source_dir, [backup_dir] + list(volume_dirs), manifest,
+                                               source_size, start_time, scan_duration, volume_size,
+                                               compression_policy, workers, progress_callback, cancel_event,
+                                               throttle, phases, skipped, retention)
+            if storage is not None or encryption is not None:
+                # L'index incrémental et le journal de reprise d'une sauvegarde chiffrée seraient en clair
+                for option, enabled in (('--incremental', incremental), ('--resume', resume)):
+                    if enabled:
+                        target = "une cible distante" if storage is not None else "une sauvegarde chiffrée"
+                        self.logger.info(f"Option {option} ignorée pour {target}")
+                if storage is None:
+                    # Sauvegarde chiffrée locale: même écriture en flux, dans le dossier de destination
+                    from backup_storage import LocalStorage
+                    storage = LocalStorage(backup_dir)
+                if compression_policy is None:
+                    compression_policy = CompressionPolicy(default=(compression_level, None))
+                return self._backup_to_storage(source_dir, storage, manifest, streaming, source_size, start_time,
+                                               scan_duration, compression_policy, workers, progress_callback,
+                                               cancel_event, throttle, phases, skipped, retention, encryption)
+            
+            source_key = os.path.abspath(source_dir)
+            index = self.load_index(backup_dir) if incremental else None
+            index_state = [index['source'], index['base'], index['parent']] if incremental else None
+            
+            # L'archive est écrite sous un nom temporaire (.part) puis renommée une fois complète
+            resumed = self._find_resumable(backup_dir, source_key, index_state) if resume else None
+            if resumed is not None:
+                part_path, raw, header, offset, records = resumed
+                zip_filename = os.path.basename(part_path)[:-len(PART_SUFFIX)]
+                created = datetime.datetime.fromisoformat(header['created'])
+                self.logger.info(f"🔁 Reprise de '{zip_filename}': {len(records)} fichiers déjà archivés")
+            else:
+                zip_filename, part_path, raw = self._reserve_archive(backup_dir)
+                created = start_time
+                offset = 0
+                records = []
+            zip_path = os.path.join(backup_dir, zip_filename)
+            journal = _CheckpointJournal(part_path + CHECKPOINT_SUFFIX)
+            
+            # Compteurs pour le suivi (membres repris compris)
+            file_count = len(records)
+            archived_size = sum(record['file_size'] for record in records)
+            
+            # Mode incrémental: seule une base complète existante permet une delta
+            plan_mark, plan_start = phases.start()
+            backup_type = 'full'
+            deleted = []
+            if incremental:
+                base = index.get('base')
+                if (index['source'] == source_key and base
+                        and os.path.exists(os.path.join(backup_dir, base))):
+                    backup_type = 'incremental'
+                    manifest, deleted, file_states = self._plan_incremental(manifest, index, hash_files)
+                    self.logger.info(f"Sauvegarde incrémentale basée sur '{base}': "
+                                     f"{len(manifest)} fichiers modifiés, {len(deleted)} supprimés")
+                else:
+                    if index['source'] not in (None, source_key):
+                        self.logger.warning("L'index concerne une autre source, nouvelle sauvegarde complète")
+                    index.update(source=source_key, base=zip_filename, parent=None)
+                    file_states = {}
+                    for entry in manifest:
+                        digest = None
+                        if hash_files:
+                            try:
+                                digest = self._file_hash(entry.path)
+                            except OSError:
+                                pass
+                        file_states[entry.arcname] = {'size': entry.size, 'mtime_ns': entry.mtime_ns,
+                                                      'inode': entry.inode, 'hash': digest}
+                archived = set()
+            
+            # Les fichiers validés par le dernier point de reprise ne sont pas réarchivés
+            committed = {record['filename'] for record in records}
+            if committed:
+                if incremental:
+                    archived.update(committed)
+                if streaming:
+                    manifest = (entry for entry in manifest if entry.arcname not in committed)
+                else:
+                    manifest = [entry for entry in manifest if entry.arcname not in committed]
+            
+            # Liens physiques et contenus identiques: un seul exemplaire stocké, les autres par référence
+            links = {}
+            if streaming:
+                manifest = self._skip_hardlinks(manifest, links)
+            else:
+                duplicates = self._find_duplicates(manifest)
+                if duplicates:
+                    links = {entry.arcname: self._link_record(entry, *duplicates[entry.arcname])
+                             for entry in manifest if entry.arcname in duplicates}
+                    manifest = [entry for entry in manifest if entry.arcname not in duplicates]
+            phases.stop('plan', plan_mark, plan_start)
+            
+            if compression_policy is None:
+                compression_policy = CompressionPolicy(default=(compression_level, None))
+            codec_stats = {}
+            if streaming:
+                progress = BackupProgress(progress_callback, cancel_event=cancel_event, throttle=throttle,
+                                          phases=phases)
+            else:
+                progress = BackupProgress(progress_callback, cancel_event=cancel_event, throttle=throttle,
+                                          phases=phases, files_total=len(manifest),
+                                          bytes_total=sum(entry.size for entry in manifest))
+            
+            # Création de l'archive ZIP (ou reprise après le dernier point de reprise)
+            last_checkpoint = time.monotonic()
+            with raw:
+                raw.seek(offset)
+                raw.truncate()
+                # Les écritures dans l'archive sont comptées dans la phase 'write'
+                with zipfile.ZipFile(_TimedFile(raw, phases), 'w', compression_level) as zipf:
+                    for record in records:
+                        zinfo = _zinfo_from_record(record)
+                        zipf.filelist.append(zinfo)
+                        zipf.NameToInfo[zinfo.filename] = zinfo
+                    if resumed is not None:
+                        journal.start(recorded=len(records))
+                    else:
+                        journal.start({'version': CHECKPOINT_VERSION, 'source': source_key,
+                                       'created': created.isoformat(), 'incremental': incremental,
+                                       'index_state': index_state})
+                    if workers > 1:
+                        members = self._write_members_parallel(zipf, manifest, compression_policy, workers, progress)
+                    else:
+                        members = self._write_members(zipf, manifest, compression_policy, progress)
+                    for entry, zinfo, cpu_time in members:
+                        file_count += 1
+                        progress.file_done(zinfo.compress_size)
+                        _add_codec_stats(codec_stats, zinfo, cpu_time)
+                        archived_size += zinfo.file_size
+                        if incremental:
+                            archived.add(entry.arcname)
+                        
+                        # Log de progression tous les 100 fichiers
+                        if file_count % 100 == 0:
+                            self.logger.info(f"Traité {file_count} fichiers...")
+                        
+                        # Point de reprise périodique (membres complets, données synchronisées)
+                        if time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL:
+                            with phases.phase('sync'):
+                                journal.commit(zipf, raw)
+                            last_checkpoint = time.monotonic()
+                    
+                    if links:
+                        links = self._valid_links(links, zipf.NameToInfo)
+                        if links:
+                            zipf.writestr(LINKS_MEMBER, json.dumps(links, ensure_ascii=False))
+                        file_count += len(links)
+                        archived_size += sum(link['size'] for link in links.values())
+                        if incremental:
+                            archived.update(links)
+                    
+                    if backup_type == 'incremental':
+                        meta = {'type': backup_type, 'base': index['base'],
+                                'parent': index['parent'] or index['base'], 'deleted': deleted}
+                        zipf.writestr(META_MEMBER, json.dumps(meta, ensure_ascii=False))
+                    
+                    # Index des membres pour le catalogue, tiré du répertoire central déjà en mémoire
+                    members_index = itertools.chain(
+                        ((zinfo.filename, zinfo.file_size, int(_member_mtime(zinfo) * 1e9))
+                         for zinfo in zipf.filelist if zinfo.filename not in INTERNAL_MEMBERS),
+                        ((name, link['size'], link['mtime_ns']) for name, link in links.items()))
+                with phases.phase('sync'):
+                    raw.flush()
+                    os.fsync(raw.fileno())
+            
+            # Renommage atomique: l'archive n'apparaît sous son nom définitif qu'une fois complète
+            finalize_mark, finalize_start = phases.start()
+            journal.close()
+            os.replace(part_path, zip_path)
+            completed = True
+            journal.remove()
+            
+            progress.finish()
+            if source_size is None:
+                source_size = archived_size
+            
+            # Mise à jour de l'index: les fichiers en échec seront retentés la prochaine fois
+            if incremental:
+                for entry in manifest:
+                    if entry.arcname not in archived:
+                        file_states.pop(entry.arcname, None)
+                index['backups'][zip_filename] = {
+                    'type': backup_type,
+                    'base': index['base'] if backup_type == 'incremental' else None,
+                    'parent': (index['parent'] or index['base']) if backup_type == 'incremental' else None,
+                }
+                index['files'] = file_states
+                index['parent'] = zip_filename if backup_type == 'incremental' else None
+                self._save_index(backup_dir, index)
+            
+            # Calcul du temps d'exécution et de la taille finale
+            end_time = datetime.datetime.now()
+            duration = (end_time - start_time).total_seconds()
+            backup_size = os.path.getsize(zip_path)
+            
+            # Enregistrement dans le catalogue de la destination
+            self._catalog_backup(
+                backup_dir, zip_filename, backup_type, created, file_count,
+                archived_size, backup_size, duration,
+                source=os.path.abspath(source_dir),
+                base=index['base'] if backup_type == 'incremental' else None,
+                parent=(index['parent'] or index['base']) if backup_type == 'incremental' else None,
+                members=members_index)
+            phases.stop('finalize', finalize_mark, finalize_start)
+            phases.finish()
+            phases.counters.update(files=file_count, bytes_read=progress.bytes_read, archive_bytes=backup_size)
+            
+            # Logs de succès
+            header = []
+            if incremental:
+                header.append(f"Type: {'incrémentale' if backup_type == 'incremental' else 'complète'}")
+                header.append(f"Suppressions enregistrées: {len(deleted)}")
+            details = []
+            if links:
+                linked_size = sum(link['size'] for link in links.values())
+                hardlinks = sum(1 for link in links.values() if link['hardlink'])
+                details.append(f"Stockés par référence: {len(links) - hardlinks} doublons, "
+                               f"{hardlinks} liens physiques ({self.format_size(linked_size)} non recompressés)")
+                details.append(f"Taille unique: {self.format_size(source_size - linked_size)}")
+            self._log_backup_stats("Sauvegarde terminée avec succès!", f"Fichier: {zip_path}", file_count,
+                                   source_size, progress, phases, duration, scan_duration, skipped,
+                                   backup_size=backup_size, codec_stats=codec_stats, policy=compression_policy,
+                                   header=header, details=details)
+            
+            if retention is not None and retention.is_active:
+                self.prune(backup_dir, retention)
+            
+            return zip_path
+            
+        except Exception as e:
+            # Une archive interrompue n'apparaît jamais sous un nom définitif; son .part n'est
+            # conservé que s'il a un point de reprise et que l'arrêt n'a pas été demandé
+            if part_path is not None and not completed:
+                keep = journal.has_checkpoint and not isinstance(e, BackupCancelled)
+                raw.close()
+                journal.close()
+                if not keep:
+                    journal.remove()
+                    try:
+                        os.remove(part_path)
+                    except OSError:
+                        pass
+                else:
+                    self.logger.info(f"Archive partielle conservée: relancez avec --resume pour reprendre")
+            if isinstance(e, BackupCancelled):
+                self.logger.warning("⏹️  Sauvegarde annulée, archive partielle supprimée")
+            else:
+                self.logger.error(f"❌ Erreur lors de la sauvegarde: {e}")
+            raise
+        finally:
+            destination.close()
+    
+    def _reserve_archive(self, backup_dir):
+        """
+        Réserve le nom d'une nouvelle archive et crée son fichier temporaire .part
+        
+        La création exclusive garantit que deux sauvegardes simultanées vers la
+        même destination (même seconde) obtiennent des noms différents.
+        
+        Returns:
+            tuple: (nom définitif, chemin du .part, fichier .part ouvert et verrouillé)
+        """
+        zip_filename = self.get_backup_filename()
+        stem = zip_filename[:-len(".zip")]
+        suffix = 1
+        while True:
+            part_path = os.path.join(backup_dir, zip_filename + PART_SUFFIX)
+            if not os.path.exists(os.path.join(backup_dir, zip_filename)):
+                try:
+                    raw = open(part_path, 'xb+')
+                    break
+                except FileExistsError:
+                    pass
+            zip_filename = f"{stem}_{suffix}.zip"
+            suffix += 1
+        _lock_file(raw)
+        return zip_filename, part_path, raw
+    
+    def _find_resumable(self, backup_dir, source_key, index_state):
+        """
+        Cherche une archive interrompue de la même source, reprenable dans le même état d'index
+        
+        Les .part inutilisables (sans point de reprise, ou de cette source mais
+        dépassés par une sauvegarde terminée depuis) sont supprimés; ceux
+        verrouillés par une sauvegarde en cours sont ignorés.
+        
+        Returns:
+            tuple: (chemin du .part, fichier ouvert et verrouillé, en-tête, position,
+                    enregistrements des membres) ou None
+        """
+        candidates = sorted((name for name in os.listdir(backup_dir)
+                             if name.startswith("backup_") and name.endswith(".zip" + PART_SUFFIX)), reverse=True)
+        for name in candidates:
+            part_path = os.path.join(backup_dir, name)
+            try:
+                raw = open(part_path, 'rb+')
+            except OSError:
+                continue
+            try:
+                _lock_file(raw)
+            except OSError:
+                raw.close()
+                continue
+            state = _CheckpointJournal.load(part_path + CHECKPOINT_SUFFIX)
+            if state is not None and state[1] is not None and state[0]['source'] != source_key:
+                raw.close()
+                continue
+            if state is None or state[1] is None:
+                self.logger.info(f"Archive interrompue sans point de reprise supprimée: {name}")
+            elif state[0]['index_state'] != index_state:
+                self.logger.warning(f"'{name}' a été interrompue avant une autre sauvegarde de cette "
+                                    f"source, elle est abandonnée")
+            else:
+                return (part_path, raw) + state
+            raw.close()
+            _CheckpointJournal(part_path + CHECKPOINT_SUFFIX).remove()
+            os.remove(part_path)
+        self.logger.info("Aucune sauvegarde interrompue à reprendre pour cette source")
+        return None
+    
+    def print_progress(self, progress, stream=None):
+        """Affiche l'avancement sur une ligne de terminal réécrite à chaque mise à jour"""
+        stream = stream or sys.stderr
+        eta = progress.eta
+        eta_text = time.strftime('%H:%M:%S', time.gmtime(eta)) if eta is not None else '--:--:--'
+        files = f"{progress.files_done}/{progress.files_total}" if progress.files_total else f"{progress.files_done}"
+        line = (f"[{progress.percent:5.1f}%] {files} fichiers "
+                f"| {self.format_size(progress.bytes_read)} lus "
+                f"| {self.format_size(progress.throughput)}/s | ETA {eta_text}")
+        if progress.current_file:
+            line += f" | {progress.current_file[-40:]}"
+        stream.write("\r" + line.ljust(120)[:120])
+        if progress.finished:
+            stream.write("\n")
+        stream.flush()
+    
+    def log_codec_stats(self, codec_stats, policy):
+        """
+        Journalise le taux et le temps CPU de chaque codec utilisé
+        
+        Le temps CPU économisé est estimé en appliquant le coût par octet du
+        codec par défaut (mesuré pendant la sauvegarde, ou à défaut sur un
+        échantillon) aux fichiers traités par un autre codec.
+        """
+        default_name = codec_name(*policy.default)
+        default = codec_stats.get(default_name)
+        if default and default['original']:
+            cost = default['cpu'] / default['original']
+        else:
+            cost = _estimate_codec_cost(*policy.default)
+        saved = 0.0
+        for name, stats in sorted(codec_stats.items()):
+            ratio = (1 - stats['compressed'] / stats['original']) * 100 if stats['original'] else 0
+            self.logger.info(f"   - Codec {name}: {stats['files']} fichiers, "
+                             f"{self.format_size(stats['original'])} -> {self.format_size(stats['compressed'])} "
+                             f"({ratio:.1f}%), CPU {stats['cpu']:.2f} s")
+            if name != default_name:
+                saved += cost * stats['original'] - stats['cpu']
+        if len(codec_stats) > 1 or default_name not in codec_stats:
+            self.logger.info(f"   - Temps CPU économisé (estimation): {saved:.2f} secondes")
+    
+    def log_throttle_stats(self, progress, duration):
+        """Journalise les débits obtenus face aux limites configurées (si la sauvegarde était limitée)"""
+        if progress.throttle is None:
+            return
+        limits = progress.throttle.limits
+        duration = max(duration, 1e-6)
+        for label, actual, key, unit in (("Débit de lecture", progress.bytes_read / duration, 'read_bps', True),
+                                         ("Débit d'écriture", progress.bytes_written / duration, 'write_bps', True),
+                                         ("Opérations d'E/S", progress.io_ops / duration, 'iops', False)):
+            limit = limits[key]
+            value = f"{self.format_size(actual)}/s" if unit else f"{actual:.0f}/s"
+            if limit:
+                value += f" (limite {self.format_size(limit)}/s)" if unit else f" (limite {limit}/s)"
+            self.logger.info(f"   - {label}: {value}")
+        self.logger.info(f"   - Attente due aux limites: {progress.throttled:.2f} secondes")
+    
+    def _log_backup_stats(self, title, location, file_count, source_size, progress, phases, duration,
+                          scan_duration, skipped, backup_size=None, codec_stats=None, policy=None,
+                          header=(), details=()):
+        """
+        Journalise le bilan d'une sauvegarde, commun à tous les backends
+        
+        Args:
+            title (str): Message de succès
+            location (str): Désignation du résultat (fichier, objet, index, manifeste)
+            backup_size (int): Taille compressée, avec le ratio de compression (si connue)
+            codec_stats (dict): Statistiques par codec, journalisées selon policy
+            header (list[str]): Lignes propres au backend, avant le nombre de fichiers
+            details (list[str]): Lignes propres au backend, après la taille originale
+        """
+        self.logger.info(f"✅ {title}")
+        self.logger.info(f"📁 {location}")
+        self.logger.info(f"📊 Statistiques:")
+        for line in header:
+            self.logger.info(f"   - {line}")
+        self.logger.info(f"   - Fichiers traités: {file_count}")
+        self.logger.info(f"   - Taille originale: {self.format_size(source_size)}")
+        for line in details:
+            self.logger.info(f"   - {line}")
+        if backup_size is not None:
+            compression_ratio = (1 - backup_size / source_size) * 100 if source_size > 0 else 0
+            self.logger.info(f"   - Taille compressée: {self.format_size(backup_size)}")
+            self.logger.info(f"   - Ratio de compression: {compression_ratio:.1f}%")
+        if codec_stats is not None:
+            self.log_codec_stats(codec_stats, policy)
+        self.log_filter_stats(skipped or {})
+        self.log_throttle_stats(progress, duration)
+        self.log_phase_stats(phases)
+        if scan_duration is not None:
+            self.logger.info(f"   - Durée du scan: {scan_duration:.2f} secondes")
+        self.logger.info(f"   - Durée: {duration:.2f} secondes")
+    
+    def log_phase_stats(self, phases):
+        """Journalise la répartition du temps par phase (parcours, lecture, compression, écriture...)"""
+        breakdown = phases.to_dict()
+        parts = [f"{PHASE_LABELS.get(phase, phase)} {stats['seconds']:.2f} s ({stats['percent']:.0f}%)"
+                 for phase, stats in breakdown['phases'].items() if stats['seconds'] >= 0.005]
+        if breakdown['other'] >= 0.005:
+            parts.append(f"autre {breakdown['other']:.2f} s")
+        if parts:
+            self.logger.info(f"   - Phases: {', '.join(parts)}")
+        parts = [f"{PHASE_LABELS.get(phase, phase)} {stats['seconds']:.2f} s (max {stats['max']:.2f} s)"
+                 for phase, stats in breakdown['parallel'].items() if stats['seconds'] >= 0.005]
+        if parts:
+            self.logger.info(f"   - Phases des écrivains (cumulées): {', '.join(parts)}")
+        if breakdown['counters'].get('worker_cpu'):
+            self.logger.info(f"   - Temps CPU des workers: {breakdown['counters']['worker_cpu']:.2f} secondes")
+    
+    def log_filter_stats(self, skipped):
+        """Journalise le nombre et le volume des entrées écartées par chaque règle d'exclusion"""
+        for rule, stats in sorted(skipped.items(), key=lambda item: -item[1]['bytes']):
+            parts = []
+            if stats['dirs']:
+                parts.append(f"{stats['dirs']} dossiers non parcourus")
+            if stats['files']:
+                parts.append(f"{stats['files']} fichiers ({self.format_size(stats['bytes'])})")
+            self.logger.info(f"   - Exclus par '{rule}': {', '.join(parts)}")
+    
+    def _backup_to_chunkstore(self, source_dir, backup_dir, manifest, source_size, start_time,
+                              scan_duration, progress, skipped=None):
+        """Enregistre le manifeste dans le dépôt de blocs dédupliqués sous forme d'instantané"""
+        stem = self.get_backup_filename("snapshot")[:-len(".zip")]
+        file_count = 0
+        added_bytes = 0
+        files = []
+        with ChunkStore(os.path.join(backup_dir, CHUNKSTORE_DIRNAME), self.logger) as store:
+            snapshot_name = f"{stem}.json"
+            suffix = 1
+            while os.path.exists(os.path.join(store.snapshots_dir, snapshot_name)):
+                snapshot_name = f"{stem}_{suffix}.json"
+                suffix += 1
+            phases = progress.phases
+            for entry in manifest:
+                progress.start_file(entry.arcname)
+                mark, start = phases.start()
+                try:
+                    chunks, read_bytes, added = store.store_file(entry.path)
+                except (OSError, IOError) as e:
+                    self.logger.warning(f"Impossible de sauvegarder le fichier '{entry.path}': {e}")
+                    continue
+                finally:
+                    phases.stop('store', mark, start)
+                progress.advance(read_bytes)
+                progress.file_done(added)
+                files.append({'path': entry.arcname, 'size': entry.size, 'mtime_ns': entry.mtime_ns,
+                              'mode': entry.mode, 'chunks': chunks})
+                added_bytes += added
+                file_count += 1
+                if file_count % 100 == 0:
+                    self.logger.info(f"Traité {file_count} fichiers...")
+            
+            duration = (datetime.datetime.now() - start_time).total_seconds()
+            finalize_mark, finalize_start = phases.start()
+            if source_size is None:
+                source_size = sum(f['size'] for f in files)
+            snapshot = {
+                'created': start_time.isoformat(),
+                'source': os.path.abspath(source_dir),
+                'file_count': file_count,
+                'original_size': source_size,
+                'added_size': added_bytes,
+                'duration': duration,
+                'files': files,
+            }
+            snapshot_path = store.write_snapshot(snapshot_name, snapshot)
+            progress.finish()
+        
+        self._catalog_backup(backup_dir, snapshot_name, 'snapshot', start_time, file_count,
+                             source_size, added_bytes, duration, source=snapshot['source'],
+                             members=((f['path'], f['size'], f['mtime_ns']) for f in files))
+        phases.stop('finalize', finalize_mark, finalize_start)
+        phases.finish()
+        phases.counters.update(files=file_count, bytes_read=progress.bytes_read, archive_bytes=added_bytes)
+        
+        self._log_backup_stats("Instantané enregistré avec succès!", f"Manifeste: {snapshot_path}", file_count,
+                               source_size, progress, phases, duration, scan_duration, skipped,
+                               details=[f"Nouvelles données stockées: {self.format_size(added_bytes)}"])
+        return snapshot_path
+    
+    def _plan_volumes(self, manifest, volume_size):
+        """
+        Répartit le manifeste en volumes consécutifs (ordre du parcours conservé)
+        
+        La taille d'un volume est estimée à partir des tailles non compressées,
+        plus les en-têtes ZIP et la pire expansion de DEFLATE: un volume ne
+        dépasse volume_size que s'il contient un fichier plus gros à lui seul.
+        
+        Returns:
+            list[list[ManifestEntry]]: Fichiers de chaque volume
+        """
+        volumes = []
+        current = []
+        used = VOLUME_END_OVERHEAD
+        for entry in manifest:
+            cost = entry.size + entry.size // 1000 + VOLUME_MEMBER_OVERHEAD + 2 * len(entry.arcname.encode())
+            if current and used + cost > volume_size:
+                volumes.append(current)
+                current = []
+                used = VOLUME_END_OVERHEAD
+            current.append(entry)
+            used += cost
+        if current:
+            volumes.append(current)
+        return volumes
+    
+    def _reserve_volume_set(self, backup_dir):
+        """
+        Réserve le nom d'une sauvegarde en volumes par la création exclusive de son index .part
+        
+        Returns:
+            tuple: (préfixe des noms, chemin de l'index .part réservé)
+        """
+        stem = self.get_backup_filename()[:-len(".zip")]
+        base = stem
+        suffix = 1
+        while True:
+            index_path = os.path.join(backup_dir, stem + VOLUME_INDEX_SUFFIX)
+            if not os.path.exists(index_path):
+                try:
+                    with open(index_path + PART_SUFFIX, 'x'):
+                        return stem, index_path + PART_SUFFIX
+                except FileExistsError:
+                    pass
+            stem = f"{base}_{suffix}"
+            suffix += 1
+    
+    def _write_volume(self, part_path, entries, policy, progress):
+        """
+        Écrit un volume ZIP autonome (exécuté dans un thread d'écriture)
+        
+        Returns:
+            tuple: (membres [(nom, taille, mtime_ns)], statistiques par codec)
+        """
+        import zipfile
+        members = []
+        codec_stats = {}
+        with open(part_path, 'xb') as raw:
+            with zipfile.ZipFile(_TimedFile(raw, progress.phases), 'w') as zipf:
+                for entry, zinfo, cpu_time in self._write_members(zipf, entries, policy, progress):
+                    progress.file_done(zinfo.compress_size)
+                    _add_codec_stats(codec_stats, zinfo, cpu_time)
+                    members.append((entry.arcname, zinfo.file_size, entry.mtime_ns))
+            with progress.phases.phase('sync'):
+                raw.flush()
+                os.fsync(raw.fileno())
+        return members, codec_stats
+    
+    def _backup_to_volumes(self, source_dir, destinations, manifest, source_size, start_time, scan_duration,
+                           volume_size, policy, workers, progress_callback, cancel_event, throttle, phases,
+                           skipped, retention):
+        """
+        Écrit la sauvegarde en volumes ZIP autonomes répartis à tour de rôle sur les destinations
+        
+        Chaque volume est écrit par son propre thread (au moins un par
+        destination, `workers` au plus s'il est plus grand), sous un nom .part
+        renommé quand tous les volumes sont complets. Les threads font
+        avancer en parallèle les écritures vers les différents disques;
+        seuls zlib et crc32 relâchent le GIL, la compression ne passe donc
+        pas à l'échelle comme avec le pool de processus d'une archive unique. L'index, qui associe
+        chaque membre à son volume, est ensuite écrit dans chaque destination:
+        c'est lui qui fait apparaître la sauvegarde.
+        
+        Returns:
+            str: Chemin de l'index des volumes dans la première destination
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+        backup_dir = destinations[0]
+        for directory in destinations[1:]:
+            self.validate_paths(source_dir, directory)
+        destinations = [os.path.abspath(directory) for directory in destinations]
+        
+        with phases.phase('plan'):
+            links = {}
+            duplicates = self._find_duplicates(manifest)
+            if duplicates:
+                links = {entry.arcname: self._link_record(entry, *duplicates[entry.arcname])
+                         for entry in manifest if entry.arcname in duplicates}
+                manifest = [entry for entry in manifest if entry.arcname not in duplicates]
+            plan = self._plan_volumes(manifest, volume_size) or [[]]
+        oversized = sum(1 for volume in plan if len(volume) == 1 and volume[0].size > volume_size)
+        if oversized:
+            self.logger.warning(f"{oversized} fichiers dépassent la taille de volume "
+                                f"({self.format_size(volume_size)}) et occupent chacun un volume plus grand")
+        
+        stem, index_part = self._reserve_volume_set(backup_dir)
+        index_name = stem + VOLUME_INDEX_SUFFIX
+        volumes = [{'name': f"{stem}.vol{number:03d}.zip",
+                    'directory': destinations[(number - 1) % len(destinations)]}
+                   for number in range(1, len(plan) + 1)]
+        parts = [os.path.join(volume['directory'], volume['name'] + PART_SUFFIX) for volume in volumes]
+        self.logger.info(f"🧱 {len(plan)} volumes de {self.format_size(volume_size)} au plus, "
+                         f"répartis sur {len(destinations)} destinations")
+        
+        progress = BackupProgress(progress_callback, cancel_event=cancel_event, throttle=throttle, phases=phases,
+                                  files_total=len(manifest), bytes_total=sum(entry.size for entry in manifest))
+        # Les écrivains s'arrêtent tous dès qu'un volume échoue ou que l'annulation est demandée
+        abort = threading.Event()
+        writers = [BackupProgress(cancel_event=abort, throttle=throttle) for _ in plan]
+        # Fichiers à supprimer si la sauvegarde n'aboutit pas
+        created = parts + [index_part]
+        completed = False
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(plan), max(workers, len(destinations)))) as pool:
+                futures = [pool.submit(self._write_volume, part, entries, policy, writer)
+                           for part, entries, writer in zip(parts, plan, writers)]
+                try:
+                    pending = set(futures)
+                    while pending:
+                        mark, start = phases.start()
+                        done, pending = wait(pending, timeout=progress.min_interval, return_when=FIRST_EXCEPTION)
+                        phases.stop('wait', mark, start)
+                        if cancel_event is not None and cancel_event.is_set():
+                            abort.set()
+                        progress.merge(writers)
+                        for future in done:
+                            future.result()
+                except BaseException:
+                    abort.set()
+                    raise
+            
+            file_count = 0
+            archived_size = 0
+            members = {}
+            codec_stats = {}
+            for number, (volume, future, part) in enumerate(zip(volumes, futures, parts)):
+                written, volume_stats = future.result()
+                for name, size, mtime_ns in written:
+                    members[name] = [number, size, mtime_ns]
+                for codec, stats in volume_stats.items():
+                    total = codec_stats.setdefault(codec, dict.fromkeys(stats, 0))
+                    for key, value in stats.items():
+                        total[key] += value
+                volume['files'] = len(written)
+                volume['size'] = sum(size for _, size, _ in written)
+                volume['archive_size'] = os.path.getsize(part)
+                file_count += volume['files']
+                archived_size += volume['size']
+            progress.merge(writers)
+            phases.add_parallel(writer.phases for writer in writers)
+            
+            finalize_mark, finalize_start = phases.start()
+            links = self._valid_links(links, members)
+            file_count += len(links)
+            archived_size += sum(link['size'] for link in links.values())
+            for volume, part in zip(volumes, parts):
+                path = os.path.join(volume['directory'], volume['name'])
+                os.replace(part, path)
+                created.append(path)
+            
+            # L'index est écrit en dernier, dans chaque destination (la première en dernier)
+            duration = (datetime.datetime.now() - start_time).total_seconds()
+            index = {'version': VOLUME_INDEX_VERSION, 'created': start_time.isoformat(),
+                     'source': os.path.abspath(source_dir), 'volume_size': volume_size, 'duration': duration,
+                     'volumes': volumes, 'members': members, 'links': links}
+            data = json.dumps(index, ensure_ascii=False)
+            for directory in reversed(destinations):
+                path = os.path.join(directory, index_name)
+                tmp_path = index_part if directory == destinations[0] else path + PART_SUFFIX
+                created.extend((tmp_path, path))
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            completed = True
+        finally:
+            if not completed:
+                for path in created:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+        
+        progress.finish()
+        backup_size = sum(volume['archive_size'] for volume in volumes)
+        if source_size is None:
+            source_size = archived_size
+        index_path = os.path.join(backup_dir, index_name)
+        self._catalog_backup(
+            backup_dir, index_name, 'volumes', start_time, file_count, archived_size, backup_size, duration,
+            source=index['source'],
+            members=itertools.chain(((name, size, mtime_ns) for name, (_, size, mtime_ns) in members.items()),
+                                    ((name, link['size'], link['mtime_ns']) for name, link in links.items())))
+        phases.stop('finalize', finalize_mark, finalize_start)
+        phases.finish()
+        phases.counters.update(files=file_count, bytes_read=progress.bytes_read, archive_bytes=backup_size,
+                               volumes=len(volumes))
+        
+        self._log_backup_stats("Sauvegarde en volumes terminée avec succès!", f"Index: {index_path}", file_count,
+                               source_size, progress, phases, duration, scan_duration, skipped,
+                               backup_size=backup_size, codec_stats=codec_stats, policy=policy,
+                               details=[f"Volumes: {len(volumes)} sur {len(destinations)} destinations"])
+        
+        if retention is not None and retention.is_active:
+            self.prune(backup_dir, retention)
+        return index_path
+    
+    def _read_volume_index(self, index_path):
+        """Lit l'index d'une sauvegarde en volumes"""
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version', 0) > VOLUME_INDEX_VERSION:
+            raise ValueError(f"Version d'index de volumes non supportée: {index.get('version')}")
+        return index
+    
+    def _volume_paths(self, index_path, index):
+        """
+        Chemins des volumes d'une sauvegarde
+        
+        Un volume absent de sa destination d'origine (disque remonté ailleurs)
+        est cherché à côté de l'index.
+        """
+        paths = []
+        for volume in index['volumes']:
+            path = os.path.join(volume['directory'], volume['name'])
+            if not os.path.exists(path):
+                fallback = os.path.join(os.path.dirname(index_path), volume['name'])
+                if os.path.exists(fallback):
+                    path = fallback
+            paths.append(path)
+        return paths
+    
+    def _remove_volume_set(self, index_path):
+        """Supprime les volumes d'une sauvegarde puis les copies de son index (en dernier)"""
+        index = self._read_volume_index(index_path)
+        for path in self._volume_paths(index_path, index):
+            if os.path.exists(path):
+                os.remove(path)
+        name = os.path.basename(index_path)
+        directories = {volume['directory'] for volume in index['volumes']} - {os.path.dirname(index_path)}
+        for directory in directories:
+            copy = os.path.join(directory, name)
+            if os.path.exists(copy):
+                os.remove(copy)
+        os.remove(index_path)
+    
+    def _backup_to_storage(self, source_dir, storage, manifest, streaming, source_size, start_time, scan_duration,
+                           policy, workers, progress_callback, cancel_event, throttle, phases, skipped, retention,
+                           encryption=None):
+        """
+        Envoie l'archive en flux vers une cible de stockage distante, sans copie locale
+        
+        L'archive est écrite au fil de la compression dans un envoi multipart
+        (parties envoyées en parallèle): les membres y sont suivis de
+        descripteurs de données, le flux n'étant pas repositionnable. L'objet
+        n'apparaît sur la cible qu'une fois l'envoi terminé; en cas d'erreur
+        ou d'annulation, l'envoi est abandonné. Ses statistiques sont ensuite
+        ajoutées au catalogue de la cible.
+        
+        Avec encryption, le flux est chiffré par blocs entre zipfile et
+        l'envoi (backup_....zip.enc), dans le thread d'écriture: le
+        chiffrement d'un bloc se fait pendant que les workers compressent les
+        suivants. Une sauvegarde chiffrée locale passe aussi par ici (cible
+        LocalStorage); elle est enregistrée dans le catalogue SQLite, sans
+        l'index de ses chemins.
+        
+        Returns:
+            str: URL de l'archive sur la cible (chemin de l'archive pour un dossier local)
+        """
+        import zipfile
+        from backup_catalog import StorageCatalog
+        remote = storage.local_path is None
+        with phases.phase('plan'):
+            links = {}
+            if streaming:
+                manifest = self._skip_hardlinks(manifest, links)
+            else:
+                duplicates = self._find_duplicates(manifest)
+                if duplicates:
+                    links = {entry.arcname: self._link_record(entry, *duplicates[entry.arcname])
+                             for entry in manifest if entry.arcname in duplicates}
+                    manifest = [entry for entry in manifest if entry.arcname not in duplicates]
+            zip_filename = self._reserve_storage_name(storage, ".zip" + ENCRYPTED_SUFFIX if encryption else ".zip")
+        if streaming:
+            progress = BackupProgress(progress_callback, cancel_event=cancel_event, throttle=throttle, phases=phases)
+        else:
+            progress = BackupProgress(progress_callback, cancel_event=cancel_event, throttle=throttle, phases=phases,
+                                      files_total=len(manifest), bytes_total=sum(entry.size for entry in manifest))
+        url = storage.url(zip_filename)
+        if remote:
+            self.logger.info(f"☁️  Envoi en flux vers {url}")
+        if encryption is not None:
+            self.logger.info(f"🔐 Chiffrement {encryption.algorithm} par blocs de "
+                             f"{self.format_size(encryption.chunk_size)}")
+        
+        file_count = 0
+        archived_size = 0
+        codec_stats = {}
+        with storage.open_upload(zip_filename) as upload:
+            output = _TimedFile(upload, phases)
+            if encryption is not None:
+                from backup_crypto import EncryptingWriter
+                # Le temps de chiffrement est compté à part, hors écriture dans la cible
+                encrypted = EncryptingWriter(output, encryption)
+                output = _TimedFile(encrypted, phases, 'encrypt')
+            with zipfile.ZipFile(output, 'w') as zipf:
+                if workers > 1:
+                    members = self._write_members_parallel(zipf, manifest, policy, workers, progress)
+                else:
+                    members = self._write_members(zipf, manifest, policy, progress)
+                for entry, zinfo, cpu_time in members:
+                    file_count += 1
+                    progress.file_done(zinfo.compress_size)
+                    _add_codec_stats(codec_stats, zinfo, cpu_time)
+                    archived_size += zinfo.file_size
+                    if file_count % 100 == 0:
+                        self.logger.info(f"Traité {file_count} fichiers...")
+                if links:
+                    links = self._valid_links(links, zipf.NameToInfo)
+                    if links:
+                        zipf.writestr(LINKS_MEMBER, json.dumps(links, ensure_ascii=False))
+                    file_count += len(links)
+                    archived_size += sum(link['size'] for link in links.values())
+            if encryption is not None:
+                with phases.phase('encrypt'):
+                    encrypted.close()
+            # Dernières parties et assemblage de l'objet par la cible
+            with phases.phase('sync'):
+                upload.close()
+            backup_size = upload.tell()
+        
+        finalize_mark, finalize_start = phases.start()
+        progress.finish()
+        if source_size is None:
+            source_size = archived_size
+        duration = (datetime.datetime.now() - start_time).total_seconds()
+        if remote:
+            try:
+                StorageCatalog(storage).record_backup(zip_filename, 'full', start_time, file_count, archived_size,
+                                                      backup_size, duration, source=os.path.abspath(source_dir))
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Impossible de mettre à jour le catalogue de la cible: {e}")
+        else:
+            self._catalog_backup(storage.local_path, zip_filename, 'full', start_time, file_count, archived_size,
+                                 backup_size, duration, source=os.path.abspath(source_dir))
+        phases.stop('finalize', finalize_mark, finalize_start)
+        phases.finish()
+        phases.counters.update(files=file_count, bytes_read=progress.bytes_read, archive_bytes=backup_size)
+        
+        if remote:
+            title, location = "Sauvegarde envoyée avec succès!", f"Objet: {url}"
+        else:
+            title, location = "Sauvegarde terminée avec succès!", f"Fichier: {url}"
+        self._log_backup_stats(title, location, file_count, source_size, progress, phases, duration, scan_duration,
+                               skipped, backup_size=backup_size, codec_stats=codec_stats, policy=policy)
+        
+        if retention is not None and retention.is_active:
+            self.prune(storage, retention)
+        return url
+    
+    def _reserve_storage_name(self, storage, suffix=".zip"):
+        """
+        Choisit le nom d'une nouvelle archive sur une cible distante
+        
+        Une cible d'objets n'offre pas de création exclusive: le nom est
+        seulement choisi libre au moment de l'envoi.
+        """
+        stem = self.get_backup_filename()[:-len(".zip")]
+        zip_filename = stem + suffix
+        number = 1
+        while storage.exists(zip_filename):
+            zip_filename = f"{stem}_{number}{suffix}"
+            number += 1
+        return zip_filename
+    
+    def _zipinfo_from_entry(self, entry, compress_type, compress_level=None):
+        """Construit le ZipInfo d'un membre à partir du manifeste, sans nouveau stat"""
+        import zipfile
+        mtime = time.localtime(entry.mtime_ns / 1e9)
+        # Le format ZIP ne représente que les dates de 1980 à 2107
+        if mtime.tm_year < 1980:
+            date_time = (1980, 1, 1, 0, 0, 0)
+        elif mtime.tm_year > 2107:
+            date_time = (2107, 12, 31, 23, 59, 58)
+        else:
+            date_time = mtime[:6]
+        zinfo = zipfile.ZipInfo(entry.arcname, date_time)
+        zinfo.external_attr = (entry.mode & 0xFFFF) << 16
+        zinfo.extra = _timestamp_extra(entry.mtime_ns)
+        zinfo.file_size = entry.size
+        zinfo.compress_type = compress_type
+        try:
+            zinfo.compress_level = compress_level
+        except AttributeError:
+            # Python < 3.13: attribut encore privé
+            zinfo._compresslevel = compress_level
+        return zinfo
+    
+    def _valid_links(self, links, archived):
+        """
+        Écarte les références dont la cible n'a pas pu être archivée (fichier illisible)
+        
+        Une copie de contenu identique doit viser un membre archivé; un lien
+        physique peut aussi viser une copie conservée.
+        """
+        valid = {}
+        for hardlink in (False, True):
+            for name, link in links.items():
+                if link['hardlink'] == hardlink and (link['target'] in archived or link['target'] in valid):
+                    valid[name] = link
+        for name in links.keys() - valid.keys():
+            self.logger.warning(f"Fichier non sauvegardé, sa cible '{links[name]['target']}' "
+                                f"n'a pas pu être archivée: '{name}'")
+        return valid
+    
+    def _write_members(self, zipf, manifest, policy, progress):
+        """
+        Écrit les fichiers du manifeste un par un
+        
+        Produit pour chaque fichier archivé: (entrée, ZipInfo, temps CPU).
+        """
+        for entry in manifest:
+            method, level = policy.choose(entry)
+            progress.start_file(entry.arcname)
+            cpu_start = time.process_time()
+            try:
+                zinfo = self._write_member(zipf, entry, method, level, progress)
+            except (OSError, IOError) as e:
+                self.logger.warning(f"Impossible de sauvegarder le fichier '{entry.path}': {e}")
+                continue
+            yield entry, zinfo, time.process_time() - cpu_start
+    
+    def _write_members_parallel(self, zipf, manifest, policy, workers, progress, chunk_size=None):
+        """
+        Compresse les fichiers dans un pool de processus et les écrit dans l'ordre
+        
+        Les fichiers DEFLATE/STORED sont découpés en blocs traités en parallèle;
+        les petits fichiers BZIP2/LZMA sont compressés d'un bloc par un worker
+        et les gros sont compressés en flux par l'écrivain. Le thread appelant
+        est le seul écrivain et concatène les flux dans l'ordre du manifeste.
+        Le nombre de blocs en vol est borné pour limiter la mémoire.
+        
+        Produit pour chaque fichier archivé: (entrée, ZipInfo, temps CPU).
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        chunk_size = chunk_size or PARALLEL_CHUNK_SIZE
+        phases = progress.phases
+        writer = _RawMemberWriter(zipf)
+        window = workers * 4
+        pending = deque()
+        failed = None
+        cpu_time = 0.0
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            def tasks():
+                for index, entry in enumerate(manifest):
+                    method, level = policy.choose(entry)
+                    if method in (ZIP_DEFLATED, ZIP_STORED):
+                        offsets = range(0, entry.size, chunk_size) or range(1)
+                    elif entry.size <= chunk_size:
+                        offsets = range(1)
+                    else:
+                        # Gros fichier BZIP2/LZMA: compression en flux par l'écrivain
+                        yield index, entry, method, level, True, True, None
+                        continue
+                    last = len(offsets) - 1
+                    for n, offset in enumerate(offsets):
+                        length = chunk_size if n < last else entry.size - offset
+                        future = pool.submit(_compress_chunk, entry.path, offset, length, method, level, n == last)
+                        yield index, entry, method, level, n == 0, n == last, future
+            
+            task_iter = tasks()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < window:
+                    task = next(task_iter, None)
+                    if task is None:
+                        exhausted = True
+                    else:
+                        pending.append(task)
+                if not pending:
+                    break
+                index, entry, method, level, is_first, is_last, future = pending.popleft()
+                if future is None:
+                    progress.start_file(entry.arcname)
+                    cpu_start = time.process_time()
+                    try:
+                        zinfo = self._write_member(zipf, entry, method, level, progress)
+                    except (OSError, IOError) as e:
+                        self.logger.warning(f"Impossible de sauvegarder le fichier '{entry.path}': {e}")
+                        continue
+                    yield entry, zinfo, time.process_time() - cpu_start
+                    continue
+                if index == failed:
+                    future.cancel()
+                    continue
+                try:
+                    mark, start = phases.start()
+                    data, crc, size, cpu = future.result()
+                    phases.stop('wait', mark, start)
+                    phases.count('worker_cpu', cpu)
+                    if is_first:
+                        cpu_time = 0.0
+                        progress.start_file(entry.arcname)
+                        writer.begin(self._zipinfo_from_entry(entry, method, level))
+                    writer.write(data, crc, size)
+                    cpu_time += cpu
+                    progress.advance(size)
+                except (OSError, IOError) as e:
+                    self.logger.warning(f"Impossible de sauvegarder le fichier '{entry.path}': {e}")
+                    if writer.zinfo is not None:
+                        writer.abort()
+                    failed = index
+                    continue
+                if is_last:
+                    zinfo = writer.zinfo
+                    writer.end()
+                    yield entry, zinfo, cpu_time
+    
+    def _write_member(self, zipf, entry, method, level, progress):
+        """Copie un fichier du manifeste dans l'archive par blocs avec le codec choisi"""
+        import zipfile
+        zinfo = self._zipinfo_from_entry(entry, method, level)
+        force_zip64 = entry.size * 1.05 > zipfile.ZIP64_LIMIT
+        phases = progress.phases
+        with open(entry.path, 'rb') as src, zipf.open(zinfo, 'w', force_zip64=force_zip64) as dest:
+            while True:
+                mark, start = phases.start()
+                block = src.read(COPY_BUFFER_SIZE)
+                phases.stop('read', mark, start)
+                if not block:
+                    break
+                # Compression seule: l'écriture du flux compressé est comptée par _TimedFile
+                mark, start = phases.start()
+                dest.write(block)
+                phases.stop('compress', mark, start)
+                progress.advance(len(block))
+        return zinfo
+    
+    def _member_matches(self, name, patterns):
+        """Indique si un membre correspond à l'un des motifs glob (ou à un dossier donné)"""
+        if not patterns:
+            return True
+        for pattern in patterns:
+            if fnmatch.fnmatchcase(name, pattern) or name.startswith(pattern.rstrip('/') + '/'):
+                return True
+        return False
+    
+    def _read_archive_meta(self, archive_path, key=None):
+        """Lit le membre de métadonnées d'une archive incrémentale (None pour une complète)"""
+        with _open_archive(archive_path, key) as zipf:
+            try:
+                return json.loads(zipf.read(META_MEMBER))
+            except KeyError:
+                return None
+    
+    def _read_archive_links(self, zipf):
+        """Lit les fichiers stockés par référence d'une archive ouverte ({} s'il n'y en a pas)"""
+        try:
+            return json.loads(zipf.read(LINKS_MEMBER))
+        except KeyError:
+            return {}
+    
+    def _restore_links(self, archive_path, target_dir, patterns, restored, key=None):
+        """
+        Recrée les fichiers stockés par référence dans une archive
+        
+        Returns:
+            tuple: (fichiers recréés, octets)
+        """
+        with _open_archive(archive_path, key) as zipf:
+            return self._restore_link_records(self._read_archive_links(zipf), target_dir, patterns, restored,
+                                              zipf.open)
+    
+    def _restore_link_records(self, links, target_dir, patterns, restored, open_member):
+        """
+        Recrée des fichiers stockés par référence
+        
+        Les copies de contenu identique sont recréées avant les liens
+        physiques, dont la cible peut elle-même être une copie. Une cible hors
+        de la sélection est relue dans la sauvegarde plutôt que copiée.
         
-        # Créer le dossier de destination s'il n'existe pas
-        try:
-            os.makedirs(backup_dir, exist_ok=True)
-        except OSError as e:
-            raise PermissionError(f"Impossible de créer le dossier de destination '{backup_dir}': {e}")
+        Args:
+            links (dict): Références {chemin: {target, hardlink, size, mtime_ns, mode}}
+            restored (set): Membres restaurés; complété avec les références recréées
+            open_member (callable): Ouvre en lecture un membre de la sauvegarde (gestionnaire de contexte)
         
-        if not os.access(backup_dir, os.W_OK):
-            raise PermissionError(f"Pas de permission d'écriture sur '{backup_dir}'")
+        Returns:
+            tuple: (fichiers recréés, octets)
+        """
+        import shutil
+        count = written = 0
+        for hardlink in (False, True):
+            for name, link in links.items():
+                if link['hardlink'] != hardlink or not self._member_matches(name, patterns):
+                    continue
+                dest_path = _safe_member_path(target_dir, name)
+                source_path = _safe_member_path(target_dir, link['target'])
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                if os.path.lexists(dest_path):
+                    os.remove(dest_path)
+                linked = False
+                if link['target'] in restored:
+                    if hardlink:
+                        try:
+                            os.link(source_path, dest_path)
+                            linked = True
+                        except OSError:
+                            pass
+                    if not linked:
+                        shutil.copyfile(source_path, dest_path)
+                else:
+                    # Cible non sélectionnée: son contenu est relu dans la sauvegarde
+                    member = links[link['target']]['target'] if link['target'] in links else link['target']
+                    with open_member(member) as src, open(dest_path, 'wb') as dest:
+                        _copy_sparse(src, dest)
+                if not linked:
+                    os.chmod(dest_path, link['mode'] & 0o7777)
+                    os.utime(dest_path, ns=(link['mtime_ns'], link['mtime_ns']))
+                restored.add(name)
+                count += 1
+                written += link['size']
+        return count, written
     
-    def get_backup_filename(self, prefix="backup"):
-        """Génère un nom de fichier de sauvegarde avec horodatage"""
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        return f"{prefix}_{timestamp}.zip"
+    def _resolve_chain(self, archive_path, key=None):
+        """
+        Reconstitue la chaîne complète -> incrémentales nécessaire à une restauration
+        
+        Returns:
+            list[tuple]: (chemin d'archive, métadonnées ou None), de la base à l'archive demandée
+        """
+        chain = []
+        current = archive_path
+        while current is not None:
+            meta = self._read_archive_meta(current, key)
+            chain.append((current, meta))
+            if meta is None:
+                break
+            parent = os.path.join(os.path.dirname(archive_path), meta['parent'])
+            if not os.path.exists(parent):
+                raise RuntimeError(f"Sauvegarde parente introuvable: '{meta['parent']}'")
+            if any(path == parent for path, _ in chain):
+                raise RuntimeError(f"Chaîne de sauvegardes circulaire autour de '{meta['parent']}'")
+            current = parent
+        return list(reversed(chain))
     
-    def calculate_folder_size(self, folder_path):
-        """Calcule la taille totale d'un dossier"""
-        total_size = 0
-        try:
-            for dirpath, dirnames, filenames in os.walk(folder_path):
-                for filename in filenames:
-                    file_path = os.path.join(dirpath, filename)
-                    if os.path.exists(file_path):
-                        total_size += os.path.getsize(file_path)
-        except (OSError, IOError) as e:
-            self.logger.warning(f"Erreur lors du calcul de la taille: {e}")
-        return total_size
+    def _extract_members(self, archive_path, infos, target_dir, workers, cancel_event=None, key=None):
+        """Répartit les membres à extraire entre plusieurs processus, équilibrés par taille"""
+        if workers <= 1 or len(infos) < 2:
+            return _restore_members(archive_path, [zi.filename for zi in infos], target_dir, cancel_event, key)
+        tasks = [(archive_path, names) for names in _balanced_buckets(infos, workers)]
+        return self._restore_in_pool(tasks, target_dir, len(tasks), cancel_event, key)
     
-    def format_size(self, size_bytes):
-        """Formate la taille en octets de manière lisible"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} TB"
+    def _restore_in_pool(self, tasks, target_dir, workers, cancel_event=None, key=None):
+        """
+        Extrait des lots (archive, membres) dans un pool de processus
+        
+        Un threading.Event ne traverse pas les processus: l'annulation est
+        relayée aux workers par un Event partagé (multiprocessing.Manager),
+        vérifié avant chaque membre. Les lots pas encore démarrés sont
+        abandonnés et un lot en échec arrête les autres de la même façon.
+        
+        Returns:
+            tuple: (fichiers restaurés, octets écrits)
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        count = written = 0
+        with contextlib.ExitStack() as stack:
+            manager = stack.enter_context(multiprocessing.Manager())
+            shared_cancel = manager.Event()
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=min(workers, len(tasks))))
+            pending = {pool.submit(_restore_members, path, names, target_dir, shared_cancel, key)
+                       for path, names in tasks}
+            try:
+                while pending:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise BackupCancelled("Restauration annulée")
+                    done, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        files, size = future.result()
+                        count += files
+                        written += size
+            except BaseException:
+                shared_cancel.set()
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+        return count, written
+    
+    def _restore_snapshot(self, snapshot_path, target_dir, patterns, cancel_event=None):
+        """Restaure un instantané du dépôt de blocs dédupliqués"""
+        store = ChunkStore(os.path.dirname(os.path.dirname(snapshot_path)), self.logger).open()
+        snapshot = store.load_snapshot(os.path.basename(snapshot_path))
+        count = written = 0
+        for record in snapshot['files']:
+            if cancel_event is not None and cancel_event.is_set():
+                raise BackupCancelled("Restauration annulée")
+            if not self._member_matches(record['path'], patterns):
+                continue
+            dest_path = _safe_member_path(target_dir, record['path'])
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            store.restore_file(record['chunks'], dest_path)
+            os.chmod(dest_path, record['mode'] & 0o7777)
+            os.utime(dest_path, ns=(record['mtime_ns'], record['mtime_ns']))
+            count += 1
+            written += record['size']
+        return count, written
     
-    def backup_and_compress(self, source_dir, backup_dir, compression_level=zipfile.ZIP_DEFLATED):
+    def _restore_volumes(self, index_path, target_dir, patterns, workers, cancel_event=None):
         """
-        Sauvegarde et compresse un dossier vers un fichier ZIP
+        Restaure une sauvegarde en volumes, un processus par volume avec workers > 1
+        
+        L'index indique le volume de chaque membre: seuls les volumes contenant
+        des membres sélectionnés sont ouverts.
+        """
+        import zipfile
+        index = self._read_volume_index(index_path)
+        paths = self._volume_paths(index_path, index)
+        selected = [[] for _ in paths]
+        for name, (volume, _, _) in index['members'].items():
+            if self._member_matches(name, patterns):
+                selected[volume].append(name)
+        tasks = [(paths[volume], names) for volume, names in enumerate(selected) if names]
+        for path, _ in tasks:
+            if not os.path.exists(path):
+                raise RuntimeError(f"Volume introuvable: '{path}'")
+        
+        count = written = 0
+        if workers <= 1 or len(tasks) < 2:
+            for path, names in tasks:
+                files, size = _restore_members(path, names, target_dir, cancel_event)
+                count += files
+                written += size
+        else:
+            count, written = self._restore_in_pool(tasks, target_dir, workers, cancel_event)
+        
+        @contextlib.contextmanager
+        def open_member(name):
+            with zipfile.ZipFile(paths[index['members'][name][0]], 'r') as zipf, zipf.open(name) as src:
+                yield src
+        
+        restored = {name for _, names in tasks for name in names}
+        links, linked_size = self._restore_link_records(index['links'], target_dir, patterns, restored, open_member)
+        return count + links, written + linked_size
+    
+    def restore(self, archive_path, target_dir, patterns=None, workers=1, cancel_event=None, encryption=None):
+        """
+        Restaure une sauvegarde, entièrement ou seulement les membres sélectionnés
+        
+        Une sauvegarde incrémentale est restaurée avec toute sa chaîne (base
+        complète puis incrémentales, suppressions comprises).
         
         Args:
-            source_dir (str): Chemin du dossier source
-            backup_dir (str): Chemin du dossier de destination
-            compression_level: Niveau de compression ZIP
+            archive_path (str): Archive ZIP, manifeste d'instantané ou index de volumes à restaurer,
+                                ou URL d'une archive sur une cible distante
+            target_dir (str): Dossier de restauration
+            patterns (list[str]): Motifs glob des chemins à extraire (tous si vide)
+            workers (int): Nombre de processus de décompression (volumes lus en parallèle)
+            cancel_event (threading.Event): Annulation coopérative, vérifiée entre les
+                                            membres (relayée aux processus avec workers > 1)
+            encryption (EncryptionKey): Clé d'une archive chiffrée (.zip.enc), déchiffrée à la volée
         
         Returns:
-            str: Chemin du fichier de sauvegarde créé
+            int: Nombre de fichiers restaurés
         """
-        start_time = datetime.datetime.now()
-        
+        if STORAGE_URL.match(archive_path):
+            return self._restore_from_storage(archive_path, target_dir, patterns, workers, cancel_event,
+                                              encryption)
+        start_time = time.perf_counter()
         try:
-            # Validation des chemins
-            self.validate_paths(source_dir, backup_dir)
+            if not os.path.isfile(archive_path):
+                raise ValueError(f"La sauvegarde '{archive_path}' n'existe pas")
+            try:
+                os.makedirs(target_dir, exist_ok=True)
+            except OSError as e:
+                raise PermissionError(f"Impossible de créer le dossier de restauration '{target_dir}': {e}")
+            if not os.access(target_dir, os.W_OK):
+                raise PermissionError(f"Pas de permission d'écriture sur '{target_dir}'")
             
-            # Calcul de la taille source
-            source_size = self.calculate_folder_size(source_dir)
-            self.logger.info(f"Début de la sauvegarde de '{source_dir}' ({self.format_size(source_size)})")
+            self.logger.info(f"Début de la restauration de '{archive_path}' vers '{target_dir}'")
+            if archive_path.endswith(VOLUME_INDEX_SUFFIX):
+                file_count, restored_size = self._restore_volumes(archive_path, target_dir, patterns, workers,
+                                                                  cancel_event)
+            elif archive_path.endswith(".json"):
+                file_count, restored_size = self._restore_snapshot(archive_path, target_dir, patterns,
+                                                                   cancel_event)
+            else:
+                file_count = restored_size = 0
+                for path, meta in self._resolve_chain(archive_path, encryption):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise BackupCancelled("Restauration annulée")
+                    for name in (meta or {}).get('deleted', []):
+                        if self._member_matches(name, patterns):
+                            dest_path = _safe_member_path(target_dir, name)
+                            if os.path.isfile(dest_path):
+                                os.remove(dest_path)
+                    with _open_archive(path, encryption) as zipf:
+                        infos = [zi for zi in zipf.infolist()
+                                 if zi.filename not in INTERNAL_MEMBERS
+                                 and self._member_matches(zi.filename, patterns)]
+                    files, size = self._extract_members(path, infos, target_dir, workers, cancel_event, encryption)
+                    links, linked_size = self._restore_links(path, target_dir, patterns,
+                                                             {zi.filename for zi in infos}, encryption)
+                    file_count += files + links
+                    restored_size += size + linked_size
             
-            # Génération du nom de fichier
-            zip_filename = self.get_backup_filename()
-            zip_path = os.path.join(backup_dir, zip_filename)
-            
-            # Compteurs pour le suivi
-            file_count = 0
-            
-            # Création de l'archive ZIP
-            with zipfile.ZipFile(zip_path, 'w', compression_level) as zipf:
-                for root, dirs, files in os.walk(source_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        
-                        # Vérifier si le fichier existe et est accessible
-                        if os.path.exists(file_path) and os.access(file_path, os.R_OK):
-                            try:
-                                # Chemin relatif pour préserver la structure
-                                arcname = os.path.relpath(file_path, start=source_dir)
-                                zipf.write(file_path, arcname)
-                                file_count += 1
-                                
-                                # Log de progression tous les 100 fichiers
-                                if file_count % 100 == 0:
-                                    self.logger.info(f"Traité {file_count} fichiers...")
-                                    
-                            except (OSError, IOError) as e:
-                                self.logger.warning(f"Impossible de sauvegarder le fichier '{file_path}': {e}")
-                        else:
-                            self.logger.warning(f"Fichier inaccessible: '{file_path}'")
-            
-            # Vérification de la sauvegarde
-            if not os.path.exists(zip_path):
-                raise RuntimeError("Le fichier de sauvegarde n'a pas été créé")
-            
-            # Calcul du temps d'exécution et de la taille finale
-            end_time = datetime.datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            backup_size = os.path.getsize(zip_path)
-            compression_ratio = (1 - backup_size / source_size) * 100 if source_size > 0 else 0
-            
-            # Logs de succès
-            self.logger.info(f"✅ Sauvegarde terminée avec succès!")
-            self.logger.info(f"📁 Fichier: {zip_path}")
+            duration = time.perf_counter() - start_time
+            self.logger.info(f"✅ Restauration terminée avec succès!")
             self.logger.info(f"📊 Statistiques:")
-            self.logger.info(f"   - Fichiers traités: {file_count}")
-            self.logger.info(f"   - Taille originale: {self.format_size(source_size)}")
-            self.logger.info(f"   - Taille compressée: {self.format_size(backup_size)}")
-            self.logger.info(f"   - Ratio de compression: {compression_ratio:.1f}%")
+            self.logger.info(f"   - Fichiers restaurés: {file_count}")
+            self.logger.info(f"   - Taille restaurée: {self.format_size(restored_size)}")
             self.logger.info(f"   - Durée: {duration:.2f} secondes")
+            return file_count
             
-            return zip_path
-            
+        except BackupCancelled:
+            self.logger.warning("⏹️  Restauration annulée")
+            raise
         except Exception as e:
-            self.logger.error(f"❌ Erreur lors de la sauvegarde: {e}")
+            self.logger.error(f"❌ Erreur lors de la restauration: {e}")
             raise
     
-    def list_backups(self, backup_dir):
-        """Liste toutes les sauvegardes dans le dossier de destination"""
+    def _restore_from_storage(self, url, target_dir, patterns, workers, cancel_event, encryption=None):
+        """
+        Restaure une archive d'une cible distante
+        
+        La lecture d'un ZIP commence par son répertoire central, en fin de
+        fichier: l'archive est d'abord téléchargée dans un dossier temporaire
+        (TMPDIR), supprimé après la restauration. Une archive chiffrée y reste
+        chiffrée: elle n'est déchiffrée qu'à l'extraction.
+        """
+        import tempfile
+        from backup_storage import open_storage_object
+        storage, name = open_storage_object(url)
+        try:
+            with tempfile.TemporaryDirectory(prefix="backup_restore_") as temp_dir:
+                local_path = os.path.join(temp_dir, name)
+                self.logger.info(f"⬇️  Téléchargement de {url}")
+                try:
+                    with open(local_path, 'wb') as f:
+                        storage.get(name, f)
+                except OSError as e:
+                    self.logger.error(f"❌ Erreur lors du téléchargement: {e}")
+                    raise
+                return self.restore(local_path, target_dir, patterns, workers, cancel_event, encryption)
+        finally:
+            storage.close()
+    
+    def _catalog_backup(self, backup_dir, name, backup_type, created, file_count, original_size,
+                        compressed_size, duration, source=None, base=None, parent=None, members=()):
+        """Enregistre une sauvegarde dans le catalogue (une erreur n'invalide pas la sauvegarde)"""
+        import sqlite3
+        from backup_catalog import BackupCatalog
+        path = os.path.join(backup_dir, name)
+        try:
+            stat = os.stat(path) if backup_type != 'snapshot' else None
+            BackupCatalog(backup_dir).record_backup(
+                name, backup_type, created, file_count, original_size, compressed_size,
+                duration=duration, source=source, base=base, parent=parent, members=members,
+                archive_mtime_ns=stat.st_mtime_ns if stat else None,
+                archive_size=stat.st_size if stat else None)
+        except (OSError, sqlite3.Error) as e:
+            self.logger.warning(f"Impossible de mettre à jour le catalogue: {e}")
+    
+    def _backup_date(self, name, path):
+        """Date de création d'une sauvegarde: horodatage du nom, sinon date de modification"""
+        match = BACKUP_NAME_DATE.search(name)
+        if match:
+            return datetime.datetime.strptime(match.group(1), "%Y-%m-%d_%H-%M-%S")
+        return datetime.datetime.fromtimestamp(os.path.getmtime(path))
+    
+    def _catalog_existing(self, backup_dir, catalog, names, chain):
+        """
+        Ajoute au catalogue des sauvegardes créées sans lui (anciennes versions, copies)
+        
+        Lit le répertoire central de chaque archive (ou le manifeste de
+        l'instantané) une seule fois; les listes suivantes n'y touchent plus.
+        Une archive chiffrée, illisible sans clé, n'est enregistrée qu'avec sa
+        date et sa taille.
+        """
+        import zipfile
+        store = ChunkStore(os.path.join(backup_dir, CHUNKSTORE_DIRNAME), self.logger)
+        for name in names:
+            try:
+                if name.endswith(VOLUME_INDEX_SUFFIX):
+                    path = os.path.join(backup_dir, name)
+                    stat = os.stat(path)
+                    index = self._read_volume_index(path)
+                    members = [(member, size, mtime_ns) for member, (_, size, mtime_ns) in index['members'].items()]
+                    members.extend((dup, link['size'], link['mtime_ns']) for dup, link in index['links'].items())
+                    catalog.record_backup(
+                        name, 'volumes', datetime.datetime.fromisoformat(index['created']), len(members),
+                        sum(size for _, size, _ in members),
+                        sum(volume['archive_size'] for volume in index['volumes']),
+                        duration=index.get('duration'), source=index.get('source'), members=members,
+                        archive_mtime_ns=stat.st_mtime_ns, archive_size=stat.st_size)
+                    continue
+                if name.endswith(".json"):
+                    snapshot = store.load_snapshot(name)
+                    catalog.record_backup(
+                        name, 'snapshot', datetime.datetime.fromisoformat(snapshot['created']),
+                        snapshot['file_count'], snapshot['original_size'], snapshot['added_size'],
+                        duration=snapshot.get('duration'), source=snapshot.get('source'),
+                        members=((f['path'], f['size'], f['mtime_ns']) for f in snapshot['files']))
+                    continue
+                path = os.path.join(backup_dir, name)
+                stat = os.stat(path)
+                if name.endswith(ENCRYPTED_SUFFIX):
+                    catalog.record_backup(name, 'full', self._backup_date(name, path), 0, 0, stat.st_size,
+                                          archive_mtime_ns=stat.st_mtime_ns, archive_size=stat.st_size)
+                    continue
+                with zipfile.ZipFile(path, 'r') as zipf:
+                    infos = [info for info in zipf.infolist() if info.filename not in INTERNAL_MEMBERS]
+                    links = self._read_archive_links(zipf)
+                info = chain.get(name, {})
+                members = [(i.filename, i.file_size, int(_member_mtime(i) * 1e9)) for i in infos]
+                members.extend((dup, link['size'], link['mtime_ns']) for dup, link in links.items())
+                catalog.record_backup(
+                    name, info.get('type', 'full'), self._backup_date(name, path), len(members),
+                    sum(size for _, size, _ in members), stat.st_size,
+                    base=info.get('base'), parent=info.get('parent'), members=members,
+                    archive_mtime_ns=stat.st_mtime_ns, archive_size=stat.st_size)
+                self.logger.debug(f"Sauvegarde ajoutée au catalogue: {name}")
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+                self.logger.warning(f"Impossible d'ajouter '{name}' au catalogue: {e}")
+    
+    def _sync_catalog(self, backup_dir, verify=False):
+        """
+        Réconcilie le catalogue avec le contenu du dossier de destination
+        
+        Un seul listdir, sans stat: les archives inconnues sont ajoutées au
+        catalogue et les archives disparues en sont retirées. Avec verify, les
+        archives connues dont le mtime ou la taille a changé sont réindexées.
+        
+        Sans verify, le catalogue est d'abord ouvert en lecture seule et n'est
+        rouvert en écriture que s'il doit être mis à jour: une liste sur une
+        destination à jour (ou en lecture seule) n'écrit rien.
+        
+        Returns:
+            tuple: (catalogue, dépôt dédupliqué de la destination)
+        
+        Raises:
+            sqlite3.Error: Catalogue impossible à ouvrir ou à mettre à jour
+        """
+        import sqlite3
+        from backup_catalog import BackupCatalog
+        store = ChunkStore(os.path.join(backup_dir, CHUNKSTORE_DIRNAME), self.logger)
+        # Les volumes ne sont pas des sauvegardes à part: leur index les représente
+        on_disk = {file for file in os.listdir(backup_dir)
+                   if file.startswith("backup_") and (file.endswith(VOLUME_INDEX_SUFFIX)
+                                                      or file.endswith((".zip", ".zip" + ENCRYPTED_SUFFIX))
+                                                      and not VOLUME_NAME.search(file))}
+        snapshots = set(store.list_snapshots())
+        
+        catalog = BackupCatalog(backup_dir, read_only=not verify)
+        try:
+            known = catalog.archive_stats()
+        except sqlite3.OperationalError:
+            # Catalogue absent ou à migrer
+            catalog = BackupCatalog(backup_dir)
+            known = catalog.archive_stats()
+        missing = sorted((on_disk | snapshots) - known.keys())
+        if verify:
+            for name in sorted(on_disk & known.keys()):
+                try:
+                    stat = os.stat(os.path.join(backup_dir, name))
+                except OSError:
+                    continue
+                if known[name] != (stat.st_mtime_ns, stat.st_size):
+                    missing.append(name)
+        stale = known.keys() - on_disk - snapshots
+        if (missing or stale) and catalog.read_only:
+            catalog = BackupCatalog(backup_dir)
+        if missing:
+            self.logger.info(f"Ajout de {len(missing)} sauvegardes au catalogue...")
+            self._catalog_existing(backup_dir, catalog, missing, self.load_index(backup_dir)['backups'])
+        if stale:
+            catalog.remove_backups(stale)
+        return catalog, store
+    
+    def list_backups(self, backup_dir, since=None, until=None):
+        """
+        Liste les sauvegardes du dossier de destination à partir du catalogue
+        
+        Args:
+            backup_dir (str): Dossier de destination, URL ou StorageTarget d'une cible distante
+            since (datetime): Date de création minimale incluse
+            until (datetime): Date de création maximale exclue
+        
+        Returns:
+            list: Sauvegardes, les plus récentes en premier (avec la liste 'volumes'
+                  des chemins de volumes pour une sauvegarde découpée)
+        """
+        import sqlite3
         try:
+            with self._open_destination(backup_dir) as (backup_dir, storage):
+                if storage is not None:
+                    return self._list_storage_backups(storage, since, until)
             if not os.path.exists(backup_dir):
                 return []
             
+            try:
+                catalog, store = self._sync_catalog(backup_dir)
+                records = catalog.list_backups(since, until)
+            except sqlite3.Error as e:
+                self.logger.warning(f"Catalogue indisponible ({e}), liste par parcours du dossier")
+                return self._scan_backups(backup_dir, since, until)
             backups = []
-            for file in os.listdir(backup_dir):
-                if file.startswith("backup_") and file.endswith(".zip"):
-                    file_path = os.path.join(backup_dir, file)
-                    stat = os.stat(file_path)
-                    backups.append({
-                        'name': file,
-                        'path': file_path,
-                        'size': stat.st_size,
-                        'date': datetime.datetime.fromtimestamp(stat.st_mtime)
-                    })
-            
-            return sorted(backups, key=lambda x: x['date'], reverse=True)
+            for record in records:
+                if record['type'] == 'snapshot':
+                    path = os.path.join(store.snapshots_dir, record['name'])
+                else:
+                    path = os.path.join(backup_dir, record['name'])
+                backups.append({
+                    'name': record['name'],
+                    'path': path,
+                    'size': record['compressed_size'],
+                    'date': record['created'],
+                    'type': record['type'],
+                    'base': record['base'],
+                    'parent': record['parent'],
+                    'file_count': record['file_count'],
+                    'original_size': record['original_size'],
+                    'duration': record['duration'],
+                    'encrypted': record['name'].endswith(ENCRYPTED_SUFFIX),
+                })
+                if record['type'] == 'volumes':
+                    try:
+                        backups[-1]['volumes'] = self._volume_paths(path, self._read_volume_index(path))
+                    except (OSError, ValueError, KeyError) as e:
+                        self.logger.warning(f"Index de volumes illisible '{path}': {e}")
+                        backups[-1]['volumes'] = []
+            return backups
             
         except Exception as e:
             self.logger.error(f"Erreur lors de la liste des sauvegardes: {e}")
             return []
+    
+    def _scan_backups(self, backup_dir, since=None, until=None):
+        """
+        Liste les sauvegardes par listdir/stat, sans catalogue
+        
+        Repli de list_backups lorsque le catalogue ne peut être ni ouvert ni
+        mis à jour (destination en lecture seule...). Le nombre de fichiers
+        et la taille d'origine des archives ZIP ne sont pas connus.
+        """
+        chain = self.load_index(backup_dir)['backups']
+        backups = []
+        for name in os.listdir(backup_dir):
+            path = os.path.join(backup_dir, name)
+            backup = {'name': name, 'path': path, 'type': 'full', 'base': None, 'parent': None,
+                      'file_count': None, 'original_size': None, 'duration': None,
+                      'encrypted': name.endswith(ENCRYPTED_SUFFIX)}
+            try:
+                if name.startswith("backup_") and name.endswith(VOLUME_INDEX_SUFFIX):
+                    index = self._read_volume_index(path)
+                    backup.update(type='volumes', date=datetime.datetime.fromisoformat(index['created']),
+                                  size=sum(volume['archive_size'] for volume in index['volumes']),
+                                  duration=index.get('duration'), volumes=self._volume_paths(path, index))
+                elif (name.startswith("backup_") and name.endswith((".zip", ".zip" + ENCRYPTED_SUFFIX))
+                      and not VOLUME_NAME.search(name)):
+                    info = chain.get(name, {})
+                    backup.update(type=info.get('type', 'full'), base=info.get('base'), parent=info.get('parent'),
+                                  size=os.stat(path).st_size, date=self._backup_date(name, path))
+                else:
+                    continue
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"Sauvegarde illisible '{name}': {e}")
+                continue
+            backups.append(backup)
+        
+        # Instantanés du dépôt dédupliqué
+        store = ChunkStore(os.path.join(backup_dir, CHUNKSTORE_DIRNAME), self.logger)
+        for name in store.list_snapshots():
+            try:
+                snapshot = store.load_snapshot(name)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Instantané illisible '{name}': {e}")
+                continue
+            backups.append({
+                'name': name,
+                'path': os.path.join(store.snapshots_dir, name),
+                'size': snapshot['added_size'],
+                'date': datetime.datetime.fromisoformat(snapshot['created']),
+                'type': 'snapshot',
+                'base': None,
+                'parent': None,
+                'file_count': snapshot['file_count'],
+                'original_size': snapshot['original_size'],
+                'duration': snapshot.get('duration'),
+                'encrypted': False,
+            })
+        
+        backups = [backup for backup in backups
+                   if (since is None or backup['date'] >= since) and (until is None or backup['date'] < until)]
+        return sorted(backups, key=lambda backup: backup['date'], reverse=True)
+    
+    def _list_storage_backups(self, storage, since=None, until=None):
+        """
+        Liste les archives d'une cible distante avec les statistiques de son catalogue
+        
+        Une archive absente du catalogue est listée avec la date tirée de son
+        nom, sans nombre de fichiers ni taille d'origine.
+        """
+        from backup_catalog import StorageCatalog
+        known = StorageCatalog(storage).load()
+        backups = []
+        for stored in storage.list("backup_"):
+            if not stored.name.endswith((".zip", ".zip" + ENCRYPTED_SUFFIX)) or VOLUME_NAME.search(stored.name):
+                continue
+            record = known.get(stored.name, {})
+            match = BACKUP_NAME_DATE.search(stored.name)
+            if 'created' in record:
+                date = datetime.datetime.fromisoformat(record['created'])
+            elif match:
+                date = datetime.datetime.strptime(match.group(1), "%Y-%m-%d_%H-%M-%S")
+            else:
+                date = stored.modified
+            if (since is not None and date < since) or (until is not None and date >= until):
+                continue
+            backups.append({
+                'name': stored.name,
+                'path': storage.url(stored.name),
+                'size': stored.size,
+                'date': date,
+                'type': 'full',
+                'base': None,
+                'parent': None,
+                'file_count': record.get('file_count'),
+                'original_size': record.get('original_size'),
+                'duration': record.get('duration'),
+                'encrypted': stored.name.endswith(ENCRYPTED_SUFFIX),
+            })
+        backups.sort(key=lambda backup: backup['date'], reverse=True)
+        return backups
+    
+    def prune(self, backup_dir, policy, dry_run=False):
+        """
+        Supprime les sauvegardes ZIP que la politique de conservation ne retient pas
+        
+        Les instantanés du dépôt dédupliqué ne sont pas concernés. Une
+        sauvegarde en volumes est supprimée avec tous ses volumes et les copies
+        de son index dans les autres destinations.
+        
+        Args:
+            backup_dir (str): Dossier de destination, URL ou StorageTarget d'une cible distante
+            policy (RetentionPolicy): Politique de conservation
+            dry_run (bool): Seulement journaliser ce qui serait supprimé
+        
+        Returns:
+            list: Sauvegardes supprimées (ou à supprimer en mode dry_run)
+        """
+        with self._open_destination(backup_dir) as (backup_dir, storage):
+            return self._prune(backup_dir, storage, policy, dry_run)
+    
+    def _prune(self, backup_dir, storage, policy, dry_run):
+        """Applique la politique de conservation à un dossier local ou à une cible distante ouverte"""
+        import sqlite3
+        from backup_catalog import BackupCatalog, StorageCatalog
+        backups = [backup for backup in self.list_backups(storage or backup_dir) if backup['type'] != 'snapshot']
+        kept, pruned = policy.select(backups)
+        if not pruned:
+            self.logger.info(f"🧹 Rétention: {len(kept)} sauvegardes conservées, aucune à supprimer")
+            return []
+        
+        removed = []
+        for backup in pruned:
+            if dry_run:
+                self.logger.info(f"🧪 Serait supprimée: {backup['name']} ({self.format_size(backup['size'])})")
+                continue
+            try:
+                if storage is not None:
+                    storage.delete(backup['name'])
+                elif backup['type'] == 'volumes':
+                    self._remove_volume_set(backup['path'])
+                else:
+                    os.remove(backup['path'])
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Impossible de supprimer '{backup['path']}': {e}")
+                continue
+            self.logger.debug(f"Sauvegarde supprimée: {backup['name']}")
+            removed.append(backup)
+        if dry_run:
+            removed = pruned
+        elif removed and storage is not None:
+            try:
+                StorageCatalog(storage).remove_backups(backup['name'] for backup in removed)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Impossible de mettre à jour le catalogue de la cible: {e}")
+        elif removed:
+            names = {backup['name'] for backup in removed}
+            try:
+                BackupCatalog(backup_dir).remove_backups(names)
+            except sqlite3.Error as e:
+                self.logger.warning(f"Impossible de mettre à jour le catalogue: {e}")
+            if os.path.exists(self._index_path(backup_dir)):
+                index = self.load_index(backup_dir)
+                for name in names:
+                    index['backups'].pop(name, None)
+                self._save_index(backup_dir, index)
+        
+        freed = sum(backup['size'] for backup in removed)
+        self.logger.info(f"🧹 Rétention: {len(kept)} sauvegardes conservées, {len(removed)} "
+                         f"{'à supprimer' if dry_run else 'supprimées'} ({self.format_size(freed)})")
+        return removed
+    
+    def find(self, backup_dir, pattern):
+        """
+        Recherche un fichier dans toutes les sauvegardes sans ouvrir les archives
+        
+        L'index des chemins du catalogue est construit à la création des
+        sauvegardes, ou à la première recherche pour les archives existantes;
+        une archive dont le mtime ou la taille a changé est réindexée.
+        
+        Args:
+            backup_dir (str): Dossier de destination
+            pattern (str): Chemin exact, motif glob ou dossier
+        
+        Returns:
+            list: Sauvegardes contenant le chemin, les plus récentes en premier,
+                  avec pour chacune les versions trouvées (chemin, taille, mtime)
+        """
+        if not os.path.exists(backup_dir):
+            raise FileNotFoundError(f"Le dossier de destination '{backup_dir}' n'existe pas")
+        catalog, store = self._sync_catalog(backup_dir, verify=True)
+        results = []
+        for hit in catalog.find_path(pattern):
+            if not results or results[-1]['name'] != hit['backup']:
+                if hit['backup'].endswith(".json"):
+                    path = os.path.join(store.snapshots_dir, hit['backup'])
+                else:
+                    path = os.path.join(backup_dir, hit['backup'])
+                results.append({'name': hit['backup'], 'path': path, 'date': hit['created'], 'matches': []})
+            results[-1]['matches'].append({
+                'path': hit['path'],
+                'size': hit['size'],
+                'mtime': datetime.datetime.fromtimestamp(hit['mtime_ns'] / 1e9) if hit['mtime_ns'] else None,
+            })
+        return results
+    
+    def _plan_verification(self, backup, quick, split, key=None):
+        """
+        Tâches de vérification d'une sauvegarde
+        
+        Le répertoire central est lu ici: une archive dont il est illisible
+        est corrompue sans qu'aucune tâche soit nécessaire.
+        
+        Returns:
+            list: Tuples (fonction, arguments) à exécuter dans les workers
+        """
+        import zipfile
+        if backup['type'] == 'snapshot':
+            return [(_verify_snapshot, (backup['path'], quick))]
+        if backup['type'] == 'volumes':
+            paths = self._volume_paths(backup['path'], self._read_volume_index(backup['path']))
+        else:
+            paths = [backup['path']]
+        tasks = []
+        for path in paths:
+            with _open_archive(path, key) as zipf:
+                infos = [zinfo for zinfo in zipf.infolist() if not zinfo.is_dir()]
+            if quick:
+                infos = _verify_sample(infos)
+            buckets = _balanced_buckets(infos, split)
+            # En mode rapide, les en-têtes locaux de tous les membres sont contrôlés une fois
+            tasks.extend((_verify_members, (path, names, quick and i == 0, key)) for i, names in enumerate(buckets))
+        return tasks
+    
+    def verify(self, backup_dir, names=None, quick=False, workers=1, force=False, encryption=None):
+        """
+        Vérifie l'intégrité des sauvegardes d'une destination
+        
+        Les archives ZIP sont entièrement décompressées pour contrôler le CRC-32
+        de chaque membre; les instantanés sont contrôlés par le SHA-256 de leurs
+        blocs. Le mode rapide se limite au répertoire central, aux en-têtes
+        locaux et à un échantillon de membres relus.
+        
+        Les archives sont réparties entre les processus; s'il y en a moins que
+        de processus, leurs membres le sont. Une sauvegarde en volumes est
+        vérifiée volume par volume. Au plus 2 tâches par processus sont
+        en attente, ce qui borne le nombre de lectures simultanées.
+        
+        Chaque résultat est enregistré dans le catalogue: une sauvegarde déjà
+        vérifiée sans erreur, inchangée depuis (mtime et taille) et dans un mode
+        au moins aussi complet est ignorée, sauf avec force.
+        
+        Une archive chiffrée est déchiffrée à la volée, ce qui authentifie
+        aussi chaque bloc lu; sans clé, elle est ignorée.
+        
+        Args:
+            backup_dir (str): Dossier de destination
+            names (list[str]): Sauvegardes à vérifier (noms ou chemins), toutes si vide
+            quick (bool): Vérification rapide
+            workers (int): Nombre de processus de vérification
+            force (bool): Revérifier même les sauvegardes inchangées
+            encryption (EncryptionKey): Clé des archives chiffrées (.zip.enc)
+        
+        Returns:
+            list: Dictionnaires {name, path, status ('ok', 'corrupt' ou 'skipped'),
+                  checked, errors}, les plus récentes en premier
+        """
+        import sqlite3
+        import zipfile
+        from concurrent.futures import ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+        if STORAGE_URL.match(backup_dir):
+            raise ValueError("La vérification d'une cible distante n'est pas prise en charge: "
+                             "restaurez l'archive, ses CRC sont contrôlés à l'extraction")
+        if not os.path.exists(backup_dir):
+            raise FileNotFoundError(f"Le dossier de destination '{backup_dir}' n'existe pas")
+        catalog, store = self._sync_catalog(backup_dir, verify=True)
+        backups = []
+        for record in catalog.list_backups():
+            if record['type'] == 'snapshot':
+                path = os.path.join(store.snapshots_dir, record['name'])
+            else:
+                path = os.path.join(backup_dir, record['name'])
+            backups.append({'name': record['name'], 'path': path, 'type': record['type']})
+        if names:
+            wanted = {os.path.basename(name) for name in names}
+            unknown = wanted - {backup['name'] for backup in backups}
+            if unknown:
+                raise FileNotFoundError(f"Sauvegardes introuvables: {', '.join(sorted(unknown))}")
+            backups = [backup for backup in backups if backup['name'] in wanted]
+        
+        mode = 'quick' if quick else 'full'
+        previous = catalog.verifications()
+        results = {}
+        pending = []
+        for backup in backups:
+            stat = os.stat(backup['path'])
+            backup['stat'] = (stat.st_mtime_ns, stat.st_size)
+            last = previous.get(backup['name'])
+            if (not force and last and last['status'] == 'ok'
+                    and (last['archive_mtime_ns'], last['archive_size']) == backup['stat']
+                    and (last['mode'] == 'full' or quick)):
+                self.logger.debug(f"Déjà vérifiée le {last['verified']:%Y-%m-%d %H:%M}: {backup['name']}")
+                results[backup['name']] = {'name': backup['name'], 'path': backup['path'], 'status': 'skipped',
+                                           'checked': last['checked'], 'errors': []}
+                continue
+            if encryption is None and backup['name'].endswith(ENCRYPTED_SUFFIX):
+                self.logger.warning(f"Sauvegarde chiffrée ignorée, clé requise (--key-file ou --passphrase): "
+                                    f"{backup['name']}")
+                results[backup['name']] = {'name': backup['name'], 'path': backup['path'], 'status': 'skipped',
+                                           'checked': 0, 'errors': []}
+                continue
+            results[backup['name']] = {'name': backup['name'], 'path': backup['path'], 'status': 'ok',
+                                       'checked': 0, 'errors': []}
+            pending.append(backup)
+        
+        self.logger.info(f"🔎 Vérification {'rapide' if quick else 'complète'} de {len(pending)} sauvegardes "
+                         f"({len(backups) - len(pending)} inchangées ignorées)")
+        split = workers if len(pending) < workers else 1
+        tasks = []
+        for backup in pending:
+            try:
+                tasks.extend((backup['name'], func, args) for func, args in
+                             self._plan_verification(backup, quick, split, encryption))
+            except (zipfile.BadZipFile, OSError, ValueError) as e:
+                results[backup['name']]['errors'].append(f"Répertoire central illisible: {e}")
+        
+        start_time = time.time()
+        read_bytes = 0
+        
+        def collect(name, get_result):
+            nonlocal read_bytes
+            try:
+                checked, size, errors = get_result()
+            except Exception as e:
+                checked, size, errors = 0, 0, [str(e)]
+            results[name]['checked'] += checked
+            results[name]['errors'].extend(errors)
+            read_bytes += size
+        
+        if workers <= 1:
+            for name, func, args in tasks:
+                collect(name, functools.partial(func, *args))
+        else:
+            futures = {}
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for name, func, args in tasks:
+                    if len(futures) >= workers * 2:
+                        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect(futures.pop(future), future.result)
+                    futures[pool.submit(func, *args)] = name
+                for future in as_completed(futures):
+                    collect(futures[future], future.result)
+        
+        corrupt = 0
+        for backup in pending:
+            result = results[backup['name']]
+            if result['errors']:
+                result['status'] = 'corrupt'
+                corrupt += 1
+                self.logger.error(f"❌ Sauvegarde corrompue: {backup['name']} ({len(result['errors'])} erreurs)")
+                for error in result['errors'][:VERIFY_MAX_ERRORS]:
+                    self.logger.error(f"   {error}")
+            try:
+                catalog.record_verification(backup['name'], mode, result['status'], result['checked'],
+                                            result['errors'][:VERIFY_MAX_ERRORS], *backup['stat'])
+            except sqlite3.Error as e:
+                self.logger.warning(f"Impossible d'enregistrer la vérification de '{backup['name']}': {e}")
+        
+        duration = time.time() - start_time
+        summary = (f"{len(pending) - corrupt} sauvegardes intègres, {corrupt} corrompues, "
+                   f"{self.format_size(read_bytes)} relus en {duration:.2f}s")
+        if corrupt:
+            self.logger.error(f"❌ Vérification terminée: {summary}")
+        else:
+            self.logger.info(f"✅ Vérification terminée: {summary}")
+        return [results[backup['name']] for backup in backups]
+
+
+def add_retention_arguments(parser):
+    """Ajoute les options de politique de conservation à un analyseur d'arguments"""
+    group = parser.add_argument_group('rétention')
+    group.add_argument('--keep-last', type=int, metavar='N', help='Conserver les N sauvegardes les plus récentes')
+    group.add_argument('--keep-daily', type=int, metavar='N', help='Conserver une sauvegarde par jour sur N jours')
+    group.add_argument('--keep-weekly', type=int, metavar='N',
+                       help='Conserver une sauvegarde par semaine sur N semaines')
+    group.add_argument('--keep-monthly', type=int, metavar='N', help='Conserver une sauvegarde par mois sur N mois')
+    group.add_argument('--max-total-size', type=parse_size, metavar='TAILLE',
+                       help='Taille totale maximale conservée, ex: 500G (les plus anciennes partent d\'abord)')
+
+
+def add_throttle_arguments(parser):
+    """Ajoute les options de limitation des E/S à un analyseur d'arguments"""
+    group = parser.add_argument_group('limitation des E/S')
+    group.add_argument('--max-read-rate', type=parse_size, metavar='TAILLE',
+                       help='Débit de lecture maximal par seconde, ex: 50M')
+    group.add_argument('--max-write-rate', type=parse_size, metavar='TAILLE',
+                       help='Débit d\'écriture de l\'archive maximal par seconde, ex: 20M')
+    group.add_argument('--max-iops', type=int, metavar='N',
+                       help='Nombre maximal d\'opérations d\'E/S par seconde (ouvertures et blocs lus)')
+    group.add_argument('--low-priority', action='store_true',
+                       help='Priorité CPU et E/S basse pour ne pas gêner les services en production')
+
+
+def throttle_from_args(args):
+    """Construit la limitation des E/S à partir des options (None si aucune n'est demandée)"""
+    if not (args.max_read_rate or args.max_write_rate or args.max_iops or args.low_priority):
+        return None
+    return IOThrottle(read_bps=args.max_read_rate, write_bps=args.max_write_rate, iops=args.max_iops,
+                      low_priority=args.low_priority)
+
+
+# Variable d'environnement lue par --passphrase (sinon la phrase de passe est demandée)
+PASSPHRASE_ENV = "BACKUP_PASSPHRASE"
+
+
+def add_encryption_arguments(parser, backup=False):
+    """Ajoute les options de chiffrement à un analyseur d'arguments (choix de l'algorithme pour une sauvegarde)"""
+    group = parser.add_argument_group('chiffrement')
+    group.add_argument('--key-file', metavar='FICHIER',
+                       help='Fichier de clé de 32 octets (créé par: backup.py keygen FICHIER)')
+    group.add_argument('--passphrase', action='store_true',
+                       help=f'Clé dérivée d\'une phrase de passe (variable {PASSPHRASE_ENV}, sinon demandée)')
+    if backup:
+        group.add_argument('--cipher', choices=['aes-256-gcm', 'chacha20-poly1305'], default='aes-256-gcm',
+                           help='Algorithme de chiffrement authentifié (défaut: aes-256-gcm)')
+
+
+def encryption_from_args(args):
+    """Construit la clé de chiffrement à partir des options (None si le chiffrement n'est pas demandé)"""
+    if not (args.key_file or args.passphrase):
+        return None
+    from backup_crypto import EncryptionKey
+    if args.key_file and args.passphrase:
+        raise ValueError("--key-file et --passphrase sont exclusifs")
+    options = {'algorithm': args.cipher} if getattr(args, 'cipher', None) else {}
+    if args.key_file:
+        return EncryptionKey.from_file(os.path.expanduser(args.key_file), **options)
+    passphrase = os.environ.get(PASSPHRASE_ENV)
+    if not passphrase:
+        import getpass
+        passphrase = getpass.getpass("🔑 Phrase de passe: ")
+    return EncryptionKey(passphrase=passphrase, **options)
+
+
+def retention_from_args(args):
+    """Construit la politique de conservation à partir des options de la ligne de commande"""
+    return RetentionPolicy(keep_last=args.keep_last, keep_daily=args.keep_daily,
+                           keep_weekly=args.keep_weekly, keep_monthly=args.keep_monthly,
+                           max_total_bytes=args.max_total_size)
+
+
+def prune_main(argv):
+    """Sous-commande 'prune': suppression des sauvegardes hors politique de conservation"""
+    parser = argparse.ArgumentParser(
+        prog="backup.py prune",
+        description="Supprime les sauvegardes ZIP non retenues par la politique de conservation",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python backup.py prune ~/Backups --keep-daily 7 --keep-weekly 4 --keep-monthly 12 --dry-run
+  python backup.py prune ~/Backups --keep-last 10 --max-total-size 200G
+        """
+    )
+    parser.add_argument('destination', help='Dossier (ou URL s3://bucket/préfixe) contenant les sauvegardes')
+    parser.add_argument('--dry-run', '-n', action='store_true', help='Afficher sans rien supprimer')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
+    add_retention_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    try:
+        policy = retention_from_args(args)
+    except ValueError as e:
+        print(f"❌ Erreur: politique de conservation invalide: {e}")
+        return 1
+    if not policy.is_active:
+        print("❌ Erreur: Spécifiez au moins une règle (--keep-last, --keep-daily, ..., --max-total-size)")
+        return 1
+    
+    backup_manager = BackupManager(logging.DEBUG if args.verbose else logging.INFO)
+    destination = os.path.expanduser(args.destination)
+    if not STORAGE_URL.match(destination) and not os.path.isdir(destination):
+        print(f"❌ Erreur: Le dossier '{args.destination}' n'existe pas")
+        return 1
+    removed = backup_manager.prune(destination, policy, dry_run=args.dry_run)
+    action = "seraient supprimées" if args.dry_run else "supprimées"
+    print(f"\n🧹 {len(removed)} sauvegardes {action}")
+    for backup in removed:
+        print(f"   🗑️  {backup['name']} ({backup['date'].strftime('%Y-%m-%d %H:%M:%S')}, "
+              f"{backup_manager.format_size(backup['size'])})")
+    return 0
+
+
+def restore_main(argv):
+    """Sous-commande 'restore': restauration complète ou sélective d'une sauvegarde"""
+    parser = argparse.ArgumentParser(
+        prog="backup.py restore",
+        description="Restaure une sauvegarde (archive ZIP ou instantané)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python backup.py restore ~/Backups/backup_2025-07-16_22-30-42.zip ~/Restauration
+  python backup.py restore backups/backup_2025-07-16_22-30-42.zip ./out --include 'docs/*' --workers 4
+  python backup.py restore ~/Backups/backup_2025-07-16_22-30-42.zip.enc ~/Restauration --key-file ~/.backup.key
+        """
+    )
+    parser.add_argument('archive', help='Archive ZIP (chemin ou URL s3://...), manifeste d\'instantané '
+                                        'ou index de volumes à restaurer')
+    parser.add_argument('target', help='Dossier de restauration')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help='Ne restaurer que les chemins correspondant au motif (répétable)')
+    parser.add_argument('--workers', '-j', type=int, default=1, metavar='N',
+                        help='Nombre de processus de décompression en parallèle (défaut: 1)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
+    add_encryption_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    try:
+        encryption = encryption_from_args(args)
+    except (OSError, ValueError) as e:
+        print(f"❌ Erreur: clé de chiffrement invalide: {e}")
+        return 1
+    backup_manager = BackupManager(logging.DEBUG if args.verbose else logging.INFO)
+    try:
+        count = backup_manager.restore(os.path.expanduser(args.archive), os.path.expanduser(args.target),
+                                       patterns=args.include, workers=args.workers, encryption=encryption)
+        print(f"\n🎉 Restauration réussie: {count} fichiers dans {args.target}")
+        return 0
+    except KeyboardInterrupt:
+        print("\n⏹️  Restauration annulée par l'utilisateur")
+        return 1
+    except Exception as e:
+        print(f"Erreur pendant la restauration : {e}")
+        return 1
+
+
+def find_main(argv):
+    """Sous-commande 'find': recherche d'un fichier dans toutes les sauvegardes"""
+    parser = argparse.ArgumentParser(
+        prog="backup.py find",
+        description="Liste les sauvegardes contenant un fichier, avec la taille et la date de chaque version",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python backup.py find ~/Backups docs/rapport.odt
+  python backup.py find ~/Backups '*.sql'
+        """
+    )
+    parser.add_argument('destination', help='Dossier contenant les sauvegardes')
+    parser.add_argument('pattern', help='Chemin dans la sauvegarde, motif glob ou dossier')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
+    args = parser.parse_args(argv)
+    
+    backup_manager = BackupManager(logging.DEBUG if args.verbose else logging.INFO)
+    try:
+        results = backup_manager.find(os.path.expanduser(args.destination), args.pattern)
+    except Exception as e:
+        print(f"Erreur pendant la recherche : {e}")
+        return 1
+    if not results:
+        print(f"🔍 Aucune sauvegarde ne contient '{args.pattern}'")
+        return 1
+    print(f"🔍 '{args.pattern}' trouvé dans {len(results)} sauvegardes:")
+    print("-" * 80)
+    for result in results:
+        print(f"📁 {result['name']} ({result['date'].strftime('%Y-%m-%d %H:%M:%S')})")
+        for match in result['matches']:
+            mtime = match['mtime'].strftime('%Y-%m-%d %H:%M:%S') if match['mtime'] else '-'
+            print(f"   📄 {match['path']}  {backup_manager.format_size(match['size'])}  modifié le {mtime}")
+    return 0
+
+
+def verify_main(argv):
+    """Sous-commande 'verify': contrôle d'intégrité des sauvegardes"""
+    parser = argparse.ArgumentParser(
+        prog="backup.py verify",
+        description="Vérifie l'intégrité des sauvegardes (CRC des archives, empreintes des instantanés)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python backup.py verify ~/Backups --workers 4
+  python backup.py verify ~/Backups backup_2025-07-16_22-30-42.zip --force
+  python backup.py verify ~/Backups --quick
+  python backup.py verify ~/Backups --key-file ~/.backup.key
+        """
+    )
+    parser.add_argument('destination', help='Dossier contenant les sauvegardes')
+    parser.add_argument('archives', nargs='*', help='Sauvegardes à vérifier (toutes par défaut)')
+    parser.add_argument('--quick', action='store_true',
+                        help='Vérification rapide: répertoire central, en-têtes et échantillon de membres')
+    parser.add_argument('--workers', '-j', type=int, default=1, metavar='N',
+                        help='Nombre de processus de vérification en parallèle (défaut: 1)')
+    parser.add_argument('--force', action='store_true',
+                        help='Revérifier aussi les sauvegardes inchangées depuis leur dernière vérification')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
+    add_encryption_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    try:
+        encryption = encryption_from_args(args)
+    except (OSError, ValueError) as e:
+        print(f"❌ Erreur: clé de chiffrement invalide: {e}")
+        return 1
+    backup_manager = BackupManager(logging.DEBUG if args.verbose else logging.INFO)
+    try:
+        results = backup_manager.verify(os.path.expanduser(args.destination), args.archives,
+                                        quick=args.quick, workers=args.workers, force=args.force,
+                                        encryption=encryption)
+    except KeyboardInterrupt:
+        print("\n⏹️  Vérification annulée par l'utilisateur")
+        return 1
+    except Exception as e:
+        print(f"Erreur pendant la vérification : {e}")
+        return 1
+    icons = {'ok': '✅', 'corrupt': '❌', 'skipped': '⏭️ '}
+    for result in results:
+        print(f"{icons[result['status']]} {result['name']} ({result['checked']} éléments vérifiés)")
+        for error in result['errors']:
+            print(f"   {error}")
+    return 1 if any(result['status'] == 'corrupt' for result in results) else 0
+
+
+def keygen_main(argv):
+    """Sous-commande 'keygen': création d'un fichier de clé de chiffrement"""
+    parser = argparse.ArgumentParser(
+        prog="backup.py keygen",
+        description="Crée un fichier de clé aléatoire pour les sauvegardes chiffrées (--key-file)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python backup.py keygen ~/.backup.key
+        """
+    )
+    parser.add_argument('key_file', help='Fichier de clé à créer (jamais écrasé, lisible du seul propriétaire)')
+    args = parser.parse_args(argv)
+    
+    from backup_crypto import generate_key_file
+    try:
+        generate_key_file(os.path.expanduser(args.key_file))
+    except OSError as e:
+        print(f"❌ Erreur: impossible de créer le fichier de clé: {e}")
+        return 1
+    print(f"🔑 Clé créée dans {args.key_file}: conservez-en une copie hors des sauvegardes, "
+          f"elles sont illisibles sans elle")
+    return 0
+
+
+# Sous-commandes reconnues en premier argument
+SUBCOMMANDS = {
+    'restore': restore_main,
+    'find': find_main,
+    'prune': prune_main,
+    'verify': verify_main,
+    'keygen': keygen_main,
+}
 
-def main():
+
+def main(argv=None):
     """Fonction principale avec interface en ligne de commande"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](list(argv[1:]))
+    
     parser = argparse.ArgumentParser(
         description="Script de Sauvegarde Automatique - Groupe 3",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -193,16 +4507,84 @@ Exemples d'utilisation:
   python backup.py ~/Documents ~/Backups
   python backup.py /var/www /home/user/backups --verbose
   python backup.py ./project ./backups --list
+  python backup.py ./project ./backups --list --since 2025-07-01 --until 2025-08-01
+  python backup.py /data /mnt/backups --workers 8
+  python backup.py /data /mnt/backups --incremental
+  python backup.py /data /mnt/backups --resume
+  python backup.py /data /mnt/backups --backend chunkstore
+  python backup.py /data /mnt/backups --codec deflate:9 --codec-rule .log=lzma --probe
+  python backup.py ./monorepo ./backups --exclude node_modules/ --exclude .git/ --exclude '*.tmp'
+  python backup.py ./monorepo ./backups --exclude-from .backupignore --exclude '*.log' --include important.log
+  python backup.py /data /mnt/backups --max-read-rate 50M --max-iops 500 --low-priority
+  python backup.py /data /mnt/disk1 --volume-size 4G --volume-dir /mnt/disk2 --volume-dir /mnt/disk3
+  python backup.py /data 's3://backups/server1?endpoint=http://minio:9000' --workers 4
+  python backup.py /data /mnt/backups --profile /tmp/backup_profile
+  python backup.py /data /mnt/backups --metrics-file /var/lib/node_exporter/textfile/backup.prom
+  python backup.py /data /mnt/backups --key-file ~/.backup.key --workers 4
+  python backup.py --jobs jobs.toml --max-concurrent 4
+  python backup.py restore ~/Backups/backup_2025-07-16_22-30-42.zip ~/Restauration
+  python backup.py find ~/Backups docs/rapport.odt
+  python backup.py /data /mnt/backups --keep-daily 7 --keep-weekly 4 --keep-monthly 12
+  python backup.py prune /mnt/backups --keep-last 10 --dry-run
         """
     )
     
     parser.add_argument('source', nargs='?', help='Dossier source à sauvegarder')
-    parser.add_argument('destination', nargs='?', help='Dossier de destination')
+    parser.add_argument('destination', nargs='?', help='Dossier de destination ou URL s3://bucket/préfixe')
     parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
     parser.add_argument('--list', '-l', action='store_true', help='Lister les sauvegardes existantes')
+    parser.add_argument('--since', type=datetime.datetime.fromisoformat, metavar='DATE',
+                        help='Avec --list: sauvegardes créées à partir de DATE (AAAA-MM-JJ[ HH:MM])')
+    parser.add_argument('--until', type=datetime.datetime.fromisoformat, metavar='DATE',
+                        help='Avec --list: sauvegardes créées avant DATE (exclue)')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='Sauvegarde incrémentale (seulement les fichiers modifiés)')
+    parser.add_argument('--hash', action='store_true',
+                        help='Comparer les empreintes SHA-256 en mode incrémental')
+    parser.add_argument('--backend', choices=['zip', 'chunkstore'], default='zip',
+                        help='Stockage: archive ZIP ou dépôt de blocs dédupliqués (défaut: zip)')
+    parser.add_argument('--workers', '-j', type=int, default=1, metavar='N',
+                        help='Nombre de processus de compression en parallèle (défaut: 1)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Reprendre une sauvegarde interrompue de la même source à son dernier point de reprise')
+    parser.add_argument('--stream', action='store_true',
+                        help='Parcours en flux pour les très grandes arborescences (mémoire constante, sans ETA)')
+    parser.add_argument('--progress', '-p', action='store_true',
+                        help='Afficher une ligne de progression (fichiers, débit, temps restant)')
+    parser.add_argument('--codec', default='deflate', metavar='CODEC',
+                        help='Codec par défaut: stored, deflate[:1-9], bzip2[:1-9], lzma (défaut: deflate)')
+    parser.add_argument('--codec-rule', action='append', default=[], metavar='EXT=CODEC',
+                        help='Codec pour une extension, ex: .log=lzma (répétable)')
+    parser.add_argument('--size-rule', action='append', default=[], metavar='TAILLE=CODEC',
+                        help='Codec pour les fichiers d\'au moins TAILLE, ex: 1G=deflate:1 (répétable)')
+    parser.add_argument('--probe', action='store_true',
+                        help='Stocker sans compression les fichiers dont le premier bloc est incompressible')
+    parser.add_argument('--recompress-media', action='store_true',
+                        help='Compresser aussi les formats déjà compressés (jpg, mp4, zip...)')
+    parser.add_argument('--exclude', action='append', dest='filter_rules', default=[], metavar='GLOB',
+                        help='Exclure les chemins correspondant au motif gitignore, ex: node_modules/ (répétable)')
+    parser.add_argument('--include', action='append', dest='filter_rules', type=lambda rule: '!' + rule,
+                        metavar='GLOB', help='Réinclure les chemins exclus par une règle précédente (répétable)')
+    parser.add_argument('--exclude-from', action='append', default=[], metavar='FICHIER',
+                        help='Lire des règles d\'exclusion au format .gitignore (appliquées avant --exclude/--include)')
+    parser.add_argument('--volume-size', type=parse_size, metavar='TAILLE',
+                        help='Découper la sauvegarde en volumes ZIP d\'au plus TAILLE, ex: 4G')
+    parser.add_argument('--volume-dir', action='append', default=[], metavar='DOSSIER',
+                        help='Destination supplémentaire des volumes, écrits en parallèle à tour de rôle (répétable)')
+    parser.add_argument('--profile', metavar='PREFIXE',
+                        help='Profiler la sauvegarde: PREFIXE.pstats (cProfile) et PREFIXE.json (temps par phase)')
+    parser.add_argument('--metrics-file', metavar='FICHIER',
+                        help='Écrire les métriques de la sauvegarde au format textfile Prometheus (.prom)')
+    parser.add_argument('--jobs', metavar='FICHIER',
+                        help='Exécuter les tâches d\'un fichier JSON/TOML/YAML avec l\'ordonnanceur')
+    parser.add_argument('--max-concurrent', type=int, metavar='N',
+                        help='Nombre maximal de tâches simultanées en mode --jobs')
+    add_retention_arguments(parser)
+    add_throttle_arguments(parser)
+    add_encryption_arguments(parser, backup=True)
     parser.add_argument('--version', action='version', version='%(prog)s 1.0')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Configuration du niveau de log
     log_level = logging.DEBUG if args.verbose else logging.INFO
@@ -215,7 +4597,7 @@ Exemples d'utilisation:
                 print("❌ Erreur: Spécifiez le dossier de destination pour lister les sauvegardes")
                 return 1
             
-            backups = backup_manager.list_backups(args.destination)
+            backups = backup_manager.list_backups(args.destination, since=args.since, until=args.until)
             if not backups:
                 print(f"📂 Aucune sauvegarde trouvée dans '{args.destination}'")
                 return 0
@@ -225,10 +4607,38 @@ Exemples d'utilisation:
             for backup in backups:
                 print(f"📁 {backup['name']}")
                 print(f"   📅 Date: {backup['date'].strftime('%Y-%m-%d %H:%M:%S')}")
-                print(f"   📊 Taille: {backup_manager.format_size(backup['size'])}")
+                if backup['file_count'] is None:
+                    print(f"   📊 Taille: {backup_manager.format_size(backup['size'])}")
+                else:
+                    print(f"   📊 Taille: {backup_manager.format_size(backup['size'])} "
+                          f"({backup['file_count']} fichiers, "
+                          f"{backup_manager.format_size(backup['original_size'])} avant compression)")
+                if backup['type'] == 'incremental':
+                    print(f"   🔗 Incrémentale, dépend de: {backup['base']}")
+                elif backup['type'] == 'snapshot':
+                    print(f"   🧩 Instantané du dépôt dédupliqué")
+                elif backup['type'] == 'volumes':
+                    print(f"   🧱 Découpée en {len(backup['volumes'])} volumes:")
+                    for path in backup['volumes']:
+                        print(f"      - {path}")
+                else:
+                    print(f"   📦 Complète")
+                if backup.get('encrypted'):
+                    print(f"   🔐 Chiffrée")
                 print()
             return 0
         
+        # Mode fichier de tâches
+        if args.jobs:
+            from backup_scheduler import BackupScheduler, load_job_file
+            jobs, options = load_job_file(args.jobs)
+            if args.max_concurrent:
+                options['max_concurrent'] = args.max_concurrent
+            scheduler = BackupScheduler(backup_manager, **options)
+            results = scheduler.run(jobs)
+            scheduler.log_summary(results)
+            return 0 if all(result['status'] == 'ok' for result in results) else 1
+        
         # Mode sauvegarde
         if not args.source or not args.destination:
             print("❌ Erreur: Spécifiez le dossier source et destination")
@@ -236,12 +4646,83 @@ Exemples d'utilisation:
             print("Aide: python backup.py --help")
             return 1
         
+        # Politique de compression par type de fichier
+        try:
+            policy = CompressionPolicy(
+                default=args.codec,
+                extension_rules=dict(rule.split('=', 1) for rule in args.codec_rule),
+                size_rules={parse_size(size): codec
+                            for size, codec in (rule.split('=', 1) for rule in args.size_rule)},
+                probe=args.probe,
+                store_compressed=not args.recompress_media,
+            )
+        except ValueError as e:
+            print(f"❌ Erreur: règle de compression invalide: {e}")
+            return 1
+        try:
+            retention = retention_from_args(args)
+        except ValueError as e:
+            print(f"❌ Erreur: politique de conservation invalide: {e}")
+            return 1
+        try:
+            rules = [rule for path in args.exclude_from for rule in FileFilter.read_rules(os.path.expanduser(path))]
+            file_filter = FileFilter(rules + args.filter_rules)
+        except (OSError, ValueError) as e:
+            print(f"❌ Erreur: règles d'exclusion invalides: {e}")
+            return 1
+        try:
+            throttle = throttle_from_args(args)
+        except ValueError as e:
+            print(f"❌ Erreur: limite d'E/S invalide: {e}")
+            return 1
+        try:
+            encryption = encryption_from_args(args)
+        except (OSError, ValueError) as e:
+            print(f"❌ Erreur: clé de chiffrement invalide: {e}")
+            return 1
+        
         # Expansion des chemins
         source_path = os.path.expanduser(args.source)
         dest_path = os.path.expanduser(args.destination)
         
-        # Exécution de la sauvegarde
-        backup_path = backup_manager.backup_and_compress(source_path, dest_path)
+        # Exécution de la sauvegarde, avec temps par phase (et profil cProfile si demandé)
+        phases = PhaseTimer()
+        profiler = None
+        if args.profile:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        succeeded = False
+        try:
+            backup_path = backup_manager.backup_and_compress(source_path, dest_path, workers=args.workers,
+                                                             incremental=args.incremental,
+                                                             hash_files=args.hash,
+                                                             backend=args.backend,
+                                                             compression_policy=policy,
+                                                             retention=retention,
+                                                             streaming=args.stream,
+                                                             resume=args.resume,
+                                                             file_filter=file_filter,
+                                                             throttle=throttle,
+                                                             phases=phases,
+                                                             volume_size=args.volume_size,
+                                                             volume_dirs=[os.path.expanduser(path)
+                                                                          for path in args.volume_dir],
+                                                             encryption=encryption,
+                                                             progress_callback=(backup_manager.print_progress
+                                                                                if args.progress else None))
+            succeeded = True
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                stats_path, json_path = write_profile(os.path.expanduser(args.profile), profiler, phases)
+                print(f"🔬 Profil écrit dans {stats_path} et {json_path}")
+            if args.metrics_file:
+                write_prometheus_metrics(os.path.expanduser(args.metrics_file), phases,
+                                         {'source': os.path.abspath(source_path),
+                                          'destination': (dest_path if STORAGE_URL.match(dest_path)
+                                                          else os.path.abspath(dest_path))}, succeeded)
+        
         print(f"\n🎉 Sauvegarde réussie: {backup_path}")
         return 0
         
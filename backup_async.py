@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+API asyncio des sauvegardes - Groupe 3
+
+Permet d'intégrer les sauvegardes dans un service asyncio sans bloquer la
+boucle d'événements: le parcours, les lectures et l'écriture de l'archive
+tournent dans un exécuteur (la compression pouvant en plus être répartie sur
+un pool de processus avec workers > 1), la progression est livrée sous forme
+d'itérateur asynchrone et l'annulation est coopérative.
+
+Exemple:
+    manager = AsyncBackupManager()
+    operation = manager.start_backup("/data", "/mnt/backups", workers=4)
+    async for progress in operation.progress():
+        print(f"{progress['percent']:.1f}%")
+    path = await operation
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+
+from backup import BackupManager, BackupCancelled
+
+# Marque de fin du flux de progression
+_DONE = object()
+
+
+class AsyncOperation:
+    """
+    Opération bloquante exécutée dans un exécuteur et pilotée depuis asyncio
+
+    L'objet est attendable (`await operation` renvoie le résultat). Annuler la
+    tâche (cancel() ou annulation de la tâche qui l'attend) positionne le
+    cancel_event de l'opération puis attend qu'elle se soit arrêtée proprement
+    avant de propager asyncio.CancelledError.
+
+    Une opération déjà sur le point de finir peut se terminer avec succès
+    malgré l'annulation: CancelledError est tout de même levée, et le résultat
+    (chemin de la sauvegarde créée...) reste disponible dans completed_result.
+    """
+
+    def __init__(self, func, executor=None, with_progress=False, logger=None, **kwargs):
+        self._loop = asyncio.get_running_loop()
+        self._logger = logger or logging.getLogger("backup")
+        self._queue = asyncio.Queue()
+        self.cancel_event = threading.Event()
+        self.completed_result = None
+        if with_progress:
+            kwargs['progress_callback'] = self._on_progress
+        call = functools.partial(func, cancel_event=self.cancel_event, **kwargs)
+        self._task = self._loop.create_task(self._run(call, executor))
+
+    def _on_progress(self, progress):
+        """Callback appelé dans le thread de travail: transmet une copie à la boucle"""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, progress.snapshot())
+
+    async def _run(self, call, executor):
+        """Exécute l'opération et garantit son arrêt effectif en cas d'annulation"""
+        future = self._loop.run_in_executor(executor, call)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.cancel_event.set()
+            try:
+                self.completed_result = await future
+            except BackupCancelled:
+                pass
+            else:
+                self._logger.warning(f"Opération terminée avant son annulation, résultat conservé: "
+                                     f"{self.completed_result}")
+            raise
+        finally:
+            self._queue.put_nowait(_DONE)
+
+    async def progress(self):
+        """
+        Itérateur asynchrone des états d'avancement (dictionnaires de BackupProgress.snapshot)
+
+        Se termine avec l'opération; un seul consommateur est prévu.
+        """
+        while True:
+            item = await self._queue.get()
+            if item is _DONE:
+                return
+            yield item
+
+    def cancel(self):
+        """Demande l'annulation de l'opération"""
+        self._task.cancel()
+
+    def done(self):
+        """Indique si l'opération est terminée"""
+        return self._task.done()
+
+    def __await__(self):
+        return self._task.__await__()
+
+
+class AsyncBackupManager:
+    """
+    Version asyncio de BackupManager
+
+    Args:
+        backup_manager (BackupManager): Gestionnaire synchrone utilisé (créé si absent)
+        executor (concurrent.futures.Executor): Exécuteur des opérations bloquantes
+                                                (exécuteur par défaut de la boucle si absent)
+        log_level: Niveau de log du gestionnaire créé
+    """
+
+    def __init__(self, backup_manager=None, executor=None, log_level=logging.INFO):
+        self.backup_manager = backup_manager or BackupManager(log_level)
+        self.executor = executor
+
+    def start_backup(self, source_dir, backup_dir, **options):
+        """
+        Lance une sauvegarde en arrière-plan (à appeler depuis la boucle d'événements)
+
+        Args:
+            source_dir (str): Chemin du dossier source
+            backup_dir (str): Chemin du dossier de destination
+            **options: Options de BackupManager.backup_and_compress
+
+        Returns:
+            AsyncOperation: Opération attendable, avec progress() et cancel()
+        """
+        return AsyncOperation(self.backup_manager.backup_and_compress, self.executor, with_progress=True,
+                              logger=self.backup_manager.logger,
+                              source_dir=source_dir, backup_dir=backup_dir, **options)
+
+    async def backup(self, source_dir, backup_dir, **options):
+        """
+        Sauvegarde un dossier sans bloquer la boucle d'événements
+
+        Returns:
+            str: Chemin de la sauvegarde créée
+        """
+        return await self.start_backup(source_dir, backup_dir, **options)
+
+    def start_restore(self, archive_path, target_dir, **options):
+        """Lance une restauration en arrière-plan (options de BackupManager.restore)"""
+        return AsyncOperation(self.backup_manager.restore, self.executor, logger=self.backup_manager.logger,
+                              archive_path=archive_path, target_dir=target_dir, **options)
+
+    async def restore(self, archive_path, target_dir, **options):
+        """
+        Restaure une sauvegarde sans bloquer la boucle d'événements
+
+        Returns:
+            int: Nombre de fichiers restaurés
+        """
+        return await self.start_restore(archive_path, target_dir, **options)
+
+    async def list_backups(self, backup_dir, since=None, until=None):
+        """Liste les sauvegardes (catalogue lu dans l'exécuteur)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(self.backup_manager.list_backups, backup_dir,
+                                             since=since, until=until))
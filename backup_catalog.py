@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Catalogue des sauvegardes - Groupe 3
+
+Base SQLite conservée dans le dossier de destination, qui enregistre pour
+chaque sauvegarde sa date de création réelle, ses statistiques et l'index de
+ses membres. Les listes, filtres par date et recherches de chemin n'ont ainsi
+plus besoin de stat ni d'ouvrir les archives.
+
+Une cible distante (S3...) n'accueille pas de base SQLite: StorageCatalog y
+conserve les statistiques des sauvegardes dans un objet JSON.
+"""
+
+import os
+import json
+import sqlite3
+import datetime
+import urllib.parse
+
+# Nom du fichier de catalogue dans le dossier de destination
+CATALOG_FILENAME = ".backup_catalog.db"
+CATALOG_VERSION = 2
+
+# Attente maximale (secondes) si une autre sauvegarde écrit dans le catalogue
+CATALOG_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    created TEXT NOT NULL,
+    source TEXT,
+    base TEXT,
+    parent TEXT,
+    file_count INTEGER NOT NULL,
+    original_size INTEGER NOT NULL,
+    compressed_size INTEGER NOT NULL,
+    duration REAL,
+    archive_mtime_ns INTEGER,
+    archive_size INTEGER
+);
+CREATE INDEX IF NOT EXISTS backups_created ON backups (created);
+CREATE TABLE IF NOT EXISTS members (
+    backup_id INTEGER NOT NULL REFERENCES backups (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS members_path ON members (path);
+CREATE INDEX IF NOT EXISTS members_backup ON members (backup_id);
+CREATE TABLE IF NOT EXISTS verifications (
+    backup_id INTEGER PRIMARY KEY REFERENCES backups (id) ON DELETE CASCADE,
+    verified TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    checked INTEGER NOT NULL,
+    errors TEXT,
+    archive_mtime_ns INTEGER,
+    archive_size INTEGER
+);
+"""
+
+# Colonnes renvoyées pour une sauvegarde
+_BACKUP_COLUMNS = ('name', 'type', 'created', 'source', 'base', 'parent', 'file_count',
+                   'original_size', 'compressed_size', 'duration', 'archive_mtime_ns', 'archive_size')
+
+
+def _row_to_backup(row):
+    """Convertit une ligne de la table backups en dictionnaire"""
+    backup = dict(zip(_BACKUP_COLUMNS, row))
+    backup['created'] = datetime.datetime.fromisoformat(backup['created'])
+    return backup
+
+
+class BackupCatalog:
+    """
+    Catalogue SQLite des sauvegardes d'un dossier de destination
+
+    Chaque opération ouvre sa propre connexion: le catalogue peut être utilisé
+    depuis plusieurs threads (ordonnanceur) ou processus, SQLite sérialisant
+    les écritures. Chaque enregistrement est une transaction unique.
+
+    En lecture seule, la base n'est ni créée ni migrée: un catalogue absent
+    ou d'une autre version lève sqlite3.OperationalError.
+    """
+
+    def __init__(self, backup_dir, read_only=False):
+        self.backup_dir = backup_dir
+        self.path = os.path.join(backup_dir, CATALOG_FILENAME)
+        self.read_only = read_only
+
+    def _connect(self):
+        """Ouvre une connexion et crée le schéma au besoin"""
+        if self.read_only:
+            uri = f"file:{urllib.parse.quote(os.path.abspath(self.path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=CATALOG_TIMEOUT)
+        else:
+            conn = sqlite3.connect(self.path, timeout=CATALOG_TIMEOUT)
+        conn.execute("PRAGMA foreign_keys = ON")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CATALOG_VERSION and self.read_only:
+            conn.close()
+            raise sqlite3.OperationalError(f"Version de catalogue {version} à migrer")
+        if version != CATALOG_VERSION:
+            with conn:
+                if version > CATALOG_VERSION:
+                    # Schéma inconnu: le catalogue est reconstruit à partir des archives
+                    conn.executescript("DROP TABLE IF EXISTS verifications; DROP TABLE IF EXISTS members; "
+                                       "DROP TABLE IF EXISTS backups;")
+                # Les tables ajoutées depuis une version antérieure sont créées
+                conn.executescript(_SCHEMA)
+                conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        return conn
+
+    def record_backup(self, name, backup_type, created, file_count, original_size, compressed_size,
+                      duration=None, source=None, base=None, parent=None, members=(),
+                      archive_mtime_ns=None, archive_size=None):
+        """
+        Enregistre (ou remplace) une sauvegarde et l'index de ses membres
+
+        Args:
+            name (str): Nom du fichier de sauvegarde dans la destination
+            backup_type (str): 'full', 'incremental' ou 'snapshot'
+            created (datetime): Date de création réelle de la sauvegarde
+            members (iterable): Tuples (chemin, taille, mtime_ns) des fichiers sauvegardés
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM backups WHERE name = ?", (name,))
+                cursor = conn.execute(
+                    "INSERT INTO backups (name, type, created, source, base, parent, file_count, "
+                    "original_size, compressed_size, duration, archive_mtime_ns, archive_size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (name, backup_type, created.isoformat(), source, base, parent, file_count,
+                     original_size, compressed_size, duration, archive_mtime_ns, archive_size))
+                backup_id = cursor.lastrowid
+                conn.executemany("INSERT INTO members (backup_id, path, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                                 ((backup_id, path, size, mtime_ns) for path, size, mtime_ns in members))
+        finally:
+            conn.close()
+
+    def remove_backups(self, names):
+        """Supprime du catalogue les sauvegardes données (et leurs membres)"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("DELETE FROM backups WHERE name = ?", ((name,) for name in names))
+        finally:
+            conn.close()
+
+    def archive_stats(self):
+        """
+        État connu des fichiers de sauvegarde, pour détecter les archives remplacées
+
+        Returns:
+            dict: {nom: (mtime_ns, taille)} (None pour les instantanés)
+        """
+        conn = self._connect()
+        try:
+            return {name: (mtime_ns, size) for name, mtime_ns, size in
+                    conn.execute("SELECT name, archive_mtime_ns, archive_size FROM backups")}
+        finally:
+            conn.close()
+
+    def list_backups(self, since=None, until=None):
+        """
+        Liste les sauvegardes, les plus récentes en premier
+
+        Args:
+            since (datetime): Date de création minimale incluse
+            until (datetime): Date de création maximale exclue
+
+        Returns:
+            list: Dictionnaires décrivant chaque sauvegarde
+        """
+        query = f"SELECT {', '.join(_BACKUP_COLUMNS)} FROM backups"
+        clauses = []
+        params = []
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            clauses.append("created < ?")
+            params.append(until.isoformat())
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created DESC"
+        conn = self._connect()
+        try:
+            return [_row_to_backup(row) for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    def find_path(self, pattern):
+        """
+        Trouve les sauvegardes contenant un chemin
+
+        Args:
+            pattern (str): Chemin exact, motif glob ou dossier (tout son contenu correspond)
+
+        Returns:
+            list: Dictionnaires {backup, created, path, size, mtime_ns}, du plus récent au plus ancien
+        """
+        prefix = pattern.rstrip('/') + '/'
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT b.name, b.created, m.path, m.size, m.mtime_ns FROM members m "
+                "JOIN backups b ON b.id = m.backup_id "
+                "WHERE m.path GLOB ? OR substr(m.path, 1, ?) = ? "
+                "ORDER BY b.created DESC, b.name, m.path", (pattern, len(prefix), prefix))
+            return [{'backup': name, 'created': datetime.datetime.fromisoformat(created),
+                     'path': member, 'size': size, 'mtime_ns': mtime_ns}
+                    for name, created, member, size, mtime_ns in rows]
+        finally:
+            conn.close()
+
+    def record_verification(self, name, mode, status, checked, errors, archive_mtime_ns, archive_size):
+        """
+        Enregistre le résultat de la vérification d'une sauvegarde
+
+        Le résultat est supprimé avec la sauvegarde si celle-ci est réindexée.
+
+        Args:
+            mode (str): 'full' ou 'quick'
+            status (str): 'ok' ou 'corrupt'
+            errors (list): Messages d'erreur (tronqués aux premiers)
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO verifications (backup_id, verified, mode, status, checked, errors, "
+                    "archive_mtime_ns, archive_size) SELECT id, ?, ?, ?, ?, ?, ?, ? FROM backups WHERE name = ?",
+                    (datetime.datetime.now().isoformat(), mode, status, checked, json.dumps(errors[:20]),
+                     archive_mtime_ns, archive_size, name))
+        finally:
+            conn.close()
+
+    def verifications(self):
+        """
+        Derniers résultats de vérification
+
+        Returns:
+            dict: {nom: {verified, mode, status, checked, errors, archive_mtime_ns, archive_size}}
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT b.name, v.verified, v.mode, v.status, v.checked, v.errors, v.archive_mtime_ns, "
+                "v.archive_size FROM verifications v JOIN backups b ON b.id = v.backup_id")
+            return {name: {'verified': datetime.datetime.fromisoformat(verified), 'mode': mode, 'status': status,
+                           'checked': checked, 'errors': json.loads(errors or '[]'),
+                           'archive_mtime_ns': mtime_ns, 'archive_size': size}
+                    for name, verified, mode, status, checked, errors, mtime_ns, size in rows}
+        finally:
+            conn.close()
+
+
+# Nom de l'objet de catalogue d'une cible de stockage distante
+STORAGE_CATALOG_NAME = ".backup_catalog.json"
+
+
+class StorageCatalog:
+    """
+    Catalogue d'une cible de stockage distante (S3...), sans base SQLite
+
+    Un objet JSON à côté des archives conserve les statistiques de chaque
+    sauvegarde; il est relu et réécrit à chaque modification. La liste des
+    objets de la cible fait foi: une archive absente du catalogue (écrite
+    par une sauvegarde concurrente) est quand même listée.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def load(self):
+        """
+        Lit le catalogue
+
+        Returns:
+            dict: {nom: {type, created, source, file_count, original_size, compressed_size, duration}}
+        """
+        try:
+            data = json.loads(self.storage.get_bytes(STORAGE_CATALOG_NAME))
+        except FileNotFoundError:
+            return {}
+        if data.get('version', 0) > CATALOG_VERSION:
+            return {}
+        return data.get('backups', {})
+
+    def _save(self, backups):
+        data = {'version': CATALOG_VERSION, 'backups': backups}
+        self.storage.put(STORAGE_CATALOG_NAME, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+    def record_backup(self, name, backup_type, created, file_count, original_size, compressed_size,
+                      duration=None, source=None):
+        """Enregistre (ou remplace) une sauvegarde"""
+        backups = self.load()
+        backups[name] = {'type': backup_type, 'created': created.isoformat(), 'source': source,
+                         'file_count': file_count, 'original_size': original_size,
+                         'compressed_size': compressed_size, 'duration': duration}
+        self._save(backups)
+
+    def remove_backups(self, names):
+        """Retire des sauvegardes du catalogue"""
+        backups = self.load()
+        if any(backups.pop(name, None) is not None for name in list(names)):
+            self._save(backups)
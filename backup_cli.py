@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Point d'entrée léger de la ligne de commande - Groupe 3
+
+Mêmes commandes que `python backup.py`, mais backup est importé comme un
+module: son bytecode est mis en cache (__pycache__) au lieu d'être recompilé
+à chaque lancement, ce qui compte pour les tâches cron et les listes fréquentes.
+Aucune interface graphique n'est chargée.
+
+Exemples:
+  python backup_cli.py ./project ./backups
+  python backup_cli.py ./project ./backups --list
+  python backup_cli.py verify ./backups --quick
+"""
+
+import sys
+
+from backup import main
+
+if __name__ == "__main__":
+    sys.exit(main())
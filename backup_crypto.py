@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Chiffrement des sauvegardes au repos - Groupe 3
+
+L'archive ZIP est chiffrée en flux, au fil de son écriture, par un
+chiffrement authentifié (AES-256-GCM par défaut, ou ChaCha20-Poly1305)
+appliqué à des blocs de taille fixe. Chaque bloc est authentifié séparément:
+la restauration et la vérification déchiffrent à la demande les seuls blocs
+qu'elles lisent, sans copie en clair de l'archive.
+
+Format d'une archive chiffrée (backup_....zip.enc):
+    en-tête (HEADER_SIZE octets), authentifié avec chaque bloc:
+        "BKENC" | version | algorithme | dérivation (fichier de clé ou scrypt)
+        | log2(taille de bloc) | log2(N), r, p de scrypt | sel (16 octets)
+    blocs: données chiffrées suivies de leur étiquette (16 octets); tous
+        font chunk_size octets en clair sauf le dernier, plus court (vide
+        si la taille de l'archive est un multiple de chunk_size)
+
+La clé de chaque archive est dérivée par HKDF-SHA256 du sel de son en-tête
+et de la clé maître: contenu d'un fichier de clé (32 octets, bruts ou en
+hexadécimal) ou phrase de passe étirée par scrypt. Le nonce d'un bloc est son
+numéro, avec un drapeau pour le dernier: un bloc déplacé, remplacé ou
+supprimé et une archive tronquée sont détectés.
+
+Les AEAD viennent de la bibliothèque cryptography (pip install cryptography).
+
+Exemple:
+    key = EncryptionKey.from_file("~/.backup.key")
+    with open("archive.zip.enc", "wb") as f:
+        writer = EncryptingWriter(f, key)
+        writer.write(data)
+        writer.close()
+    with DecryptingReader(open("archive.zip.enc", "rb"), key) as reader:
+        data = reader.read()
+"""
+
+import os
+import io
+import hmac
+import struct
+import hashlib
+from collections import namedtuple
+
+MAGIC = b"BKENC"
+FORMAT_VERSION = 1
+
+# Algorithmes AEAD et leur identifiant dans l'en-tête
+ALGORITHMS = {'aes-256-gcm': 1, 'chacha20-poly1305': 2}
+DEFAULT_ALGORITHM = 'aes-256-gcm'
+
+# Dérivation de la clé maître
+KDF_KEY_FILE = 0
+KDF_SCRYPT = 1
+
+# Paramètres scrypt des nouvelles archives (32 Mio de mémoire) et bornes acceptées à la lecture
+SCRYPT_LOG_N = 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_MAX_LOG_N = 22
+
+KEY_SIZE = 32
+SALT_SIZE = 16
+TAG_SIZE = 16
+
+# Taille en clair des blocs chiffrés (puissance de 2)
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MIN_CHUNK_SIZE = 4 * 1024
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+
+_HEADER = struct.Struct('>5sBBBBBBB16s')
+HEADER_SIZE = _HEADER.size
+
+# Contenu de l'en-tête d'une archive chiffrée
+ArchiveHeader = namedtuple('ArchiveHeader', ['algorithm', 'kdf', 'chunk_size', 'scrypt_log_n', 'scrypt_r',
+                                             'scrypt_p', 'salt'])
+
+
+class DecryptionError(ValueError):
+    """Archive chiffrée illisible: clé incorrecte, données altérées ou tronquées"""
+
+
+def _aead_class(algorithm):
+    """Classe AEAD de cryptography pour un algorithme (RuntimeError si la bibliothèque manque)"""
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+    except ImportError:
+        raise RuntimeError("Le chiffrement nécessite cryptography (pip install cryptography)") from None
+    return AESGCM if algorithm == 'aes-256-gcm' else ChaCha20Poly1305
+
+
+def check_available(algorithm=DEFAULT_ALGORITHM):
+    """Vérifie que le chiffrement est utilisable, avant de commencer une sauvegarde"""
+    _aead_class(algorithm)
+
+
+def _hkdf(key, salt, info):
+    """HKDF-SHA256 (RFC 5869) d'une clé de KEY_SIZE octets"""
+    prk = hmac.new(salt, key, hashlib.sha256).digest()
+    return hmac.new(prk, info + b'\x01', hashlib.sha256).digest()[:KEY_SIZE]
+
+
+def _nonce(index, last):
+    """Nonce de 12 octets d'un bloc: numéro du bloc et drapeau du dernier bloc"""
+    return struct.pack('>QI', index, 1 if last else 0)
+
+
+def read_header(header):
+    """
+    Décode l'en-tête d'une archive chiffrée
+
+    Returns:
+        ArchiveHeader: Paramètres de l'archive
+    """
+    if len(header) != HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+        raise DecryptionError("Ce fichier n'est pas une archive chiffrée")
+    magic, version, algorithm_id, kdf, chunk_log, log_n, r, p, salt = _HEADER.unpack(header)
+    if version != FORMAT_VERSION:
+        raise DecryptionError(f"Version de chiffrement non supportée: {version}")
+    algorithms = {value: name for name, value in ALGORITHMS.items()}
+    if algorithm_id not in algorithms or kdf not in (KDF_KEY_FILE, KDF_SCRYPT):
+        raise DecryptionError("En-tête de chiffrement invalide")
+    chunk_size = 1 << chunk_log
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise DecryptionError(f"Taille de bloc chiffré invalide: {chunk_size}")
+    if kdf == KDF_SCRYPT and not (10 <= log_n <= SCRYPT_MAX_LOG_N and 1 <= r <= 32 and 1 <= p <= 16):
+        raise DecryptionError("Paramètres scrypt invalides")
+    return ArchiveHeader(algorithms[algorithm_id], kdf, chunk_size, log_n, r, p, salt)
+
+
+class EncryptionKey:
+    """
+    Clé maître des sauvegardes chiffrées
+
+    Les clés des archives en sont dérivées avec le sel de chaque en-tête.
+    Une phrase de passe est étirée par scrypt une fois par sel; le résultat
+    est conservé (et transmis avec la clé aux processus de restauration).
+
+    Args:
+        key (bytes): Clé de 32 octets (contenu d'un fichier de clé)
+        passphrase (str): Phrase de passe, à la place de key
+        algorithm (str): AEAD des nouvelles archives ('aes-256-gcm' ou 'chacha20-poly1305')
+        chunk_size (int): Taille en clair des blocs des nouvelles archives (puissance de 2)
+    """
+
+    def __init__(self, key=None, passphrase=None, algorithm=DEFAULT_ALGORITHM, chunk_size=DEFAULT_CHUNK_SIZE):
+        if (key is None) == (passphrase is None):
+            raise ValueError("Fournissez une clé ou une phrase de passe (et une seule)")
+        if key is not None and len(key) != KEY_SIZE:
+            raise ValueError(f"La clé de chiffrement doit faire {KEY_SIZE} octets")
+        if passphrase is not None and not passphrase:
+            raise ValueError("Phrase de passe vide")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Algorithme de chiffrement inconnu: '{algorithm}' ({', '.join(ALGORITHMS)})")
+        if chunk_size & (chunk_size - 1) or not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"Taille de bloc chiffré invalide: {chunk_size} (puissance de 2 entre "
+                             f"{MIN_CHUNK_SIZE} et {MAX_CHUNK_SIZE})")
+        self._key = bytes(key) if key is not None else None
+        self._passphrase = passphrase.encode('utf-8') if isinstance(passphrase, str) else passphrase
+        self.algorithm = algorithm
+        self.chunk_size = chunk_size
+        self._masters = {}
+
+    @classmethod
+    def from_file(cls, path, **options):
+        """
+        Charge un fichier de clé: 32 octets bruts ou 64 caractères hexadécimaux
+
+        Args:
+            path (str): Fichier de clé (voir generate_key_file)
+            **options: algorithm, chunk_size
+        """
+        with open(os.path.expanduser(path), 'rb') as f:
+            data = f.read(4096)
+        text = data.strip()
+        if len(text) == 2 * KEY_SIZE:
+            try:
+                return cls(key=bytes.fromhex(text.decode('ascii')), **options)
+            except (UnicodeDecodeError, ValueError):
+                pass
+        if len(data) == KEY_SIZE:
+            return cls(key=data, **options)
+        raise ValueError(f"Fichier de clé invalide '{path}' ({KEY_SIZE} octets ou "
+                         f"{2 * KEY_SIZE} caractères hexadécimaux attendus)")
+
+    def __repr__(self):
+        source = 'fichier de clé' if self._key is not None else 'phrase de passe'
+        return f"EncryptionKey({source}, {self.algorithm})"
+
+    def new_header(self):
+        """En-tête d'une nouvelle archive, avec un sel aléatoire"""
+        kdf = KDF_KEY_FILE if self._key is not None else KDF_SCRYPT
+        return _HEADER.pack(MAGIC, FORMAT_VERSION, ALGORITHMS[self.algorithm], kdf,
+                            self.chunk_size.bit_length() - 1, SCRYPT_LOG_N, SCRYPT_R, SCRYPT_P,
+                            os.urandom(SALT_SIZE))
+
+    def _master_key(self, params):
+        """Clé maître correspondant à la dérivation de l'en-tête"""
+        if params.kdf == KDF_KEY_FILE:
+            if self._key is None:
+                raise DecryptionError("Archive chiffrée avec un fichier de clé (--key-file), "
+                                      "pas avec une phrase de passe")
+            return self._key
+        if self._passphrase is None:
+            raise DecryptionError("Archive chiffrée avec une phrase de passe (--passphrase), "
+                                  "pas avec un fichier de clé")
+        cache_key = (params.salt, params.scrypt_log_n, params.scrypt_r, params.scrypt_p)
+        master = self._masters.get(cache_key)
+        if master is None:
+            n = 1 << params.scrypt_log_n
+            master = hashlib.scrypt(self._passphrase, salt=params.salt, n=n, r=params.scrypt_r,
+                                    p=params.scrypt_p, dklen=KEY_SIZE,
+                                    maxmem=129 * params.scrypt_r * n * params.scrypt_p)
+            self._masters[cache_key] = master
+        return master
+
+    def archive_key(self, header):
+        """Clé AEAD d'une archive, dérivée de la clé maître et de son en-tête"""
+        params = read_header(header)
+        return _hkdf(self._master_key(params), params.salt, b"backup-archive" + header)
+
+    def cipher(self, header):
+        """
+        AEAD d'une archive
+
+        Returns:
+            tuple: (ArchiveHeader, objet AEAD de cryptography)
+        """
+        params = read_header(header)
+        aead_class = _aead_class(params.algorithm)
+        return params, aead_class(self.archive_key(header))
+
+
+def generate_key_file(path):
+    """
+    Crée un fichier de clé aléatoire (64 caractères hexadécimaux, lisible du seul propriétaire)
+
+    Un fichier existant n'est jamais écrasé (FileExistsError).
+    """
+    fd = os.open(os.path.expanduser(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(os.urandom(KEY_SIZE).hex() + "\n")
+
+
+class EncryptingWriter:
+    """
+    Chiffre en flux ce qui y est écrit, par blocs de taille fixe
+
+    S'utilise comme un fichier non repositionnable (write, tell, flush):
+    zipfile y écrit alors les tailles des membres dans des descripteurs de
+    données. tell() renvoie la position en clair. close() chiffre le dernier
+    bloc mais ne ferme pas le flux sous-jacent.
+
+    Args:
+        fp: Flux de destination (fichier, envoi vers une cible de stockage)
+        key (EncryptionKey): Clé maître
+    """
+
+    def __init__(self, fp, key):
+        self._fp = fp
+        header = key.new_header()
+        params, self._aead = key.cipher(header)
+        self._aad = header
+        self.chunk_size = params.chunk_size
+        self._buffer = bytearray()
+        self._index = 0
+        self._position = 0
+        self.closed = False
+        fp.write(header)
+
+    def _seal(self, data, last=False):
+        self._fp.write(self._aead.encrypt(_nonce(self._index, last), data, self._aad))
+        self._index += 1
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("Écriture dans une archive chiffrée terminée")
+        self._buffer += data
+        self._position += len(data)
+        count = len(self._buffer) // self.chunk_size
+        if count:
+            end = count * self.chunk_size
+            with memoryview(self._buffer) as view:
+                for start in range(0, end, self.chunk_size):
+                    self._seal(bytes(view[start:start + self.chunk_size]))
+            del self._buffer[:end]
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        self._fp.flush()
+
+    def close(self):
+        """Chiffre le dernier bloc (sans effet si c'est déjà fait)"""
+        if self.closed:
+            return
+        self._seal(bytes(self._buffer), last=True)
+        self._buffer = bytearray()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+class DecryptingReader(io.RawIOBase):
+    """
+    Lecture repositionnable d'une archive chiffrée, déchiffrée bloc par bloc
+
+    Seuls les blocs lus sont déchiffrés (le dernier, relu pour détecter une
+    troncature ou une mauvaise clé, l'est dès l'ouverture); le bloc courant
+    est gardé en mémoire. zipfile peut ainsi lire l'archive directement.
+
+    Args:
+        fp: Fichier chiffré ouvert en lecture binaire, fermé avec le lecteur
+        key (EncryptionKey): Clé maître
+    """
+
+    def __init__(self, fp, key):
+        super().__init__()
+        self._fp = fp
+        header = fp.read(HEADER_SIZE)
+        params, self._aead = key.cipher(header)
+        self.algorithm = params.algorithm
+        self._aad = header
+        self.chunk_size = params.chunk_size
+        body = fp.seek(0, io.SEEK_END) - HEADER_SIZE
+        full, rest = divmod(body, self.chunk_size + TAG_SIZE)
+        if rest < TAG_SIZE:
+            raise DecryptionError("Archive chiffrée tronquée")
+        self._last = full
+        self._last_length = rest
+        self.size = full * self.chunk_size + rest - TAG_SIZE
+        self._position = 0
+        self._cached_index = None
+        self._cached = b''
+        self._chunk(self._last)
+
+    def _chunk(self, index):
+        """Contenu en clair d'un bloc (le dernier déchiffré est conservé)"""
+        if index == self._cached_index:
+            return self._cached
+        from cryptography.exceptions import InvalidTag
+        last = index == self._last
+        self._fp.seek(HEADER_SIZE + index * (self.chunk_size + TAG_SIZE))
+        data = self._fp.read(self._last_length if last else self.chunk_size + TAG_SIZE)
+        try:
+            plain = self._aead.decrypt(_nonce(index, last), data, self._aad)
+        except InvalidTag:
+            raise DecryptionError(f"Bloc chiffré {index} non authentifié: clé incorrecte "
+                                  f"ou archive altérée") from None
+        self._cached_index = index
+        self._cached = plain
+        return plain
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"whence invalide: {whence}")
+        if offset < 0:
+            raise ValueError(f"Position négative: {offset}")
+        self._position = offset
+        return offset
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self._position
+        parts = []
+        while size > 0 and self._position < self.size:
+            index, offset = divmod(self._position, self.chunk_size)
+            block = self._chunk(index)[offset:offset + size]
+            parts.append(block)
+            self._position += len(block)
+            size -= len(block)
+        return b''.join(parts)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._fp.close()
+        super().close()
@@ -4,23 +4,61 @@ Interface graphique pour le Script de Sauvegarde Automatique - Groupe 3
 Nécessite tkinter (inclus par défaut avec Python)
 """
 
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
+import queue
 import os
 import sys
 from pathlib import Path
 import logging
 
+# tkinter n'est importé qu'à l'ouverture de l'interface (voir _import_tkinter):
+# QueueLogHandler reste utilisable sur une machine sans affichage
+tk = ttk = filedialog = messagebox = scrolledtext = None
+
 # Import du module de sauvegarde
 try:
-    from backup import BackupManager
+    from backup import BackupManager, CompressionPolicy, FileFilter, IOThrottle
 except ImportError:
+    from tkinter import messagebox
     messagebox.showerror("Erreur", "Le fichier 'backup.py' n'a pas été trouvé dans le même dossier!")
     sys.exit(1)
 
+# Intervalle de vidage de la file de logs vers la zone de texte (ms)
+LOG_POLL_INTERVAL_MS = 100
+
+# Nombre maximal de messages insérés par vidage, et de lignes conservées à l'écran
+LOG_BATCH_SIZE = 500
+LOG_MAX_LINES = 2000
+
+# Capacité de la file de logs; au-delà, les messages sont comptés puis ignorés
+LOG_QUEUE_SIZE = 10000
+
+
+def _import_tkinter():
+    """Importe tkinter et ses modules dans l'espace global du module"""
+    global tk, ttk, filedialog, messagebox, scrolledtext
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox, scrolledtext
+
+
+class QueueLogHandler(logging.Handler):
+    """Handler qui se contente de mettre les enregistrements en file (sans toucher à Tk)"""
+    
+    def __init__(self, log_queue):
+        super().__init__()
+        self.log_queue = log_queue
+        self.dropped = 0
+    
+    def emit(self, record):
+        try:
+            self.log_queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 class BackupGUI:
     def __init__(self, root):
+        _import_tkinter()
         self.root = root
         self.root.title("🗂️ Sauvegarde Automatique - Groupe 3")
         self.root.geometry("800x600")
@@ -30,6 +68,12 @@ class BackupGUI:
         # Variables
         self.source_var = tk.StringVar()
         self.dest_var = tk.StringVar()
+        self.codec_var = tk.StringVar(value="deflate")
+        self.probe_var = tk.BooleanVar(value=False)
+        self.exclude_var = tk.StringVar()
+        self.read_limit_var = tk.StringVar(value="0")
+        self.low_priority_var = tk.BooleanVar(value=False)
+        self.throttle = IOThrottle()
         self.is_running = False
         
         # Initialisation du gestionnaire de sauvegarde
@@ -105,9 +149,47 @@ class BackupGUI:
         ttk.Button(dest_frame, text="Parcourir", 
                   command=self.browse_destination).grid(row=0, column=1)
         
+        # Politique de compression
+        ttk.Label(main_frame, text="🗜️ Compression:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        
+        codec_frame = ttk.Frame(main_frame)
+        codec_frame.grid(row=3, column=1, columnspan=2, sticky=tk.W, pady=5)
+        
+        codecs = ["stored"] + [f"deflate:{level}" for level in range(1, 10)] + ["deflate", "bzip2", "lzma"]
+        ttk.Combobox(codec_frame, textvariable=self.codec_var, values=codecs,
+                     state='readonly', width=12).pack(side=tk.LEFT)
+        ttk.Checkbutton(codec_frame, text="Sonder la compressibilité (ne pas recompresser l'incompressible)",
+                        variable=self.probe_var).pack(side=tk.LEFT, padx=10)
+        
+        # Règles d'exclusion (format .gitignore, séparées par des espaces)
+        ttk.Label(main_frame, text="🚫 Exclusions:").grid(row=4, column=0, sticky=tk.W, pady=5)
+        
+        exclude_frame = ttk.Frame(main_frame)
+        exclude_frame.grid(row=4, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        exclude_frame.columnconfigure(0, weight=1)
+        
+        ttk.Entry(exclude_frame, textvariable=self.exclude_var, width=50).grid(
+            row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 5))
+        ttk.Button(exclude_frame, text="Charger",
+                  command=self.load_exclude_file).grid(row=0, column=1)
+        
+        # Limitation des E/S, modifiable pendant la sauvegarde
+        ttk.Label(main_frame, text="🐢 Lecture max (Mo/s):").grid(row=5, column=0, sticky=tk.W, pady=5)
+        
+        throttle_frame = ttk.Frame(main_frame)
+        throttle_frame.grid(row=5, column=1, columnspan=2, sticky=tk.W, pady=5)
+        
+        ttk.Spinbox(throttle_frame, from_=0, to=10000, increment=10, textvariable=self.read_limit_var,
+                    width=8).pack(side=tk.LEFT)
+        ttk.Label(throttle_frame, text="(0 = illimité)").pack(side=tk.LEFT, padx=5)
+        self.priority_check = ttk.Checkbutton(throttle_frame, text="Priorité basse (CPU et disque)",
+                                              variable=self.low_priority_var)
+        self.priority_check.pack(side=tk.LEFT, padx=10)
+        self.read_limit_var.trace_add('write', self.on_read_limit_changed)
+        
         # Boutons d'action
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=3, column=0, columnspan=3, pady=20)
+        button_frame.grid(row=6, column=0, columnspan=3, pady=20)
         
         self.backup_button = ttk.Button(button_frame, text="🚀 Démarrer la sauvegarde", 
                                        command=self.start_backup, style="Action.TButton")
@@ -124,17 +206,17 @@ class BackupGUI:
         # Barre de progression
         self.progress_var = tk.StringVar(value="Prêt")
         self.progress_label = ttk.Label(main_frame, textvariable=self.progress_var)
-        self.progress_label.grid(row=4, column=0, columnspan=3, pady=5)
+        self.progress_label.grid(row=7, column=0, columnspan=3, pady=5)
         
-        self.progress_bar = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress_bar.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        self.progress_bar = ttk.Progressbar(main_frame, mode='determinate', maximum=100)
+        self.progress_bar.grid(row=8, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
         
         # Zone de logs
         logs_frame = ttk.LabelFrame(main_frame, text="📝 Logs d'exécution", padding="10")
-        logs_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+        logs_frame.grid(row=9, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
         logs_frame.columnconfigure(0, weight=1)
         logs_frame.rowconfigure(0, weight=1)
-        main_frame.rowconfigure(6, weight=1)
+        main_frame.rowconfigure(9, weight=1)
         
         self.log_text = scrolledtext.ScrolledText(logs_frame, height=15, width=80)
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -146,21 +228,47 @@ class BackupGUI:
         self.load_default_paths()
     
     def setup_log_handler(self):
-        """Configure un handler pour afficher les logs dans l'interface"""
-        class GUILogHandler(logging.Handler):
-            def __init__(self, text_widget):
-                super().__init__()
-                self.text_widget = text_widget
-            
-            def emit(self, record):
-                log_entry = self.format(record)
-                self.text_widget.insert(tk.END, log_entry + '\n')
-                self.text_widget.see(tk.END)
-                self.text_widget.update()
-        
-        # Créer et configurer le handler
-        self.gui_handler = GUILogHandler(self.log_text)
-        self.gui_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        """
+        Configure l'affichage des logs dans l'interface
+        
+        Le thread de sauvegarde ne fait que déposer les enregistrements dans une
+        file; la boucle Tk les formate et les insère par lots sur un minuteur,
+        en limitant le nombre de lignes conservées.
+        """
+        self.log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.gui_handler = QueueLogHandler(self.log_queue)
+        self.log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        
+        # Le handler est attaché une seule fois au logger du module de sauvegarde
+        logger = logging.getLogger('backup')
+        logger.addHandler(self.gui_handler)
+        
+        self.root.after(LOG_POLL_INTERVAL_MS, self.drain_log_queue)
+    
+    def drain_log_queue(self):
+        """Insère en une fois les logs en attente puis se reprogramme"""
+        lines = []
+        try:
+            while len(lines) < LOG_BATCH_SIZE:
+                lines.append(self.log_formatter.format(self.log_queue.get_nowait()))
+        except queue.Empty:
+            pass
+        
+        dropped = self.gui_handler.dropped
+        if dropped:
+            self.gui_handler.dropped = 0
+            lines.append(f"... {dropped} messages non affichés (file pleine)")
+        
+        if lines:
+            self.log_text.insert(tk.END, '\n'.join(lines) + '\n')
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - LOG_MAX_LINES
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+            self.log_text.see(tk.END)
+        
+        # Vidage immédiat s'il reste des messages, sinon au prochain intervalle
+        delay = 1 if lines and not self.log_queue.empty() else LOG_POLL_INTERVAL_MS
+        self.root.after(delay, self.drain_log_queue)
     
     def load_default_paths(self):
         """Charge des chemins par défaut"""
@@ -180,6 +288,26 @@ class BackupGUI:
         if folder:
             self.dest_var.set(folder)
     
+    def on_read_limit_changed(self, *args):
+        """Applique la limite de lecture saisie, y compris à la sauvegarde en cours"""
+        try:
+            limit = float(self.read_limit_var.get().replace(',', '.'))
+        except ValueError:
+            return
+        self.throttle.set_limits(read_bps=int(limit * 1024 * 1024) if limit > 0 else None)
+    
+    def load_exclude_file(self):
+        """Ajoute aux exclusions les règles d'un fichier .gitignore / .backupignore"""
+        path = filedialog.askopenfilename(title="Choisir un fichier de règles d'exclusion")
+        if not path:
+            return
+        try:
+            rules = [rule.strip() for rule in FileFilter.read_rules(path)]
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erreur", f"Impossible de lire les règles:\n{e}")
+            return
+        self.exclude_var.set(" ".join([self.exclude_var.get().strip()] + rules).strip())
+    
     def validate_inputs(self):
         """Valide les entrées utilisateur"""
         source = self.source_var.get().strip()
@@ -212,54 +340,79 @@ class BackupGUI:
         if not self.validate_inputs():
             return
         
+        # Les variables Tk sont lues ici, dans le thread principal
+        source = self.source_var.get().strip()
+        dest = self.dest_var.get().strip()
+        policy = CompressionPolicy(default=self.codec_var.get(), probe=self.probe_var.get())
+        try:
+            file_filter = FileFilter(self.exclude_var.get().split())
+        except ValueError as e:
+            messagebox.showerror("Erreur", str(e))
+            return
+        
+        self.throttle.low_priority = self.low_priority_var.get()
+        
         # Démarrer la sauvegarde dans un thread séparé
-        backup_thread = threading.Thread(target=self.run_backup)
+        backup_thread = threading.Thread(target=self.run_backup, args=(source, dest, policy, file_filter))
         backup_thread.daemon = True
         backup_thread.start()
     
-    def run_backup(self):
-        """Exécute la sauvegarde"""
+    def run_backup(self, source, dest, policy, file_filter=None):
+        """Exécute la sauvegarde (thread de travail: aucun appel direct à Tk)"""
         try:
             self.is_running = True
             self.update_ui_state(True)
             
             # Créer le gestionnaire de sauvegarde
             self.backup_manager = BackupManager()
-            
-            # Ajouter le handler GUI au logger
-            logger = logging.getLogger('backup')
-            logger.addHandler(self.gui_handler)
-            logger.setLevel(logging.INFO)
+            logging.getLogger('backup').setLevel(logging.INFO)
             
             # Lancer la sauvegarde
-            source = self.source_var.get().strip()
-            dest = self.dest_var.get().strip()
-            
-            self.progress_var.set("Sauvegarde en cours...")
+            self.root.after(0, self.progress_var.set, "Sauvegarde en cours...")
             
-            backup_path = self.backup_manager.backup_and_compress(source, dest)
+            backup_path = self.backup_manager.backup_and_compress(source, dest, compression_policy=policy,
+                                                                  file_filter=file_filter,
+                                                                  throttle=self.throttle,
+                                                                  progress_callback=self.on_progress)
             
-            self.progress_var.set("Sauvegarde terminée ✅")
+            self.root.after(0, self.progress_var.set, "Sauvegarde terminée ✅")
             
             # Afficher le résultat
-            messagebox.showinfo("Succès", f"Sauvegarde terminée avec succès!\n\nFichier: {backup_path}")
+            self.root.after(0, lambda: messagebox.showinfo(
+                "Succès", f"Sauvegarde terminée avec succès!\n\nFichier: {backup_path}"))
             
         except Exception as e:
-            self.progress_var.set("Erreur lors de la sauvegarde ❌")
-            messagebox.showerror("Erreur", f"Erreur lors de la sauvegarde:\n{str(e)}")
+            message = f"Erreur lors de la sauvegarde:\n{str(e)}"
+            self.root.after(0, self.progress_var.set, "Erreur lors de la sauvegarde ❌")
+            self.root.after(0, lambda: messagebox.showerror("Erreur", message))
         finally:
             self.is_running = False
             self.update_ui_state(False)
     
+    def on_progress(self, progress):
+        """Reçoit l'avancement depuis le thread de sauvegarde et le transmet au thread Tk"""
+        self.root.after(0, self.update_progress, progress.snapshot())
+    
+    def update_progress(self, snapshot):
+        """Met à jour la barre de progression déterminée et le texte d'état"""
+        self.progress_bar['value'] = snapshot['percent']
+        eta = snapshot['eta']
+        eta_text = f"{int(eta) // 60:02d}:{int(eta) % 60:02d}" if eta is not None else "--:--"
+        throughput = self.backup_manager.format_size(snapshot['throughput'])
+        self.progress_var.set(f"{snapshot['percent']:.0f}% - {snapshot['files_done']}/{snapshot['files_total']} "
+                              f"fichiers - {throughput}/s - reste {eta_text}")
+    
     def update_ui_state(self, is_running):
         """Met à jour l'état de l'interface selon l'état de la sauvegarde"""
         def update():
             if is_running:
                 self.backup_button.config(text="⏳ Sauvegarde en cours...", state='disabled')
-                self.progress_bar.start()
+                # La priorité ne peut pas être remontée en cours de sauvegarde
+                self.priority_check.config(state='disabled')
+                self.progress_bar['value'] = 0
             else:
                 self.backup_button.config(text="🚀 Démarrer la sauvegarde", state='normal')
-                self.progress_bar.stop()
+                self.priority_check.config(state='normal')
                 self.progress_var.set("Prêt")
         
         # Exécuter dans le thread principal
@@ -284,16 +437,16 @@ class BackupGUI:
                 return
             
             # Créer une fenêtre pour afficher les sauvegardes
-            self.show_backups_window(backups)
+            self.show_backups_window(backups, dest)
             
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de la liste des sauvegardes:\n{str(e)}")
     
-    def show_backups_window(self, backups):
-        """Affiche une fenêtre avec la liste des sauvegardes"""
+    def show_backups_window(self, backups, dest):
+        """Affiche une fenêtre avec la liste des sauvegardes et une recherche de fichier"""
         backup_window = tk.Toplevel(self.root)
         backup_window.title("📋 Liste des sauvegardes")
-        backup_window.geometry("600x400")
+        backup_window.geometry("700x450")
         backup_window.resizable(True, True)
         
         # Frame principal
@@ -304,6 +457,13 @@ class BackupGUI:
         ttk.Label(frame, text="📋 Sauvegardes disponibles", 
                  font=("Arial", 12, "bold")).pack(pady=(0, 10))
         
+        # Recherche d'un fichier dans toutes les sauvegardes (index du catalogue)
+        search_frame = ttk.Frame(frame)
+        search_frame.pack(fill=tk.X, pady=(0, 10))
+        search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=search_var)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        
         # Treeview pour afficher les sauvegardes
         columns = ('Nom', 'Date', 'Taille')
         tree = ttk.Treeview(frame, columns=columns, show='headings', height=15)
@@ -313,17 +473,50 @@ class BackupGUI:
         tree.heading('Date', text='Date de création')
         tree.heading('Taille', text='Taille')
         
-        tree.column('Nom', width=300)
+        tree.column('Nom', width=400)
         tree.column('Date', width=150)
         tree.column('Taille', width=100)
         
+        def show_all():
+            """Affiche la liste complète des sauvegardes"""
+            tree.delete(*tree.get_children())
+            for backup in backups:
+                tree.insert('', tk.END, values=(
+                    backup['name'],
+                    backup['date'].strftime('%Y-%m-%d %H:%M:%S'),
+                    self.backup_manager.format_size(backup['size'])
+                ))
+        
+        def search(event=None):
+            """Affiche chaque version du fichier recherché avec sa sauvegarde"""
+            pattern = search_var.get().strip()
+            if not pattern:
+                show_all()
+                return
+            try:
+                results = self.backup_manager.find(dest, pattern)
+            except Exception as e:
+                messagebox.showerror("Erreur", f"Erreur lors de la recherche:\n{str(e)}", parent=backup_window)
+                return
+            tree.delete(*tree.get_children())
+            for result in results:
+                for match in result['matches']:
+                    tree.insert('', tk.END, values=(
+                        f"{result['name']} → {match['path']}",
+                        result['date'].strftime('%Y-%m-%d %H:%M:%S'),
+                        self.backup_manager.format_size(match['size'])
+                    ))
+            if not results:
+                messagebox.showinfo("Information", f"Aucune sauvegarde ne contient '{pattern}'",
+                                    parent=backup_window)
+        
+        ttk.Button(search_frame, text="🔍 Rechercher", command=search).pack(side=tk.LEFT)
+        ttk.Button(search_frame, text="Tout afficher",
+                  command=lambda: (search_var.set(""), show_all())).pack(side=tk.LEFT, padx=(5, 0))
+        search_entry.bind('<Return>', search)
+        
         # Ajout des données
-        for backup in backups:
-            tree.insert('', tk.END, values=(
-                backup['name'],
-                backup['date'].strftime('%Y-%m-%d %H:%M:%S'),
-                self.backup_manager.format_size(backup['size'])
-            ))
+        show_all()
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
@@ -344,6 +537,7 @@ class BackupGUI:
 
 def main():
     """Fonction principale"""
+    _import_tkinter()
     root = tk.Tk()
     app = BackupGUI(root)
     
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Ordonnanceur de tâches de sauvegarde - Groupe 3
+
+Exécute plusieurs sauvegardes décrites dans un fichier de tâches (JSON, TOML
+ou YAML) avec une concurrence bornée globalement, par disque source et par
+disque de destination, afin de ne pas faire lutter les têtes de lecture.
+"""
+
+import os
+import time
+import json
+import logging
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from backup import (BackupManager, CompressionPolicy, FileFilter, IOThrottle, PhaseTimer, STORAGE_URL, parse_size,
+                    write_prometheus_metrics)
+
+# Clés acceptées pour une tâche, en plus de 'source' et 'destination'
+JOB_OPTIONS = {'name', 'source', 'destination', 'workers', 'incremental', 'hash', 'backend',
+               'codec', 'codec_rules', 'probe', 'exclude', 'exclude_from',
+               'max_read_rate', 'max_write_rate', 'max_iops', 'low_priority', 'metrics_file',
+               'volume_size', 'volume_dirs', 'key_file', 'passphrase_env', 'cipher'}
+
+# Limites par défaut de l'ordonnanceur
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_PER_DEVICE = 1
+
+
+def load_job_file(path):
+    """
+    Charge un fichier de tâches JSON, TOML ou YAML (selon l'extension)
+    
+    Format attendu:
+        scheduler: {max_concurrent, per_source_device, per_destination_device}  (optionnel)
+        defaults: options appliquées à toutes les tâches                       (optionnel)
+        jobs: liste de {name, source, destination, ...options}
+    
+    Returns:
+        tuple: (liste des tâches complétées par les défauts, options de l'ordonnanceur)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    elif ext == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            config = tomllib.load(f)
+    elif ext in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("Le support YAML nécessite PyYAML (pip install pyyaml)")
+        with open(path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+    else:
+        raise ValueError(f"Format de fichier de tâches non reconnu: '{path}' (.json, .toml, .yaml)")
+    
+    if not isinstance(config, dict) or not isinstance(config.get('jobs'), list) or not config['jobs']:
+        raise ValueError("Le fichier de tâches doit contenir une liste 'jobs' non vide")
+    
+    defaults = config.get('defaults', {})
+    jobs = []
+    names = set()
+    for number, raw in enumerate(config['jobs'], start=1):
+        job = dict(defaults, **raw)
+        unknown = set(job) - JOB_OPTIONS
+        if unknown:
+            raise ValueError(f"Tâche {number}: options inconnues {sorted(unknown)}")
+        if not job.get('source') or not job.get('destination'):
+            raise ValueError(f"Tâche {number}: 'source' et 'destination' sont obligatoires")
+        job.setdefault('name', f"job{number}")
+        if job['name'] in names:
+            raise ValueError(f"Nom de tâche en double: '{job['name']}'")
+        names.add(job['name'])
+        job['source'] = os.path.expanduser(job['source'])
+        job['destination'] = os.path.expanduser(job['destination'])
+        jobs.append(job)
+    return jobs, config.get('scheduler', {})
+
+
+def device_of(path):
+    """
+    Identifiant du périphérique d'un chemin (ou de son plus proche parent existant)
+    
+    Une cible distante (s3://bucket/...) est identifiée par son bucket.
+    """
+    if STORAGE_URL.match(path):
+        parts = urllib.parse.urlsplit(path)
+        return f"{parts.scheme}://{parts.netloc}"
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except FileNotFoundError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                raise
+            path = parent
+
+
+class _JobLoggerAdapter(logging.LoggerAdapter):
+    """Préfixe chaque message par le nom de la tâche"""
+    
+    def process(self, msg, kwargs):
+        return f"[{self.extra['job']}] {msg}", kwargs
+
+
+class BackupScheduler:
+    """
+    Exécute des tâches de sauvegarde avec une concurrence bornée
+    
+    Une tâche ne démarre que si le nombre total de tâches en cours, le
+    nombre de tâches lisant le même disque source et le nombre de tâches
+    écrivant sur le même disque de destination sont sous leurs limites.
+    Les tâches en attente sont examinées dans l'ordre, sans qu'une tâche
+    bloquée n'empêche les suivantes de partir.
+    
+    Tous les gestionnaires partagent le logger du gestionnaire fourni:
+    la configuration du logging n'est faite qu'une fois.
+    """
+    
+    def __init__(self, backup_manager, max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 per_source_device=DEFAULT_PER_DEVICE, per_destination_device=DEFAULT_PER_DEVICE):
+        if min(max_concurrent, per_source_device, per_destination_device) < 1:
+            raise ValueError("Les limites de concurrence doivent être supérieures ou égales à 1")
+        self.backup_manager = backup_manager
+        self.logger = backup_manager.logger
+        self.max_concurrent = max_concurrent
+        self.per_source_device = per_source_device
+        self.per_destination_device = per_destination_device
+    
+    def _run_job(self, job):
+        """Exécute une tâche et retourne son résultat (jamais d'exception)"""
+        manager = BackupManager(logger=_JobLoggerAdapter(self.logger, {'job': job['name']}))
+        final = {}
+        result = {'name': job['name'], 'source': job['source'], 'destination': job['destination'],
+                  'status': 'ok', 'path': None, 'error': None, 'files': 0, 'bytes': 0, 'size': 0}
+        start = time.perf_counter()
+        phases = PhaseTimer()
+        try:
+            policy = CompressionPolicy(default=job.get('codec', 'deflate'),
+                                       extension_rules=job.get('codec_rules'),
+                                       probe=job.get('probe', False))
+            rules = FileFilter.read_rules(os.path.expanduser(job['exclude_from'])) if job.get('exclude_from') else []
+            file_filter = FileFilter(rules + list(job.get('exclude', [])))
+            throttle = None
+            if any(job.get(key) for key in ('max_read_rate', 'max_write_rate', 'max_iops', 'low_priority')):
+                rates = {key: parse_size(str(job[key])) if job.get(key) else None
+                         for key in ('max_read_rate', 'max_write_rate')}
+                throttle = IOThrottle(read_bps=rates['max_read_rate'], write_bps=rates['max_write_rate'],
+                                      iops=job.get('max_iops'), low_priority=job.get('low_priority', False))
+            encryption = None
+            if job.get('key_file') or job.get('passphrase_env'):
+                from backup_crypto import EncryptionKey
+                options = {'algorithm': job['cipher']} if job.get('cipher') else {}
+                if job.get('key_file'):
+                    encryption = EncryptionKey.from_file(os.path.expanduser(job['key_file']), **options)
+                else:
+                    # La phrase de passe n'apparaît jamais dans le fichier de tâches
+                    passphrase = os.environ.get(job['passphrase_env'])
+                    if not passphrase:
+                        raise ValueError(f"Variable d'environnement '{job['passphrase_env']}' absente ou vide")
+                    encryption = EncryptionKey(passphrase=passphrase, **options)
+            result['path'] = manager.backup_and_compress(
+                job['source'], job['destination'],
+                workers=job.get('workers', 1),
+                incremental=job.get('incremental', False),
+                hash_files=job.get('hash', False),
+                backend=job.get('backend', 'zip'),
+                compression_policy=policy,
+                file_filter=file_filter,
+                throttle=throttle,
+                phases=phases,
+                volume_size=parse_size(str(job['volume_size'])) if job.get('volume_size') else None,
+                volume_dirs=[os.path.expanduser(directory) for directory in job.get('volume_dirs', [])],
+                encryption=encryption,
+                progress_callback=lambda progress: final.update(progress.snapshot()) if progress.finished else None,
+            )
+            result['files'] = final.get('files_done', 0)
+            result['bytes'] = final.get('bytes_read', 0)
+            if STORAGE_URL.match(result['path']):
+                result['size'] = phases.counters.get('archive_bytes', 0)
+            else:
+                result['size'] = os.path.getsize(result['path'])
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = str(e)
+        result['duration'] = time.perf_counter() - start
+        result['phases'] = phases.to_dict()['phases']
+        if job.get('metrics_file'):
+            try:
+                write_prometheus_metrics(os.path.expanduser(job['metrics_file']), phases,
+                                         {'job': job['name'], 'source': job['source'],
+                                          'destination': job['destination']},
+                                         success=result['status'] == 'ok')
+            except OSError as e:
+                manager.logger.warning(f"Impossible d'écrire les métriques '{job['metrics_file']}': {e}")
+        return result
+    
+    def run(self, jobs):
+        """
+        Exécute toutes les tâches et retourne leurs résultats dans l'ordre des tâches
+        
+        Returns:
+            list[dict]: name, status ('ok'/'error'), path, error, files, bytes, size, duration,
+                        phases (temps par phase, pour les tâches lancées)
+        """
+        results = {}
+        pending = []
+        for job in jobs:
+            try:
+                # Une sauvegarde en volumes écrit aussi sur les disques de volume_dirs
+                destinations = [job['destination']] + [os.path.expanduser(directory)
+                                                       for directory in job.get('volume_dirs', [])]
+                pending.append((job, device_of(job['source']), {device_of(path) for path in destinations}))
+            except OSError as e:
+                results[job['name']] = {'name': job['name'], 'source': job['source'],
+                                        'destination': job['destination'], 'status': 'error',
+                                        'path': None, 'error': str(e), 'files': 0, 'bytes': 0,
+                                        'size': 0, 'duration': 0.0}
+        
+        condition = threading.Condition()
+        running = {'total': 0, 'source': {}, 'destination': {}}
+        
+        def can_start(source_dev, dest_devs):
+            return (running['total'] < self.max_concurrent
+                    and running['source'].get(source_dev, 0) < self.per_source_device
+                    and all(running['destination'].get(dev, 0) < self.per_destination_device
+                            for dev in dest_devs))
+        
+        def acquire(source_dev, dest_devs, delta):
+            running['total'] += delta
+            running['source'][source_dev] = running['source'].get(source_dev, 0) + delta
+            for dev in dest_devs:
+                running['destination'][dev] = running['destination'].get(dev, 0) + delta
+        
+        def execute(job, source_dev, dest_devs):
+            try:
+                results[job['name']] = self._run_job(job)
+            finally:
+                with condition:
+                    acquire(source_dev, dest_devs, -1)
+                    condition.notify_all()
+        
+        self.logger.info(f"Ordonnanceur: {len(pending)} tâches, {self.max_concurrent} en parallèle au plus "
+                         f"({self.per_source_device} par disque source, "
+                         f"{self.per_destination_device} par disque destination)")
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as pool:
+            with condition:
+                while pending:
+                    ready = next((item for item in pending if can_start(item[1], item[2])), None)
+                    if ready is None:
+                        condition.wait()
+                        continue
+                    pending.remove(ready)
+                    acquire(ready[1], ready[2], 1)
+                    self.logger.info(f"▶️  Démarrage de la tâche '{ready[0]['name']}'")
+                    pool.submit(execute, *ready)
+        
+        return [results[job['name']] for job in jobs]
+    
+    def log_summary(self, results):
+        """Journalise un récapitulatif par tâche"""
+        manager = self.backup_manager
+        self.logger.info("📋 Récapitulatif des tâches:")
+        for result in results:
+            if result['status'] == 'ok':
+                self.logger.info(f"   ✅ {result['name']}: {result['files']} fichiers, "
+                                 f"{manager.format_size(result['bytes'])} -> {manager.format_size(result['size'])} "
+                                 f"en {result['duration']:.2f} s ({result['path']})")
+            else:
+                self.logger.info(f"   ❌ {result['name']}: {result['error']}")
+        failed = sum(1 for result in results if result['status'] != 'ok')
+        self.logger.info(f"   Total: {len(results) - failed} réussies, {failed} en échec")
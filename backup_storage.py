@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+Cibles de stockage des sauvegardes - Groupe 3
+
+Une cible reçoit les archives par leur nom (put/get/list/delete) et accepte
+un envoi en flux (open_upload) pour écrire une archive pendant sa création,
+sans copie locale intermédiaire:
+- LocalStorage: dossier local, objet écrit sous un nom .part renommé à la fin
+- S3Storage: stockage objet compatible S3 (AWS, MinIO, Ceph RGW...), envoi
+  multipart dont les parties partent en parallèle sur des connexions HTTP
+  persistantes réutilisées
+
+Le client S3 n'utilise que la bibliothèque standard (signature AWS SigV4).
+Les identifiants sont lus dans les variables d'environnement AWS habituelles
+(AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_SESSION_TOKEN, AWS_REGION,
+AWS_ENDPOINT_URL) s'ils ne sont pas fournis.
+
+Exemple:
+    storage = open_storage("s3://sauvegardes/serveur1?endpoint=http://127.0.0.1:9000")
+    with storage.open_upload("archive.zip") as upload:
+        upload.write(data)
+"""
+
+import os
+import io
+import hmac
+import time
+import queue
+import shutil
+import hashlib
+import datetime
+import http.client
+import urllib.parse
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Taille des parties d'un envoi multipart (S3 impose 5 Mo au moins, sauf pour la dernière)
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+# Parties envoyées simultanément par envoi, et connexions conservées par cible
+DEFAULT_MAX_CONCURRENCY = 4
+# Tentatives d'une requête S3 après une erreur réseau ou une réponse 5xx
+S3_ATTEMPTS = 3
+S3_TIMEOUT = 60.0
+S3_DEFAULT_REGION = "us-east-1"
+
+# Taille des blocs copiés lors d'un téléchargement
+COPY_BUFFER_SIZE = 1024 * 1024
+
+PART_SUFFIX = ".part"
+
+# Objet d'une cible: nom relatif, taille (octets) et date de dernière modification
+StoredObject = namedtuple('StoredObject', ['name', 'size', 'modified'])
+
+
+class StorageError(OSError):
+    """Erreur renvoyée par une cible de stockage distante"""
+
+
+class StorageUpload:
+    """
+    Envoi en flux d'un objet
+
+    S'utilise comme un fichier non repositionnable (write, tell, flush):
+    close() publie l'objet complet, abort() l'abandonne sans rien laisser.
+    Utilisé comme gestionnaire de contexte, l'envoi est abandonné si une
+    exception sort du bloc.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._position = 0
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("Écriture dans un envoi terminé")
+        self._write(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """Termine l'envoi et publie l'objet (sans effet s'il est déjà terminé)"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._commit()
+        except BaseException:
+            self._discard()
+            raise
+
+    def abort(self):
+        """Abandonne l'envoi (sans effet s'il est déjà terminé)"""
+        if not self.closed:
+            self.closed = True
+            self._discard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _write(self, data):
+        raise NotImplementedError
+
+    def _commit(self):
+        raise NotImplementedError
+
+    def _discard(self):
+        raise NotImplementedError
+
+
+class StorageTarget:
+    """
+    Destination des sauvegardes, adressée par noms d'objets
+
+    Les noms sont relatifs à la cible (pas de sous-dossiers). Les
+    sous-classes implémentent url, open_upload, get, list, exists et delete.
+    """
+
+    # Dossier local équivalent à la cible (None pour une cible distante)
+    local_path = None
+
+    def url(self, name=''):
+        """Emplacement d'un objet (ou de la cible), utilisable avec open_storage"""
+        raise NotImplementedError
+
+    def open_upload(self, name):
+        """
+        Commence l'envoi en flux d'un objet
+
+        Returns:
+            StorageUpload: Envoi à écrire puis fermer (ou abandonner)
+        """
+        raise NotImplementedError
+
+    def put(self, name, data):
+        """Écrit un objet complet à partir d'octets ou d'un fichier ouvert en lecture"""
+        with self.open_upload(name) as upload:
+            if isinstance(data, (bytes, bytearray)):
+                upload.write(data)
+            else:
+                shutil.copyfileobj(data, upload, COPY_BUFFER_SIZE)
+
+    def get(self, name, dest):
+        """Copie le contenu d'un objet dans un fichier ouvert en écriture (FileNotFoundError s'il manque)"""
+        raise NotImplementedError
+
+    def get_bytes(self, name):
+        """Lit le contenu complet d'un objet"""
+        buffer = io.BytesIO()
+        self.get(name, buffer)
+        return buffer.getvalue()
+
+    def list(self, prefix=''):
+        """
+        Liste les objets de la cible
+
+        Returns:
+            list[StoredObject]: Objets dont le nom commence par prefix, triés par nom
+        """
+        raise NotImplementedError
+
+    def exists(self, name):
+        """Indique si un objet existe"""
+        raise NotImplementedError
+
+    def delete(self, name):
+        """Supprime un objet (sans erreur s'il n'existe pas)"""
+        raise NotImplementedError
+
+    def close(self):
+        """Libère les ressources (connexions) de la cible"""
+
+
+class _LocalUpload(StorageUpload):
+    """Envoi vers un fichier local: écrit sous un nom .part, renommé une fois complet"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._file = open(path + PART_SUFFIX, 'xb')
+
+    def _write(self, data):
+        self._file.write(data)
+
+    def _commit(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.path + PART_SUFFIX, self.path)
+
+    def _discard(self):
+        self._file.close()
+        try:
+            os.remove(self.path + PART_SUFFIX)
+        except OSError:
+            pass
+
+
+class LocalStorage(StorageTarget):
+    """
+    Cible de stockage dans un dossier local
+
+    Args:
+        root (str): Dossier de destination (créé au premier envoi)
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.local_path = root
+
+    def url(self, name=''):
+        return os.path.join(self.root, name) if name else self.root
+
+    def open_upload(self, name):
+        os.makedirs(self.root, exist_ok=True)
+        return _LocalUpload(os.path.join(self.root, name))
+
+    def get(self, name, dest):
+        with open(os.path.join(self.root, name), 'rb') as f:
+            shutil.copyfileobj(f, dest, COPY_BUFFER_SIZE)
+
+    def list(self, prefix=''):
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return []
+        objects = []
+        for entry in entries:
+            if entry.name.startswith(prefix) and not entry.name.endswith(PART_SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                objects.append(StoredObject(entry.name, stat.st_size,
+                                            datetime.datetime.fromtimestamp(stat.st_mtime)))
+        return sorted(objects)
+
+    def exists(self, name):
+        return os.path.isfile(os.path.join(self.root, name))
+
+    def delete(self, name):
+        try:
+            os.remove(os.path.join(self.root, name))
+        except FileNotFoundError:
+            pass
+
+
+class _ConnectionPool:
+    """
+    Connexions HTTP(S) persistantes vers un hôte, partagées entre les threads
+
+    Une connexion est empruntée pour une requête puis rendue; au-delà de
+    `size` connexions inactives, les connexions rendues sont fermées.
+    """
+
+    def __init__(self, scheme, host, port, size, timeout):
+        self._factory = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._factory(self.host, self.port, timeout=self.timeout)
+
+    def release(self, conn):
+        if self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _quote(value):
+    """Encodage d'URI de SigV4 (seuls A-Z a-z 0-9 - _ . ~ restent tels quels)"""
+    return urllib.parse.quote(value, safe='-_.~')
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+class _S3Upload(StorageUpload):
+    """
+    Envoi multipart vers S3
+
+    Les données sont découpées en parties de part_size octets envoyées par
+    un pool de threads pendant que l'appelant continue d'écrire; au plus
+    max_concurrency parties sont en vol, ce qui borne la mémoire. Un objet
+    plus petit qu'une partie est envoyé d'une seule requête.
+    """
+
+    def __init__(self, storage, name):
+        super().__init__()
+        self.storage = storage
+        self.key = storage._key(name)
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._pool = None
+        self._parts = []
+
+    def _write(self, data):
+        self._buffer += data
+        part_size = self.storage.part_size
+        while len(self._buffer) >= part_size:
+            part = bytes(self._buffer[:part_size])
+            del self._buffer[:part_size]
+            self._send_part(part)
+
+    def _send_part(self, data):
+        """Soumet une partie au pool, après avoir attendu qu'une place se libère"""
+        if self._upload_id is None:
+            self._upload_id = self.storage._create_multipart(self.key)
+            self._pool = ThreadPoolExecutor(max_workers=self.storage.max_concurrency,
+                                            thread_name_prefix="s3-upload")
+        in_flight = [future for future in self._parts if not future.done()]
+        if len(in_flight) >= self.storage.max_concurrency:
+            wait(in_flight, return_when=FIRST_COMPLETED)
+        # Une partie en échec arrête l'envoi au plus tôt
+        for future in self._parts:
+            if future.done():
+                future.result()
+        self._parts.append(self._pool.submit(self.storage._upload_part, self.key, self._upload_id,
+                                             len(self._parts) + 1, data))
+
+    def _commit(self):
+        if self._upload_id is None:
+            self.storage._request('PUT', self.key, body=bytes(self._buffer))
+            return
+        if self._buffer:
+            self._send_part(bytes(self._buffer))
+            self._buffer = bytearray()
+        etags = [future.result() for future in self._parts]
+        self.storage._complete_multipart(self.key, self._upload_id, etags)
+        self._pool.shutdown()
+
+    def _discard(self):
+        self._buffer = bytearray()
+        if self._upload_id is None:
+            return
+        for future in self._parts:
+            future.cancel()
+        self._pool.shutdown(wait=True)
+        try:
+            self.storage._request('DELETE', self.key, {'uploadId': self._upload_id})
+        except OSError:
+            pass
+
+
+class S3Storage(StorageTarget):
+    """
+    Cible de stockage objet compatible S3
+
+    Sans endpoint, la cible est un bucket AWS (adressage virtual-host);
+    avec un endpoint (MinIO, Ceph...), les requêtes utilisent l'adressage
+    par chemin.
+
+    Args:
+        bucket (str): Nom du bucket
+        prefix (str): Préfixe des objets (dossier virtuel) dans le bucket
+        endpoint (str): URL du service, ex: http://127.0.0.1:9000
+        region (str): Région utilisée pour la signature
+        access_key, secret_key, session_token (str): Identifiants (anonyme si absents)
+        part_size (int): Taille des parties d'un envoi multipart
+        max_concurrency (int): Parties envoyées en parallèle par envoi
+        timeout (float): Délai réseau d'une requête (secondes)
+    """
+
+    def __init__(self, bucket, prefix='', endpoint=None, region=None, access_key=None, secret_key=None,
+                 session_token=None, part_size=DEFAULT_PART_SIZE, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 timeout=S3_TIMEOUT):
+        if not bucket:
+            raise ValueError("Nom de bucket S3 manquant")
+        if part_size < 1 or max_concurrency < 1:
+            raise ValueError("La taille des parties et la concurrence doivent être positives")
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.endpoint = endpoint or os.environ.get('AWS_ENDPOINT_URL')
+        self.region = region or os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION') \
+            or S3_DEFAULT_REGION
+        self.access_key = access_key or os.environ.get('AWS_ACCESS_KEY_ID')
+        self.secret_key = secret_key or os.environ.get('AWS_SECRET_ACCESS_KEY')
+        self.session_token = session_token or os.environ.get('AWS_SESSION_TOKEN')
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+
+        if self.endpoint:
+            parts = urllib.parse.urlsplit(self.endpoint)
+            if parts.scheme not in ('http', 'https') or not parts.hostname:
+                raise ValueError(f"Endpoint S3 invalide: '{self.endpoint}'")
+            scheme, host, port = parts.scheme, parts.hostname, parts.port
+            self._host_header = parts.netloc
+            self._base_path = parts.path.rstrip('/') + '/' + bucket
+        else:
+            scheme, host, port = 'https', f"{bucket}.s3.{self.region}.amazonaws.com", None
+            self._host_header = host
+            self._base_path = ''
+        # Une connexion par partie en vol, plus celle de l'écrivain
+        self._pool = _ConnectionPool(scheme, host, port, max_concurrency + 1, timeout)
+
+    @classmethod
+    def from_url(cls, url, **options):
+        """
+        Cible décrite par une URL s3://bucket/préfixe[?endpoint=...&region=...]
+
+        Les paramètres part_size et max_concurrency de l'URL s'ajoutent aux options.
+        """
+        parts = urllib.parse.urlsplit(url)
+        query = dict(urllib.parse.parse_qsl(parts.query))
+        for key in ('part_size', 'max_concurrency'):
+            if key in query:
+                options.setdefault(key, int(query[key]))
+        return cls(parts.netloc, urllib.parse.unquote(parts.path), endpoint=query.get('endpoint'),
+                   region=query.get('region'), **options)
+
+    def url(self, name=''):
+        location = f"s3://{self.bucket}/{self.prefix}{name}"
+        query = {}
+        if self.endpoint:
+            query['endpoint'] = self.endpoint
+        if self.region != S3_DEFAULT_REGION:
+            query['region'] = self.region
+        return location + ('?' + urllib.parse.urlencode(query, safe=':/') if query else '')
+
+    def _key(self, name):
+        return self.prefix + name
+
+    def _sign(self, method, path, query, headers, payload_hash):
+        """Ajoute les en-têtes de date et la signature AWS SigV4 d'une requête"""
+        amz_date = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        headers['x-amz-date'] = amz_date
+        headers['x-amz-content-sha256'] = payload_hash
+        if self.session_token:
+            headers['x-amz-security-token'] = self.session_token
+        if not (self.access_key and self.secret_key):
+            return
+        canonical_headers = {name.lower(): ' '.join(str(value).split()) for name, value in headers.items()}
+        signed_headers = ';'.join(sorted(canonical_headers))
+        canonical_request = '\n'.join([
+            method, urllib.parse.quote(path), query,
+            ''.join(f"{name}:{canonical_headers[name]}\n" for name in sorted(canonical_headers)),
+            signed_headers, payload_hash])
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope,
+                                    hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()])
+        key = ('AWS4' + self.secret_key).encode('utf-8')
+        for part in (amz_date[:8], self.region, 's3', 'aws4_request'):
+            key = _hmac(key, part)
+        signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        headers['Authorization'] = (f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+                                    f"SignedHeaders={signed_headers}, Signature={signature}")
+
+    def _request(self, method, key='', params=None, body=b'', dest=None):
+        """
+        Envoie une requête signée, avec nouvelles tentatives sur erreur réseau ou 5xx
+
+        Args:
+            params (dict): Paramètres de la requête
+            body (bytes): Corps de la requête
+            dest (file): Reçoit par blocs le corps d'une réponse réussie (téléchargement)
+
+        Returns:
+            tuple: (statut, en-têtes, corps de la réponse)
+        """
+        path = self._base_path + '/' + key
+        query = '&'.join(f"{_quote(name)}={_quote(str(value))}" for name, value in sorted((params or {}).items()))
+        target = urllib.parse.quote(path) + ('?' + query if query else '')
+        payload_hash = hashlib.sha256(body).hexdigest()
+        for attempt in range(S3_ATTEMPTS):
+            headers = {'Host': self._host_header, 'Content-Length': str(len(body))}
+            self._sign(method, path, query, headers, payload_hash)
+            conn = self._pool.acquire()
+            copied = False
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                response = conn.getresponse()
+                if dest is not None and response.status == 200:
+                    copied = True
+                    shutil.copyfileobj(response, dest, COPY_BUFFER_SIZE)
+                    data = b''
+                else:
+                    data = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                # Une connexion inactive peut avoir été fermée par le serveur: nouvelle tentative
+                if copied or attempt == S3_ATTEMPTS - 1:
+                    raise StorageError(f"S3 {method} '{key}': {e}") from e
+                continue
+            if response.will_close:
+                conn.close()
+            else:
+                self._pool.release(conn)
+            if response.status >= 500 and attempt < S3_ATTEMPTS - 1:
+                time.sleep(0.1 * 2 ** attempt)
+                continue
+            if response.status >= 300:
+                raise self._error(method, key, response.status, data)
+            return response.status, response.headers, data
+
+    def _error(self, method, key, status, data):
+        """Exception correspondant à une réponse d'erreur S3"""
+        code = message = ''
+        try:
+            root = ET.fromstring(data)
+            code = root.findtext('Code') or ''
+            message = root.findtext('Message') or ''
+        except ET.ParseError:
+            pass
+        text = f"S3 {method} '{key}': {status} {code} {message}".rstrip()
+        if status == 404:
+            return FileNotFoundError(text)
+        if status == 403:
+            return PermissionError(text)
+        return StorageError(text)
+
+    def _create_multipart(self, key):
+        _, _, data = self._request('POST', key, {'uploads': ''})
+        return ET.fromstring(data).findtext('{*}UploadId')
+
+    def _upload_part(self, key, upload_id, number, data):
+        _, headers, _ = self._request('PUT', key, {'partNumber': number, 'uploadId': upload_id}, body=data)
+        return headers['ETag']
+
+    def _complete_multipart(self, key, upload_id, etags):
+        parts = ''.join(f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+                        for number, etag in enumerate(etags, start=1))
+        body = f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode('utf-8')
+        _, _, data = self._request('POST', key, {'uploadId': upload_id}, body=body)
+        # S3 peut signaler un échec dans une réponse 200
+        root = ET.fromstring(data)
+        if root.tag.rpartition('}')[2] == 'Error':
+            raise StorageError(f"S3 CompleteMultipartUpload '{key}': {root.findtext('Code')} "
+                               f"{root.findtext('Message')}")
+
+    def open_upload(self, name):
+        return _S3Upload(self, name)
+
+    def get(self, name, dest):
+        self._request('GET', self._key(name), dest=dest)
+
+    def list(self, prefix=''):
+        objects = []
+        params = {'list-type': 2, 'prefix': self.prefix + prefix, 'delimiter': '/'}
+        while True:
+            _, _, data = self._request('GET', '', params)
+            root = ET.fromstring(data)
+            for item in root.iterfind('{*}Contents'):
+                objects.append(StoredObject(
+                    item.findtext('{*}Key')[len(self.prefix):], int(item.findtext('{*}Size')),
+                    datetime.datetime.fromisoformat(item.findtext('{*}LastModified')).astimezone().replace(tzinfo=None)))
+            token = root.findtext('{*}NextContinuationToken')
+            if root.findtext('{*}IsTruncated') != 'true' or not token:
+                return sorted(objects)
+            params['continuation-token'] = token
+
+    def exists(self, name):
+        try:
+            self._request('HEAD', self._key(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete(self, name):
+        try:
+            self._request('DELETE', self._key(name))
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        self._pool.close()
+
+
+def open_storage(location, **options):
+    """
+    Ouvre la cible de stockage désignée par un chemin ou une URL
+
+    Args:
+        location: Dossier local, URL s3://bucket/préfixe[?endpoint=...] ou StorageTarget
+        **options: Options du constructeur S3Storage (part_size, max_concurrency...)
+
+    Returns:
+        StorageTarget: Cible correspondante
+    """
+    if isinstance(location, StorageTarget):
+        return location
+    location = os.fspath(location)
+    if '://' not in location:
+        return LocalStorage(location)
+    scheme = urllib.parse.urlsplit(location).scheme
+    if scheme == 's3':
+        return S3Storage.from_url(location, **options)
+    if scheme == 'file':
+        return LocalStorage(urllib.parse.unquote(urllib.parse.urlsplit(location).path))
+    raise ValueError(f"Cible de stockage non supportée: '{location}'")
+
+
+def open_storage_object(location, **options):
+    """
+    Sépare l'emplacement d'un objet en sa cible et son nom
+
+    Returns:
+        tuple: (StorageTarget, nom de l'objet)
+    """
+    location = os.fspath(location)
+    if '://' not in location:
+        return LocalStorage(os.path.dirname(location) or '.'), os.path.basename(location)
+    parts = urllib.parse.urlsplit(location)
+    directory, _, name = parts.path.rpartition('/')
+    if not name:
+        raise ValueError(f"Nom d'objet manquant: '{location}'")
+    return open_storage(parts._replace(path=directory).geturl(), **options), urllib.parse.unquote(name)
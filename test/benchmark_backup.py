@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Banc de performance pour le Script de Sauvegarde Automatique - Groupe 3
+
+Génère des arborescences synthétiques réalistes puis mesure
+backup_and_compress (avec et sans parcours en flux, et chiffrée si
+cryptography est installée), calculate_folder_size et list_backups, ainsi
+que le temps de démarrage de la ligne de commande.
+Chaque mesure tourne dans un processus séparé pour que le pic de
+mémoire (RSS) soit propre à l'opération mesurée.
+
+Exemples:
+  python test/benchmark_backup.py --output bench.json
+  python test/benchmark_backup.py --scale 4 --workers 4 --output bench.json
+  python test/benchmark_backup.py --baseline bench.json --threshold 0.10
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+# Ajouter le répertoire parent au path pour importer backup
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Scripts en ligne de commande mesurés au démarrage
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKUP_SCRIPT = os.path.join(PROJECT_DIR, "backup.py")
+CLI_SCRIPT = os.path.join(PROJECT_DIR, "backup_cli.py")
+
+# Commandes de démarrage mesurées, chacune dans un interpréteur neuf ({dest}: destination vide)
+STARTUP_COMMANDS = {
+    'python': ['-c', 'pass'],
+    'import_backup': ['-c', 'import backup'],
+    'cli_list': [CLI_SCRIPT, '{dest}', '{dest}', '--list'],
+    'script_list': [BACKUP_SCRIPT, '{dest}', '{dest}', '--list'],
+}
+
+# Modules que `import backup` ne doit pas charger (compression, GUI, catalogue, pool de processus)
+LAZY_MODULES = ('zipfile', 'tkinter', 'sqlite3', 'backup_catalog', 'backup_storage', 'backup_crypto', 'http.client',
+                'multiprocessing', 'random')
+
+# Mots utilisés pour produire du texte compressible reproductible
+WORDS = ("sauvegarde", "archive", "fichier", "dossier", "compression", "journal",
+         "donnees", "groupe", "version", "restauration", "index", "bloc")
+
+
+def _text_block(rng, size):
+    """Produit `size` octets de texte pseudo-aléatoire compressible"""
+    out = []
+    length = 0
+    while length < size:
+        line = " ".join(rng.choice(WORDS) for _ in range(12)) + f" {rng.randint(0, 99999)}\n"
+        out.append(line)
+        length += len(line)
+    return "".join(out).encode()[:size]
+
+
+def generate_many_small(root, count=5000, size=2048, seed=1):
+    """Beaucoup de petits fichiers texte répartis dans 50 dossiers"""
+    rng = random.Random(seed)
+    for i in range(count):
+        folder = os.path.join(root, f"dir_{i % 50:02d}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"file_{i:06d}.txt"), "wb") as f:
+            f.write(_text_block(rng, rng.randint(size // 2, size * 2)))
+
+
+def generate_few_huge(root, count=2, size=64 * 1024 * 1024, seed=2):
+    """Quelques gros fichiers compressibles, écrits par blocs"""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    block = _text_block(rng, 1024 * 1024)
+    for i in range(count):
+        with open(os.path.join(root, f"huge_{i}.log"), "wb") as f:
+            for _ in range(size // len(block)):
+                f.write(block)
+
+
+def generate_deep(root, depth=40, files_per_level=5, seed=3):
+    """Arborescence très profonde avec quelques fichiers par niveau"""
+    rng = random.Random(seed)
+    current = root
+    for level in range(depth):
+        current = os.path.join(current, f"niveau_{level:02d}")
+        os.makedirs(current, exist_ok=True)
+        for i in range(files_per_level):
+            with open(os.path.join(current, f"f{i}.txt"), "wb") as f:
+                f.write(_text_block(rng, 4096))
+
+
+def generate_incompressible(root, count=20, size=4 * 1024 * 1024, seed=4):
+    """Fichiers de données aléatoires (incompressibles)"""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(root, f"random_{i:03d}.bin"), "wb") as f:
+            f.write(rng.randbytes(size))
+
+
+def generate_wide(root, count=50000, size=64, seed=5):
+    """Un seul dossier très large de minuscules fichiers"""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(root, f"entry_{i:07d}.dat"), "wb") as f:
+            f.write(rng.randbytes(size))
+
+
+def generate_duplicates(root, count=200, copies=10, size=8192, seed=6):
+    """Dépendances recopiées: un arbre original, des copies à l'identique et des liens physiques"""
+    rng = random.Random(seed)
+    original = os.path.join(root, "vendor_0")
+    os.makedirs(original, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(original, f"module_{i:04d}.js"), "wb") as f:
+            f.write(_text_block(rng, size))
+    for copy in range(1, copies):
+        target = os.path.join(root, f"vendor_{copy}")
+        os.makedirs(target, exist_ok=True)
+        for name in sorted(os.listdir(original)):
+            if copy % 2:
+                shutil.copyfile(os.path.join(original, name), os.path.join(target, name))
+            else:
+                os.link(os.path.join(original, name), os.path.join(target, name))
+
+
+# Scénarios: nom -> (générateur, paramètres à l'échelle 1)
+SCENARIOS = {
+    'many_small': (generate_many_small, {'count': 5000}),
+    'few_huge': (generate_few_huge, {'size': 32 * 1024 * 1024}),
+    'deep': (generate_deep, {'depth': 60}),
+    'incompressible': (generate_incompressible, {'count': 16}),
+    'wide': (generate_wide, {'count': 50000}),
+    'duplicates': (generate_duplicates, {'count': 200, 'copies': 10}),
+}
+
+# Opérations mesurées sur chaque scénario
+SCENARIO_OPERATIONS = ('calculate_folder_size', 'backup_and_compress', 'backup_streaming')
+
+# Opération mesurée en plus quand le chiffrement est disponible, comparée à backup_and_compress
+ENCRYPTED_OPERATION = 'backup_encrypted'
+
+# Paramètres multipliés par --scale
+SCALED_PARAMS = ('count', 'size', 'depth')
+
+
+def build_scenario(name, root, scale=1.0):
+    """Génère l'arborescence d'un scénario à l'échelle demandée"""
+    generator, params = SCENARIOS[name]
+    params = {key: max(1, int(value * scale)) if key in SCALED_PARAMS else value
+              for key, value in params.items()}
+    generator(root, **params)
+
+
+def _io_counters():
+    """Compteurs d'appels système read/write du processus (Linux uniquement)"""
+    try:
+        with open("/proc/self/io") as f:
+            values = dict(line.split(": ") for line in f.read().splitlines())
+        return int(values['syscr']) + int(values['syscw'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _peak_rss_bytes():
+    """Pic de mémoire résidente du processus et de ses enfants terminés"""
+    factor = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * factor
+
+
+def run_operation(operation, source, dest, workers):
+    """
+    Exécute une opération mesurée dans le processus courant
+
+    Les ouvertures de fichiers et de dossiers sont comptées par un audit hook;
+    les appels read/write viennent de /proc/self/io quand il est disponible.
+    """
+    import logging
+    from backup import BackupManager
+
+    manager = BackupManager(log_level=logging.CRITICAL)
+    # Comptage en flux: aucun manifeste ne doit gonfler le pic RSS mesuré
+    files = 0
+    size = 0
+    for entry in manager.iter_directory(source):
+        files += 1
+        size += entry.size
+
+    counts = {'open': 0, 'scandir': 0}
+
+    def audit(event, args):
+        if event == "open":
+            counts['open'] += 1
+        elif event in ("os.scandir", "os.listdir"):
+            counts['scandir'] += 1
+
+    sys.addaudithook(audit)
+    io_start = _io_counters()
+    start = time.perf_counter()
+    if operation == 'backup_and_compress':
+        manager.backup_and_compress(source, dest, workers=workers)
+    elif operation == 'backup_streaming':
+        manager.backup_and_compress(source, dest, workers=workers, streaming=True)
+    elif operation == ENCRYPTED_OPERATION:
+        from backup_crypto import EncryptionKey
+        manager.backup_and_compress(source, dest, workers=workers, encryption=EncryptionKey(key=os.urandom(32)))
+    elif operation == 'calculate_folder_size':
+        manager.calculate_folder_size(source)
+    elif operation == 'list_backups':
+        manager.list_backups(dest)
+        # list_backups parcourt des archives, pas les fichiers source
+        files = sum(1 for name in os.listdir(dest) if name.endswith(".zip"))
+    else:
+        raise ValueError(f"Opération inconnue: {operation}")
+    duration = time.perf_counter() - start
+    io_end = _io_counters()
+
+    result = {
+        'operation': operation,
+        'files': files,
+        'bytes': size,
+        'duration': duration,
+        'files_per_s': files / duration if duration else 0.0,
+        'mb_per_s': size / duration / 1024 ** 2 if duration and operation != 'list_backups' else 0.0,
+        'peak_rss_bytes': _peak_rss_bytes(),
+        'opens_per_file': counts['open'] / files if files else 0.0,
+        'dir_scans': counts['scandir'],
+    }
+    if io_start is not None and io_end is not None:
+        result['io_syscalls_per_file'] = (io_end - io_start) / files if files else 0.0
+    return result
+
+
+def _measure_in_subprocess(operation, source, dest, workers):
+    """Lance une mesure dans un interpréteur neuf et récupère son résultat JSON"""
+    cmd = [sys.executable, os.path.abspath(__file__), '--run-one', operation, source, dest,
+           '--workers', str(workers)]
+    completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _startup_env():
+    """Environnement des mesures de démarrage: backup importable depuis n'importe quel dossier"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_DIR, env.get('PYTHONPATH')]))
+    return env
+
+
+def measure_startup(dest, runs=5):
+    """
+    Mesure le temps de démarrage de chaque commande de STARTUP_COMMANDS
+
+    La médiane de `runs` lancements est retenue; 'python' donne le coût
+    incompressible de l'interpréteur.
+
+    Returns:
+        list[dict]: Un résultat par commande (durée médiane et minimale en secondes)
+    """
+    results = []
+    for operation, args in STARTUP_COMMANDS.items():
+        cmd = [sys.executable] + [arg.format(dest=dest) for arg in args]
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, cwd=dest, env=_startup_env(), capture_output=True, check=True)
+            durations.append(time.perf_counter() - start)
+        durations.sort()
+        results.append({
+            'scenario': 'startup',
+            'operation': operation,
+            'startup_s': durations[len(durations) // 2],
+            'startup_min_s': durations[0],
+            'runs': runs,
+        })
+    return results
+
+
+def imported_lazy_modules():
+    """Liste les modules de LAZY_MODULES chargés par `import backup` dans un interpréteur neuf"""
+    code = ("import sys, backup; "
+            f"print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    completed = subprocess.run([sys.executable, '-c', code], env=_startup_env(),
+                               capture_output=True, text=True, check=True)
+    return completed.stdout.split()
+
+
+def _populate_archives(dest, count):
+    """Crée des archives factices pour mesurer list_backups sur une destination chargée"""
+    os.makedirs(dest, exist_ok=True)
+    for i in range(count):
+        name = f"backup_2000-01-01_00-00-00_{i}.zip"
+        with zipfile.ZipFile(os.path.join(dest, name), 'w') as zipf:
+            zipf.writestr("placeholder.txt", "x")
+
+
+def run_benchmarks(scenarios, scale=1.0, workers=1, archives=500, work_dir=None):
+    """
+    Génère chaque scénario et mesure chaque opération, puis list_backups
+
+    Le coût du chiffrement est rapporté en perte de débit par rapport à la
+    même sauvegarde en clair.
+
+    Returns:
+        dict: Résultats sérialisables en JSON
+    """
+    results = {
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'scale': scale,
+        'workers': workers,
+        'results': [],
+    }
+    operations = SCENARIO_OPERATIONS
+    if importlib.util.find_spec('cryptography') is not None:
+        operations += (ENCRYPTED_OPERATION,)
+    base_dir = tempfile.mkdtemp(prefix="backup_bench_", dir=work_dir)
+    try:
+        for name in scenarios:
+            source = os.path.join(base_dir, name, "source")
+            dest = os.path.join(base_dir, name, "dest")
+            gen_start = time.perf_counter()
+            build_scenario(name, source, scale)
+            print(f"📁 {name}: généré en {time.perf_counter() - gen_start:.1f} s", file=sys.stderr)
+
+            measured = {}
+            for operation in operations:
+                result = _measure_in_subprocess(operation, source, dest, workers)
+                result['scenario'] = name
+                results['results'].append(result)
+                measured[operation] = result
+                print(f"   {operation}: {result['files_per_s']:.0f} fichiers/s, "
+                      f"{result['mb_per_s']:.1f} Mo/s, pic RSS {result['peak_rss_bytes'] / 1024 ** 2:.1f} Mo",
+                      file=sys.stderr)
+            if ENCRYPTED_OPERATION in measured and measured['backup_and_compress']['mb_per_s']:
+                result = measured[ENCRYPTED_OPERATION]
+                result['overhead'] = 1 - result['mb_per_s'] / measured['backup_and_compress']['mb_per_s']
+                print(f"   🔐 chiffrement: {result['overhead'] * 100:+.1f}% de débit en moins", file=sys.stderr)
+            shutil.rmtree(source)
+
+        dest = os.path.join(base_dir, "list", "dest")
+        _populate_archives(dest, archives)
+        result = _measure_in_subprocess('list_backups', dest, dest, workers)
+        result['scenario'] = 'archives'
+        results['results'].append(result)
+        print(f"📋 list_backups: {result['files_per_s']:.0f} archives/s", file=sys.stderr)
+
+        empty = os.path.join(base_dir, "startup")
+        os.makedirs(empty)
+        for result in measure_startup(empty):
+            results['results'].append(result)
+            print(f"🚀 démarrage {result['operation']}: {result['startup_s'] * 1000:.0f} ms", file=sys.stderr)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return results
+
+
+def compare_results(current, baseline, threshold=0.10):
+    """
+    Compare deux séries de résultats et liste les régressions
+
+    Une régression est un débit (fichiers/s) inférieur de plus de `threshold`
+    à la référence, ou un pic de mémoire ou un temps de démarrage supérieur de
+    plus de `threshold`.
+
+    Returns:
+        list[str]: Description des régressions trouvées
+    """
+    reference = {(r['scenario'], r['operation']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        key = (result['scenario'], result['operation'])
+        old = reference.get(key)
+        if old is None:
+            continue
+        if 'startup_s' in old:
+            if result['startup_s'] > old['startup_s'] * (1 + threshold):
+                regressions.append(f"{key[0]}/{key[1]}: démarrage {result['startup_s'] * 1000:.0f} ms "
+                                   f"(référence {old['startup_s'] * 1000:.0f} ms)")
+            continue
+        if old['files_per_s'] and result['files_per_s'] < old['files_per_s'] * (1 - threshold):
+            regressions.append(f"{key[0]}/{key[1]}: débit {result['files_per_s']:.0f} fichiers/s "
+                               f"(référence {old['files_per_s']:.0f})")
+        if old['peak_rss_bytes'] and result['peak_rss_bytes'] > old['peak_rss_bytes'] * (1 + threshold):
+            regressions.append(f"{key[0]}/{key[1]}: pic RSS {result['peak_rss_bytes'] / 1024 ** 2:.1f} Mo "
+                               f"(référence {old['peak_rss_bytes'] / 1024 ** 2:.1f} Mo)")
+    return regressions
+
+
+def main(argv=None):
+    """Point d'entrée du banc de performance"""
+    parser = argparse.ArgumentParser(description="Banc de performance des sauvegardes")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scénario à exécuter (répétable, tous par défaut)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Facteur de taille des arborescences')
+    parser.add_argument('--workers', type=int, default=1, help='Workers de compression')
+    parser.add_argument('--archives', type=int, default=500, help='Archives créées pour list_backups')
+    parser.add_argument('--work-dir', help='Dossier de travail (temporaire par défaut)')
+    parser.add_argument('--output', '-o', help='Fichier JSON des résultats')
+    parser.add_argument('--baseline', help='Résultats JSON de référence à comparer')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Régression tolérée, en fraction (défaut: 0.10)')
+    parser.add_argument('--run-one', nargs=3, metavar=('OPERATION', 'SOURCE', 'DEST'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_operation(*args.run_one, workers=args.workers)))
+        return 0
+
+    results = run_benchmarks(args.scenario or list(SCENARIOS), args.scale, args.workers,
+                             args.archives, args.work_dir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Résultats écrits dans {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print("❌ Régressions détectées:", file=sys.stderr)
+            for line in regressions:
+                print(f"   - {line}", file=sys.stderr)
+            return 1
+        print("✅ Aucune régression au-delà du seuil", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Serveur S3 en mémoire pour les tests - Groupe 3
+
+Implémente sur un ThreadingHTTPServer local le sous-ensemble de l'API S3
+utilisé par S3Storage: objets (PUT, GET, HEAD, DELETE), ListObjectsV2 paginé
+et envoi multipart. Les connexions sont persistantes (HTTP/1.1); le serveur
+compte les connexions ouvertes et les parties reçues simultanément, pour
+vérifier la réutilisation des connexions et le parallélisme des envois.
+
+Exemple:
+    with FakeS3Server() as server:
+        storage = S3Storage("sauvegardes", endpoint=server.endpoint,
+                            access_key=server.access_key, secret_key=server.secret_key)
+"""
+
+import time
+import hashlib
+import datetime
+import threading
+import urllib.parse
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+S3_NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Transmet chaque requête au FakeS3Server"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.fake.lock:
+            self.server.fake.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        self.server.fake.handle(self)
+
+    do_GET = do_PUT = do_POST = do_DELETE = do_HEAD = _handle
+
+
+class FakeS3Server:
+    """
+    Service S3 en mémoire, à adressage par chemin (http://hôte:port/bucket/clé)
+
+    Args:
+        buckets (tuple): Buckets existants au démarrage
+        min_part_size (int): Taille minimale des parties (sauf la dernière)
+        part_delay (float): Délai de traitement de chaque partie (secondes)
+        max_keys (int): Nombre maximal d'objets par page de liste
+    """
+
+    access_key = "AKIDTEST"
+    secret_key = "secret-test"
+
+    def __init__(self, buckets=("sauvegardes",), min_part_size=0, part_delay=0.0, max_keys=1000):
+        self.buckets = {name: {} for name in buckets}
+        self.uploads = {}
+        self.min_part_size = min_part_size
+        self.part_delay = part_delay
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.active_parts = 0
+        self.max_active_parts = 0
+        self.parts_received = 0
+        # Nombre de prochaines requêtes auxquelles répondre 500 (tentatives du client)
+        self.fail_requests = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _send(self, handler, status, body=b'', headers=None):
+        handler.send_response(status)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if handler.command != 'HEAD':
+            handler.wfile.write(body)
+
+    def _error(self, handler, status, code, message=''):
+        body = (f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><Error><Code>{code}</Code>"
+                f"<Message>{escape(message)}</Message></Error>").encode()
+        self._send(handler, status, body, {"Content-Type": "application/xml"})
+
+    def handle(self, handler):
+        """Traite une requête S3"""
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b''
+        with self.lock:
+            fail = self.fail_requests > 0
+            self.fail_requests -= fail
+        if fail:
+            return self._error(handler, 500, "InternalError", "Échec simulé")
+        if not handler.headers.get("Authorization", "").startswith(
+                f"AWS4-HMAC-SHA256 Credential={self.access_key}/"):
+            return self._error(handler, 403, "AccessDenied", "Signature absente")
+        if handler.headers.get("x-amz-content-sha256") != hashlib.sha256(body).hexdigest():
+            return self._error(handler, 400, "XAmzContentSHA256Mismatch")
+
+        url = urllib.parse.urlsplit(handler.path)
+        params = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+        bucket_name, _, key = urllib.parse.unquote(url.path).lstrip('/').partition('/')
+        bucket = self.buckets.get(bucket_name)
+        if bucket is None:
+            return self._error(handler, 404, "NoSuchBucket", bucket_name)
+        method = handler.command
+
+        if not key:
+            if method == 'GET':
+                return self._list(handler, bucket, params)
+            return self._error(handler, 405, "MethodNotAllowed")
+        if 'uploadId' in params:
+            return self._multipart(handler, bucket, key, params, body)
+        if method == 'POST' and 'uploads' in params:
+            upload_id = hashlib.md5(f"{key}{time.time_ns()}".encode()).hexdigest()
+            with self.lock:
+                self.uploads[upload_id] = {'key': key, 'parts': {}}
+            return self._send(handler, 200, (f"<InitiateMultipartUploadResult xmlns=\"{S3_NS}\">"
+                                             f"<Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId>"
+                                             f"</InitiateMultipartUploadResult>").encode())
+        if method == 'PUT':
+            with self.lock:
+                bucket[key] = (body, datetime.datetime.now(datetime.timezone.utc))
+            return self._send(handler, 200, headers={"ETag": f'"{hashlib.md5(body).hexdigest()}"'})
+        if method in ('GET', 'HEAD'):
+            with self.lock:
+                stored = bucket.get(key)
+            if stored is None:
+                return self._error(handler, 404, "NoSuchKey", key)
+            return self._send(handler, 200, stored[0])
+        if method == 'DELETE':
+            with self.lock:
+                bucket.pop(key, None)
+            return self._send(handler, 204)
+        return self._error(handler, 405, "MethodNotAllowed")
+
+    def _list(self, handler, bucket, params):
+        """ListObjectsV2, avec délimiteur et pagination"""
+        prefix = params.get('prefix', '')
+        delimiter = params.get('delimiter')
+        start = params.get('continuation-token', '')
+        max_keys = min(int(params.get('max-keys', 1000)), self.max_keys)
+        with self.lock:
+            keys = sorted(key for key in bucket if key.startswith(prefix) and key > start
+                          and not (delimiter and delimiter in key[len(prefix):]))
+            page = [(key, bucket[key]) for key in keys[:max_keys]]
+        truncated = len(keys) > max_keys
+        contents = ''.join(
+            f"<Contents><Key>{escape(key)}</Key><Size>{len(data)}</Size>"
+            f"<LastModified>{modified.strftime('%Y-%m-%dT%H:%M:%S.000Z')}</LastModified></Contents>"
+            for key, (data, modified) in page)
+        token = f"<NextContinuationToken>{escape(page[-1][0])}</NextContinuationToken>" if truncated else ''
+        body = (f"<ListBucketResult xmlns=\"{S3_NS}\"><Prefix>{escape(prefix)}</Prefix>"
+                f"<KeyCount>{len(page)}</KeyCount><IsTruncated>{'true' if truncated else 'false'}</IsTruncated>"
+                f"{token}{contents}</ListBucketResult>")
+        self._send(handler, 200, body.encode(), {"Content-Type": "application/xml"})
+
+    def _multipart(self, handler, bucket, key, params, body):
+        """Envoi d'une partie, assemblage ou abandon d'un envoi multipart"""
+        upload = self.uploads.get(params['uploadId'])
+        if upload is None or upload['key'] != key:
+            return self._error(handler, 404, "NoSuchUpload")
+        method = handler.command
+        if method == 'PUT':
+            with self.lock:
+                self.active_parts += 1
+                self.max_active_parts = max(self.max_active_parts, self.active_parts)
+            try:
+                time.sleep(self.part_delay)
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                with self.lock:
+                    upload['parts'][int(params['partNumber'])] = (body, etag)
+                    self.parts_received += 1
+            finally:
+                with self.lock:
+                    self.active_parts -= 1
+            return self._send(handler, 200, headers={"ETag": etag})
+        if method == 'DELETE':
+            with self.lock:
+                self.uploads.pop(params['uploadId'], None)
+            return self._send(handler, 204)
+        if method == 'POST':
+            requested = [(int(part.findtext('PartNumber')), part.findtext('ETag'))
+                         for part in ET.fromstring(body).iterfind('Part')]
+            numbers = [number for number, _ in requested]
+            if numbers != sorted(set(numbers)):
+                return self._error(handler, 400, "InvalidPartOrder")
+            data = []
+            for index, (number, etag) in enumerate(requested):
+                part = upload['parts'].get(number)
+                if part is None or part[1] != etag:
+                    return self._error(handler, 400, "InvalidPart", str(number))
+                if index < len(requested) - 1 and len(part[0]) < self.min_part_size:
+                    return self._error(handler, 400, "EntityTooSmall", str(number))
+                data.append(part[0])
+            with self.lock:
+                bucket[key] = (b''.join(data), datetime.datetime.now(datetime.timezone.utc))
+                self.uploads.pop(params['uploadId'], None)
+            return self._send(handler, 200, (f"<CompleteMultipartUploadResult xmlns=\"{S3_NS}\">"
+                                             f"<Key>{escape(key)}</Key></CompleteMultipartUploadResult>").encode())
+        return self._error(handler, 405, "MethodNotAllowed")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests unitaires pour l'API asyncio des sauvegardes - Groupe 3
+"""
+
+import unittest
+import tempfile
+import os
+import shutil
+import sys
+import asyncio
+import logging
+import zipfile
+import threading
+import time
+
+# Ajouter le répertoire parent au path pour importer backup
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup import BackupManager
+from backup_async import AsyncBackupManager, AsyncOperation
+
+class TestAsyncBackupManager(unittest.TestCase):
+    """Tests pour AsyncBackupManager"""
+    
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.temp_dir, "source")
+        self.backup_dir = os.path.join(self.temp_dir, "backup")
+        self.restore_dir = os.path.join(self.temp_dir, "restore")
+        os.makedirs(self.source_dir)
+        for i in range(200):
+            with open(os.path.join(self.source_dir, f"fichier_{i:03d}.txt"), "wb") as f:
+                f.write(os.urandom(2048))
+        self.manager = AsyncBackupManager(BackupManager(log_level=logging.CRITICAL))
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_backup_progress_list_and_restore(self):
+        """Test une sauvegarde avec progression, puis la liste et la restauration"""
+        async def scenario():
+            operation = self.manager.start_backup(self.source_dir, self.backup_dir)
+            updates = [update async for update in operation.progress()]
+            path = await operation
+            backups = await self.manager.list_backups(self.backup_dir)
+            restored = await self.manager.restore(path, self.restore_dir)
+            return updates, path, backups, restored
+        
+        updates, path, backups, restored = asyncio.run(scenario())
+        self.assertTrue(updates[-1]['finished'])
+        self.assertEqual(updates[-1]['files_done'], 200)
+        self.assertEqual([b['path'] for b in backups], [path])
+        self.assertEqual(restored, 200)
+    
+    def test_event_loop_not_blocked(self):
+        """Test que la boucle reste disponible pendant deux sauvegardes simultanées"""
+        async def scenario():
+            ticks = 0
+            backups = asyncio.gather(self.manager.backup(self.source_dir, self.backup_dir),
+                                     self.manager.backup(self.source_dir, self.backup_dir))
+            while not backups.done():
+                ticks += 1
+                await asyncio.sleep(0)
+            return ticks, await backups
+        
+        ticks, paths = asyncio.run(scenario())
+        self.assertGreater(ticks, 1)
+        self.assertNotEqual(paths[0], paths[1])
+        self.assertTrue(all(zipfile.is_zipfile(path) for path in paths))
+    
+    def test_cancel_removes_partial_archive(self):
+        """Test que l'annulation arrête la sauvegarde sans laisser d'archive partielle"""
+        async def scenario():
+            operation = self.manager.start_backup(self.source_dir, self.backup_dir)
+            async for update in operation.progress():
+                operation.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await operation
+            return operation
+        
+        operation = asyncio.run(scenario())
+        self.assertTrue(operation.cancel_event.is_set())
+        self.assertEqual([name for name in os.listdir(self.backup_dir) if name.endswith(".zip")], [])
+    
+    def test_cancel_after_completion_keeps_result(self):
+        """Test qu'une opération terminée malgré l'annulation garde son résultat"""
+        started = threading.Event()
+        
+        def finish_anyway(cancel_event):
+            started.set()
+            time.sleep(0.2)
+            return "resultat"
+        
+        async def scenario():
+            operation = AsyncOperation(finish_anyway, logger=logging.getLogger("test_async"))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            operation.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await operation
+            return operation
+        
+        with self.assertLogs("test_async", level=logging.WARNING):
+            operation = asyncio.run(scenario())
+        self.assertEqual(operation.completed_result, "resultat")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Tests unitaires pour le catalogue des sauvegardes - Groupe 3
+"""
+
+import unittest
+import tempfile
+import os
+import shutil
+import sys
+import datetime
+import logging
+import zipfile
+import sqlite3
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer backup
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup import BackupManager, main
+from backup_catalog import BackupCatalog, CATALOG_FILENAME
+
+class TestBackupCatalog(unittest.TestCase):
+    """Tests pour le catalogue SQLite et son usage par list_backups"""
+    
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.temp_dir, "source")
+        self.backup_dir = os.path.join(self.temp_dir, "backup")
+        os.makedirs(os.path.join(self.source_dir, "docs"))
+        with open(os.path.join(self.source_dir, "a.txt"), "w") as f:
+            f.write("A" * 3000)
+        with open(os.path.join(self.source_dir, "docs", "b.md"), "w") as f:
+            f.write("# B")
+        self.backup_manager = BackupManager(log_level=logging.CRITICAL)
+        self.catalog = BackupCatalog(self.backup_dir)
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_backup_is_recorded(self):
+        """Test que chaque sauvegarde est enregistrée avec ses statistiques et ses membres"""
+        before = datetime.datetime.now().replace(microsecond=0)
+        backup_path = self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        
+        (record,) = self.catalog.list_backups()
+        self.assertEqual(record['name'], os.path.basename(backup_path))
+        self.assertEqual(record['type'], 'full')
+        self.assertEqual(record['file_count'], 2)
+        self.assertEqual(record['original_size'], 3003)
+        self.assertEqual(record['compressed_size'], os.path.getsize(backup_path))
+        self.assertGreaterEqual(record['created'], before)
+        self.assertEqual([hit['path'] for hit in self.catalog.find_path("docs/*")], ["docs/b.md"])
+    
+    def test_date_survives_mtime_change(self):
+        """Test que la date listée ne dépend pas du mtime de l'archive (copie, rsync)"""
+        backup_path = self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        created = self.backup_manager.list_backups(self.backup_dir)[0]['date']
+        os.utime(backup_path, (1000000000, 1000000000))
+        
+        self.assertEqual(self.backup_manager.list_backups(self.backup_dir)[0]['date'], created)
+    
+    def test_reconcile_with_directory(self):
+        """Test l'ajout des archives inconnues et le retrait des archives supprimées"""
+        first = self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        os.remove(os.path.join(self.backup_dir, CATALOG_FILENAME))
+        second = self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        
+        backups = self.backup_manager.list_backups(self.backup_dir)
+        self.assertEqual(sorted(b['path'] for b in backups), sorted([first, second]))
+        legacy = next(b for b in backups if b['path'] == first)
+        self.assertEqual(legacy['file_count'], 2)
+        self.assertEqual(len(self.catalog.find_path("a.txt")), 2)
+        
+        os.remove(second)
+        self.assertEqual([b['path'] for b in self.backup_manager.list_backups(self.backup_dir)], [first])
+        self.assertEqual(len(self.catalog.find_path("a.txt")), 1)
+    
+    def test_filter_by_date(self):
+        """Test le filtrage des sauvegardes par période de création"""
+        for day in (1, 2, 3):
+            self.catalog_record(f"backup_2025-07-0{day}_12-00-00.zip", datetime.datetime(2025, 7, day, 12))
+        
+        backups = self.backup_manager.list_backups(self.backup_dir, since=datetime.datetime(2025, 7, 2),
+                                                   until=datetime.datetime(2025, 7, 3))
+        self.assertEqual([b['name'] for b in backups], ["backup_2025-07-02_12-00-00.zip"])
+    
+    def test_listing_does_not_write_up_to_date_catalog(self):
+        """Test qu'une liste sur un catalogue à jour ne l'ouvre qu'en lecture"""
+        self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        catalog_path = os.path.join(self.backup_dir, CATALOG_FILENAME)
+        before = os.stat(catalog_path).st_mtime_ns
+        
+        with patch('backup_catalog.BackupCatalog.record_backup') as record, \
+                patch('backup_catalog.BackupCatalog.remove_backups') as remove:
+            self.assertEqual(len(self.backup_manager.list_backups(self.backup_dir)), 1)
+        record.assert_not_called()
+        remove.assert_not_called()
+        self.assertEqual(os.stat(catalog_path).st_mtime_ns, before)
+    
+    def test_listing_without_catalog_falls_back_to_directory(self):
+        """Test la liste par parcours du dossier quand le catalogue ne peut être ouvert"""
+        backup_path = self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        os.remove(os.path.join(self.backup_dir, CATALOG_FILENAME))
+        
+        with patch('backup_catalog.sqlite3.connect',
+                   side_effect=sqlite3.OperationalError("unable to open database file")):
+            backups = self.backup_manager.list_backups(self.backup_dir)
+        self.assertEqual([b['path'] for b in backups], [backup_path])
+        self.assertEqual(backups[0]['size'], os.path.getsize(backup_path))
+        self.assertFalse(os.path.exists(os.path.join(self.backup_dir, CATALOG_FILENAME)))
+    
+    def catalog_record(self, name, created):
+        """Crée une archive vide et son entrée de catalogue"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        with open(os.path.join(self.backup_dir, name), "wb") as f:
+            f.write(b"PK\x05\x06" + b"\0" * 18)
+        self.catalog.record_backup(name, 'full', created, 0, 0, 22)
+
+class TestFind(unittest.TestCase):
+    """Tests pour la recherche de fichiers dans les sauvegardes"""
+    
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.temp_dir, "source")
+        self.backup_dir = os.path.join(self.temp_dir, "backup")
+        os.makedirs(os.path.join(self.source_dir, "docs"))
+        self.write("docs/rapport.txt", "version 1")
+        self.write("notes.txt", "notes")
+        self.backup_manager = BackupManager(log_level=logging.CRITICAL)
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.temp_dir)
+    
+    def write(self, name, content):
+        """Écrit un fichier dans la source"""
+        with open(os.path.join(self.source_dir, name), "w") as f:
+            f.write(content)
+    
+    def test_find_versions(self):
+        """Test que chaque sauvegarde contenant le fichier est listée avec sa version"""
+        first = self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        self.write("docs/rapport.txt", "version 2, plus longue")
+        second = self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        
+        results = self.backup_manager.find(self.backup_dir, "docs/rapport.txt")
+        self.assertEqual(sorted(r['path'] for r in results), sorted([first, second]))
+        sizes = sorted(r['matches'][0]['size'] for r in results)
+        self.assertEqual(sizes, [9, 22])
+        
+        self.assertEqual(len(self.backup_manager.find(self.backup_dir, "docs")), 2)
+        self.assertEqual(len(self.backup_manager.find(self.backup_dir, "*.txt")[0]['matches']), 2)
+        self.assertEqual(self.backup_manager.find(self.backup_dir, "absent.txt"), [])
+    
+    def test_find_indexes_existing_and_replaced_archives(self):
+        """Test l'indexation paresseuse des archives sans catalogue ou modifiées depuis"""
+        backup_path = self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        os.remove(os.path.join(self.backup_dir, CATALOG_FILENAME))
+        self.assertEqual(len(self.backup_manager.find(self.backup_dir, "notes.txt")), 1)
+        
+        with zipfile.ZipFile(backup_path, 'w') as zipf:
+            zipf.writestr("autre.txt", "remplacée")
+        self.assertEqual(self.backup_manager.find(self.backup_dir, "notes.txt"), [])
+        self.assertEqual(len(self.backup_manager.find(self.backup_dir, "autre.txt")), 1)
+    
+    def test_find_subcommand(self):
+        """Test la sous-commande find"""
+        self.backup_manager.backup_and_compress(self.source_dir, self.backup_dir)
+        with patch('builtins.print') as mock_print:
+            self.assertEqual(main(['find', self.backup_dir, 'docs/*']), 0)
+        output = " ".join(str(call.args[0]) for call in mock_print.call_args_list)
+        self.assertIn("docs/rapport.txt", output)
+        with patch('builtins.print'):
+            self.assertEqual(main(['find', self.backup_dir, 'absent.txt']), 1)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests unitaires pour l'ordonnanceur de tâches de sauvegarde - Groupe 3
+"""
+
+import unittest
+import tempfile
+import os
+import shutil
+import json
+import sys
+import time
+import threading
+import zipfile
+import logging
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer backup
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup import BackupManager
+from backup_scheduler import BackupScheduler, load_job_file
+
+class TestJobFile(unittest.TestCase):
+    """Tests pour le chargement des fichiers de tâches"""
+    
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.temp_dir)
+    
+    def write(self, name, content):
+        """Écrit un fichier de tâches et retourne son chemin"""
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+    
+    def test_load_toml_with_defaults(self):
+        """Test un fichier TOML avec options par défaut et limites"""
+        path = self.write("jobs.toml", """
+[scheduler]
+max_concurrent = 3
+
+[defaults]
+incremental = true
+
+[[jobs]]
+name = "docs"
+source = "/src/docs"
+destination = "/dst"
+
+[[jobs]]
+source = "/src/photos"
+destination = "/dst"
+incremental = false
+""")
+        jobs, options = load_job_file(path)
+        self.assertEqual(options, {'max_concurrent': 3})
+        self.assertEqual([job['name'] for job in jobs], ["docs", "job2"])
+        self.assertTrue(jobs[0]['incremental'])
+        self.assertFalse(jobs[1]['incremental'])
+    
+    def test_load_json_and_yaml(self):
+        """Test les formats JSON et YAML"""
+        config = {'jobs': [{'name': 'a', 'source': '/s', 'destination': '/d', 'workers': 2}]}
+        jobs, _ = load_job_file(self.write("jobs.json", json.dumps(config)))
+        self.assertEqual(jobs[0]['workers'], 2)
+        
+        try:
+            import yaml  # noqa: F401
+        except ImportError:
+            self.skipTest("PyYAML non installé")
+        jobs, _ = load_job_file(self.write("jobs.yaml", "jobs:\n  - {name: a, source: /s, destination: /d}\n"))
+        self.assertEqual(jobs[0]['source'], "/s")
+    
+    def test_invalid_job_file(self):
+        """Test le rejet des options inconnues et des tâches incomplètes"""
+        with self.assertRaises(ValueError):
+            load_job_file(self.write("a.json", json.dumps({'jobs': [{'source': '/s', 'destination': '/d',
+                                                                    'compression': 9}]})))
+        with self.assertRaises(ValueError):
+            load_job_file(self.write("b.json", json.dumps({'jobs': [{'source': '/s'}]})))
+        with self.assertRaises(ValueError):
+            load_job_file(self.write("jobs.ini", "[jobs]"))
+
+class TestBackupScheduler(unittest.TestCase):
+    """Tests pour l'exécution concurrente des tâches"""
+    
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.backup_manager = BackupManager(log_level=logging.CRITICAL)
+        self.jobs = []
+        for i in range(4):
+            source = os.path.join(self.temp_dir, f"source{i}")
+            os.makedirs(source)
+            with open(os.path.join(source, "fichier.txt"), "w") as f:
+                f.write(f"contenu {i}")
+            self.jobs.append({'name': f"job{i}", 'source': source,
+                              'destination': os.path.join(self.temp_dir, f"dest{i}")})
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.temp_dir)
+    
+    def run_with_fake_jobs(self, scheduler):
+        """Exécute les tâches avec une sauvegarde simulée et retourne la concurrence maximale"""
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+        
+        def fake_run(job):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.05)
+            with lock:
+                state['running'] -= 1
+            return {'name': job['name'], 'status': 'ok'}
+        
+        with patch.object(scheduler, '_run_job', side_effect=fake_run):
+            results = scheduler.run(self.jobs)
+        self.assertEqual([r['name'] for r in results], [job['name'] for job in self.jobs])
+        return state['peak']
+    
+    def test_per_device_limit(self):
+        """Test que la limite par disque borne la concurrence (tout est sur le même disque ici)"""
+        scheduler = BackupScheduler(self.backup_manager, max_concurrent=4)
+        self.assertEqual(self.run_with_fake_jobs(scheduler), 1)
+    
+    def test_global_limit(self):
+        """Test la limite globale lorsque les limites par disque sont larges"""
+        scheduler = BackupScheduler(self.backup_manager, max_concurrent=2,
+                                    per_source_device=10, per_destination_device=10)
+        self.assertEqual(self.run_with_fake_jobs(scheduler), 2)
+    
+    def test_volume_dirs_count_toward_destination_limit(self):
+        """Test que les disques de volume_dirs comptent dans la limite par disque destination"""
+        for job in self.jobs:
+            job['volume_dirs'] = ["/mnt/disque_partage"]
+        scheduler = BackupScheduler(self.backup_manager, max_concurrent=4, per_source_device=10)
+        with patch('backup_scheduler.device_of', side_effect=lambda path: path):
+            self.assertEqual(self.run_with_fake_jobs(scheduler), 1)
+    
+    def test_exclude_from_expands_home(self):
+        """Test que le chemin exclude_from d'une tâche accepte ~"""
+        with open(os.path.join(self.temp_dir, "exclusions.txt"), "w") as f:
+            f.write("*.txt\n")
+        self.jobs = self.jobs[:1]
+        self.jobs[0]['exclude_from'] = "~/exclusions.txt"
+        scheduler = BackupScheduler(self.backup_manager)
+        with patch.dict(os.environ, {'HOME': self.temp_dir}):
+            (result,) = scheduler.run(self.jobs)
+        self.assertEqual(result['status'], 'ok')
+        self.assertEqual(result['files'], 0)
+    
+    def test_run_real_jobs_with_summary(self):
+        """Test l'exécution réelle des tâches, une tâche en échec n'arrêtant pas les autres"""
+        self.jobs[1]['source'] = os.path.join(self.temp_dir, "inexistant")
+        scheduler = BackupScheduler(self.backup_manager, max_concurrent=2, per_source_device=2,
+                                    per_destination_device=2)
+        results = scheduler.run(self.jobs)
+        scheduler.log_summary(results)
+        
+        self.assertEqual([r['status'] for r in results], ['ok', 'error', 'ok', 'ok'])
+        for result in (results[0], results[2], results[3]):
+            self.assertEqual(result['files'], 1)
+            self.assertTrue(zipfile.is_zipfile(result['path']))
+        self.assertIn("n'existe pas", results[1]['error'])
+    
+    def test_encrypted_jobs(self):
+        """Test les clés de chiffrement d'une tâche (fichier de clé, phrase de passe de l'environnement)"""
+        from backup_crypto import check_available, generate_key_file
+        try:
+            check_available()
+        except RuntimeError:
+            self.skipTest("cryptography non installé")
+        key_path = os.path.join(self.temp_dir, "cle.key")
+        generate_key_file(key_path)
+        self.jobs[0]['key_file'] = key_path
+        self.jobs[1]['passphrase_env'] = "TEST_BACKUP_PASSPHRASE_ABSENTE"
+        results = BackupScheduler(self.backup_manager).run(self.jobs[:2])
+        self.assertEqual([r['status'] for r in results], ['ok', 'error'])
+        self.assertTrue(results[0]['path'].endswith(".zip.enc"))
+        self.assertEqual(results[0]['size'], os.path.getsize(results[0]['path']))
+        self.assertIn("TEST_BACKUP_PASSPHRASE_ABSENTE", results[1]['error'])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)